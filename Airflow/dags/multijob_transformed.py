@@ -6,6 +6,20 @@ from datetime import datetime, timedelta
 import time
 import re
 import uuid
+import hashlib
+from skill_extraction import extract_skills
+from salary_extraction import parse_salary
+
+# Namespace for listing ids derived from content hashes
+LISTING_ID_NAMESPACE = uuid.UUID('5b0f7f3e-2f4c-4d38-9a41-6f1d2c8e7a10')
+
+def listing_content_hash(title, company, location, description, job_highlights):
+    """Hash of the listing content; the same posting hashes the same on every run"""
+    content = '\x1f'.join(
+        ' '.join(str(value or '').split()).lower()
+        for value in (title, company, location, description, job_highlights)
+    )
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 def extract_days_ago(posted_at):
     """Extract number of days from posted_at string"""
@@ -127,14 +141,31 @@ def extract_jobs_for_title(api_key, job_title, num_pages=30):
                 # Format job highlights
                 job_highlights = format_job_highlights(job.get('job_highlights', []))
                 
+                # Normalized skills mentioned in the description or highlights
+                skills = extract_skills(job.get('description', ''), job_highlights)
+                
+                # Annual salary range from the listing's salary tag, else its text
+                salary = parse_salary(
+                    job.get('detected_extensions', {}).get('salary'), job.get('description'), job_highlights
+                )
+                
+                # Stable id so the archive and saved jobs keep pointing at the same listing
+                content_hash = listing_content_hash(
+                    job.get('title'), job.get('company_name'), job.get('location'),
+                    job.get('description'), job_highlights
+                )
+                
                 job_data = {
-                    'job_id': str(uuid.uuid4()),
+                    'job_id': str(uuid.uuid5(LISTING_ID_NAMESPACE, content_hash)),
+                    'content_hash': content_hash,
                     'search_query': job_title,
                     'title': job.get('title', 'N/A'),
                     'company': job.get('company_name', 'N/A'),
                     'location': job.get('location', 'N/A'),
                     'description': job.get('description', 'N/A'),
                     'job_highlights': job_highlights,
+                    'skills': ', '.join(skills),
+                    **salary,
                     'posted_at': posted_at,
                     'posted_date': posted_date,
                     'apply_links': '\n'.join(apply_links) if apply_links else 'N/A'  # Changed from ' | ' to '\n'
@@ -161,8 +192,9 @@ def extract_jobs_for_title(api_key, job_title, num_pages=30):
 
 def save_to_csv(jobs_data, filename='tech_jobs.csv'):
     """Save the extracted jobs data to a CSV file"""
-    fieldnames = ['job_id', 'search_query', 'title', 'company', 'location', 
-                 'description', 'job_highlights', 'posted_at', 'posted_date', 'apply_links']
+    fieldnames = ['job_id', 'content_hash', 'search_query', 'title', 'company', 'location', 
+                 'description', 'job_highlights', 'skills', 'salary_min', 'salary_max', 'salary_currency',
+                 'salary_period', 'posted_at', 'posted_date', 'apply_links']
     
     try:
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
@@ -0,0 +1,116 @@
+import re
+
+CURRENCIES = {'$': 'USD', '£': 'GBP', '€': 'EUR'}
+
+# Multipliers that turn a pay rate into an annual figure (40h weeks, 52 weeks)
+ANNUAL_MULTIPLIERS = {'hour': 2080, 'day': 260, 'week': 52, 'month': 12, 'year': 1}
+
+PERIOD_WORDS = [
+    (re.compile(r'\b(hour|hr|hourly)\b'), 'hour'),
+    (re.compile(r'\b(day|daily)\b'), 'day'),
+    (re.compile(r'\b(week|weekly|wk)\b'), 'week'),
+    (re.compile(r'\b(month|monthly|mo)\b'), 'month'),
+    (re.compile(r'\b(year|yearly|yr|annum|annual|annually|salary)\b'), 'year'),
+]
+
+AMOUNT = r'(?P<{0}_cur>[$£€])?\s?(?P<{0}_num>\d{{1,3}}(?:,\d{{3}})+|\d+)(?:\.(?P<{0}_dec>\d{{1,2}}))?\s?(?P<{0}_k>[kK])?\b'
+SALARY_PATTERN = re.compile(
+    r'(?:(?P<low_cur>[$£€])\s?|(?<![\w.,$£€]))'  # the symbol is optional: SerpAPI tags read "120K–150K a year"
+    r'(?P<low_num>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<low_dec>\d{1,2}))?\s?(?P<low_k>[kK])?\b'
+    r'(?:\s*/\s*[a-z]+)?'  # "$76/hour to $81/hour"
+    r'(?:\s*(?:-|–|—|to)\s*' + AMOUNT.format('high') + r')?'
+)
+
+# Amounts that are not pay: company size, bonuses, funding, headcounts
+NOT_PAY = re.compile(
+    r'^\s*(?:[kK]\s*)?\+?\s*(?:billion|million|bn|mm|m\b|in\b|of\b|sign|bonus|relocation|stipend|funding|revenue|assets'
+    r'|employees|users|customers|members|people|students|plan|match)'
+)
+
+# Without a currency symbol an amount only counts as pay when it uses K
+# notation or names its period right after it ("50 an hour")
+PERIOD_AFTER = re.compile(r'^\s*(?:(?:a|an|per|/)\s*(?:hour|hr|day|week|month|year|yr|annum)\b|hourly|yearly|annually)')
+RETIREMENT_PLAN = re.compile(r'^401\s?k$', re.IGNORECASE)
+
+# Annual pay outside this range is taken to be a parsing mistake
+MIN_ANNUAL = 15000
+MAX_ANNUAL = 1000000
+
+
+def _amount(match, side):
+    number = match.group(f'{side}_num')
+    if number is None:
+        return None
+    value = float(number.replace(',', ''))
+    if match.group(f'{side}_dec'):
+        value += float('0.' + match.group(f'{side}_dec'))
+    if match.group(f'{side}_k'):
+        value *= 1000
+    return value
+
+
+def _named_period(text):
+    """The period word closest to the start of text ("per year, paid bi-monthly" is yearly)"""
+    found = [(match.start(), period) for pattern, period in PERIOD_WORDS for match in [pattern.search(text)] if match]
+    return min(found)[1] if found else None
+
+
+def _period(around, before, amount):
+    """Pay period named at or right after the amount, else before it, else guessed from its size"""
+    period = _named_period(around) or _named_period(before)
+    if period:
+        return period
+    if amount >= 10000:
+        return 'year'
+    if amount < 500:
+        return 'hour'
+    return None
+
+
+def parse_salary(*texts):
+    """
+    First salary found in the given texts, normalized to annual figures:
+    {'salary_min', 'salary_max', 'salary_currency', 'salary_period'}, with
+    None values when no plausible salary is mentioned. salary_period is the
+    period the pay was quoted in. Ranges ("$110,000 to $160,000 per year"),
+    hourly rates ("$76/hour") and K notation ("$120K-$150K") are understood,
+    as are SerpAPI salary tags without a currency symbol ("120K–150K a year").
+    """
+    for text in texts:
+        if not text or text == 'N/A':
+            continue
+        for match in SALARY_PATTERN.finditer(text):
+            after = text[match.end():match.end() + 30].lower()
+            # "$5,000 annual bonus", but not "$150K plus a $10,000 bonus"
+            if NOT_PAY.match(after) or 'bonus' in after.split('$')[0]:
+                continue
+            symbol = match.group('low_cur') or match.group('high_cur')
+            if not symbol and (
+                RETIREMENT_PLAN.match(match.group(0).strip())
+                or not (match.group('low_k') or match.group('high_k') or PERIOD_AFTER.match(after))
+            ):
+                continue
+            low = _amount(match, 'low')
+            high = _amount(match, 'high') or low
+            # "$120-150K": the K applies to both ends
+            if match.group('high_k') and not match.group('low_k') and low < 1000:
+                low *= 1000
+            if high < low:
+                continue
+            around = text[match.start():match.end() + 30].lower()
+            before = text[max(0, match.start() - 40):match.start()].lower()
+            period = _period(around, before, low)
+            if period is None:
+                continue
+            multiplier = ANNUAL_MULTIPLIERS[period]
+            salary_min, salary_max = round(low * multiplier), round(high * multiplier)
+            if salary_min < MIN_ANNUAL or salary_max > MAX_ANNUAL:
+                continue
+            return {
+                'salary_min': salary_min,
+                'salary_max': salary_max,
+                # Symbol-less tags come from US-centric SerpAPI results
+                'salary_currency': CURRENCIES[symbol] if symbol else 'USD',
+                'salary_period': period,
+            }
+    return {'salary_min': None, 'salary_max': None, 'salary_currency': None, 'salary_period': None}
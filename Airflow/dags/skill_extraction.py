@@ -0,0 +1,161 @@
+from collections import deque
+
+# Curated skill dictionary: canonical skill name -> aliases matched in job text.
+# Aliases are matched case-insensitively on word boundaries, so words that are
+# also ordinary English ("react", "spark", "excel", "security") only appear in
+# qualified forms.
+SKILL_DICTIONARY = {
+    'python': ['python'],
+    'java': ['java'],
+    'scala': ['scala'],
+    'javascript': ['javascript', 'js'],
+    'typescript': ['typescript'],
+    'go': ['golang', 'go lang'],
+    'c++': ['c++', 'cpp'],
+    'c#': ['c#', '.net', 'dotnet'],
+    'rust': ['rust'],
+    'r': ['r programming', 'rstudio'],
+    'sql': ['sql', 't-sql', 'pl/sql', 'plsql'],
+    'bash': ['bash', 'shell scripting'],
+    'html/css': ['html', 'css'],
+    'react': ['react.js', 'reactjs', 'react native'],
+    'angular': ['angular'],
+    'vue': ['vue', 'vue.js', 'vuejs'],
+    'node.js': ['node.js', 'nodejs'],
+    'django': ['django'],
+    'flask': ['flask'],
+    'fastapi': ['fastapi'],
+    'spring': ['spring boot', 'spring framework', 'springboot'],
+    'rest apis': ['rest api', 'rest apis', 'restful', 'restful apis'],
+    'graphql': ['graphql'],
+    'microservices': ['microservices', 'microservice'],
+    'aws': ['aws', 'amazon web services'],
+    'azure': ['azure', 'microsoft azure'],
+    'gcp': ['gcp', 'google cloud', 'google cloud platform'],
+    'docker': ['docker', 'containerization'],
+    'kubernetes': ['kubernetes', 'k8s', 'eks', 'aks', 'gke'],
+    'terraform': ['terraform'],
+    'ansible': ['ansible'],
+    'jenkins': ['jenkins'],
+    'ci/cd': ['ci/cd', 'cicd', 'continuous integration', 'continuous delivery', 'continuous deployment'],
+    'git': ['git', 'github', 'gitlab', 'bitbucket'],
+    'linux': ['linux', 'unix'],
+    'prometheus': ['prometheus'],
+    'grafana': ['grafana'],
+    'snowflake': ['snowflake'],
+    'databricks': ['databricks'],
+    'spark': ['pyspark', 'apache spark', 'spark sql', 'spark streaming'],
+    'hadoop': ['hadoop', 'hdfs', 'apache hive', 'hiveql'],
+    'kafka': ['kafka', 'apache kafka'],
+    'airflow': ['airflow', 'apache airflow'],
+    'dbt': ['dbt'],
+    'etl': ['etl', 'elt', 'data pipelines', 'data pipeline'],
+    'data warehousing': ['data warehouse', 'data warehousing', 'redshift', 'bigquery'],
+    'postgresql': ['postgresql', 'postgres'],
+    'mysql': ['mysql'],
+    'mongodb': ['mongodb', 'mongo'],
+    'redis': ['redis'],
+    'elasticsearch': ['elasticsearch', 'elastic search', 'opensearch'],
+    'nosql': ['nosql', 'cassandra', 'dynamodb'],
+    'pandas': ['pandas'],
+    'numpy': ['numpy'],
+    'scikit-learn': ['scikit-learn', 'sklearn', 'scikit learn'],
+    'tensorflow': ['tensorflow'],
+    'pytorch': ['pytorch'],
+    'keras': ['keras'],
+    'machine learning': ['machine learning', 'ml models', 'ml'],
+    'deep learning': ['deep learning', 'neural networks', 'neural network'],
+    'nlp': ['nlp', 'natural language processing'],
+    'computer vision': ['computer vision', 'image recognition'],
+    'llms': ['llm', 'llms', 'large language models', 'large language model', 'generative ai', 'genai'],
+    'langchain': ['langchain'],
+    'mlops': ['mlops', 'mlflow', 'kubeflow', 'sagemaker'],
+    'statistics': ['statistics', 'statistical analysis', 'statistical modeling'],
+    'a/b testing': ['a/b testing', 'ab testing', 'a/b tests'],
+    'tableau': ['tableau'],
+    'power bi': ['power bi', 'powerbi'],
+    'looker': ['looker'],
+    'excel': ['microsoft excel', 'ms excel', 'advanced excel', 'excel spreadsheets'],
+    'data visualization': ['data visualization', 'dashboards', 'dashboarding'],
+    'agile': ['agile', 'scrum', 'kanban'],
+    'jira': ['jira'],
+    'system design': ['system design', 'distributed systems', 'scalable systems'],
+    'security': ['cybersecurity', 'information security', 'application security', 'network security', 'identity and access management'],
+    'communication': ['communication skills', 'written and verbal communication', 'verbal communication'],
+}
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over all skill aliases. One pass over a text finds
+    every alias occurrence, however many aliases the dictionary holds.
+    """
+
+    def __init__(self, dictionary):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for skill, aliases in dictionary.items():
+            for alias in aliases:
+                self._add(alias.lower(), skill)
+        self._build_failure_links()
+
+    def _add(self, alias, skill):
+        state = 0
+        for char in alias:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append((len(alias), skill))
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Return the set of canonical skills whose aliases occur in text as whole words"""
+        text = text.lower()
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, skill in self.output[state]:
+                start = end - length + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, end + 1):
+                    found.add(skill)
+        return found
+
+
+def _is_boundary(text, index):
+    """True when index is outside the text or not part of a word"""
+    return index < 0 or index >= len(text) or not (text[index].isalnum() or text[index] in '+#')
+
+
+skill_matcher = SkillMatcher(SKILL_DICTIONARY)
+
+
+def extract_skills(*texts):
+    """Normalized, sorted skill names found in any of the given texts"""
+    found = set()
+    for text in texts:
+        if text and text != 'N/A':
+            found |= skill_matcher.find(text)
+    return sorted(found)
+
+
+def skill_alias_rows():
+    """(skill, alias) pairs for the SKILL_ALIASES lookup table"""
+    return [(skill, alias) for skill, aliases in SKILL_DICTIONARY.items() for alias in aliases]
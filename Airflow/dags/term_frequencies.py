@@ -0,0 +1,39 @@
+import re
+from collections import Counter
+
+# Words too common in job highlights to say anything about a listing
+STOPWORDS = {
+    'a', 'about', 'above', 'across', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at',
+    'be', 'been', 'being', 'both', 'but', 'by', 'can', 'could', 'do', 'does', 'each', 'etc', 'for',
+    'from', 'has', 'have', 'how', 'if', 'in', 'including', 'into', 'is', 'it', 'its', 'may', 'more',
+    'most', 'must', 'new', 'not', 'of', 'on', 'one', 'or', 'other', 'our', 'out', 'over', 'per',
+    'such', 'than', 'that', 'the', 'their', 'them', 'these', 'they', 'this', 'through', 'to', 'up',
+    'us', 'using', 'we', 'well', 'what', 'when', 'where', 'which', 'while', 'who', 'will', 'with',
+    'within', 'work', 'would', 'you', 'your',
+    # Highlight section headings
+    'qualifications', 'responsibilities', 'benefits',
+}
+
+TERM_PATTERN = re.compile(r"[a-z][a-z0-9+#']*")
+
+# Terms kept per listing; the rest only add noise to a word cloud
+MAX_TERMS_PER_JOB = 100
+
+
+def highlight_terms(text):
+    """Term -> count for one listing's highlights, lowercased and without stopwords"""
+    if not text or text == 'N/A':
+        return {}
+    terms = Counter(
+        term.strip("'") for term in TERM_PATTERN.findall(text.lower())
+        if len(term) > 2 and term not in STOPWORDS
+    )
+    return dict(terms.most_common(MAX_TERMS_PER_JOB))
+
+
+def job_term_rows(df):
+    """(JOB_ID, TERM, FREQUENCY) rows for a listings DataFrame, one listing per JOB_ID"""
+    rows = []
+    for job_id, highlights in df.drop_duplicates('JOB_ID')[['JOB_ID', 'JOB_HIGHLIGHTS']].itertuples(index=False):
+        rows.extend((job_id, term, count) for term, count in highlight_terms(highlights).items())
+    return rows
@@ -3,12 +3,186 @@ import snowflake.connector
 from snowflake.connector.pandas_tools import write_pandas
 from dotenv import load_dotenv
 import os
+from skill_extraction import skill_alias_rows
+from term_frequencies import job_term_rows
+
+def update_job_skills(conn, df, snowflake_database, snowflake_schema):
+    """
+    Rebuild the skill index side tables from the uploaded listings:
+    - JOB_SKILLS holds one (JOB_ID, SKILL) row per skill, clustered by skill
+    - SKILL_ALIASES holds the dictionary used to match skills
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS JOB_SKILLS (JOB_ID STRING, SKILL STRING) CLUSTER BY (SKILL);"
+        )
+        cursor.execute("CREATE TABLE IF NOT EXISTS SKILL_ALIASES (SKILL STRING, ALIAS STRING);")
+        cursor.execute("DELETE FROM JOB_SKILLS;")
+        cursor.execute("DELETE FROM SKILL_ALIASES;")
+
+        skills_df = df[['JOB_ID', 'SKILLS']].copy()
+        skills_df['SKILL'] = skills_df['SKILLS'].fillna('').str.split(', ')
+        skills_df = skills_df.explode('SKILL')
+        # A listing found by several search queries shares one content-derived JOB_ID
+        skills_df = skills_df[skills_df['SKILL'] != ''][['JOB_ID', 'SKILL']].drop_duplicates()
+
+        if len(skills_df):
+            write_pandas(
+                conn=conn,
+                df=skills_df.reset_index(drop=True),
+                table_name='JOB_SKILLS',
+                database=snowflake_database,
+                schema=snowflake_schema,
+                quote_identifiers=False
+            )
+        write_pandas(
+            conn=conn,
+            df=pd.DataFrame(skill_alias_rows(), columns=['SKILL', 'ALIAS']),
+            table_name='SKILL_ALIASES',
+            database=snowflake_database,
+            schema=snowflake_schema,
+            quote_identifiers=False
+        )
+        print(f"Indexed {len(skills_df)} job skills")
+    finally:
+        cursor.close()
+
+def update_listing_archive(conn):
+    """
+    Append listings not seen before to JOBLISTINGS_ARCHIVE. JOB_ID is derived
+    from the listing content hash, so a posting is archived once however many
+    daily loads or search queries it appears in. Rows are never deleted and
+    only updated to backfill SALARY_* on rows archived before salaries were
+    parsed, while the listing is still loaded; saved jobs reference them
+    after they drop out of JOBLISTINGS.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS JOBLISTINGS_ARCHIVE (
+                JOB_ID STRING NOT NULL,
+                CONTENT_HASH STRING NOT NULL,
+                TITLE STRING,
+                COMPANY STRING,
+                LOCATION STRING,
+                DESCRIPTION STRING,
+                JOB_HIGHLIGHTS STRING,
+                APPLY_LINKS STRING,
+                POSTED_DATE STRING,
+                SKILLS STRING,
+                SALARY_MIN NUMBER,
+                SALARY_MAX NUMBER,
+                SALARY_CURRENCY STRING,
+                SALARY_PERIOD STRING,
+                ARCHIVED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (JOB_ID)
+            );
+        """)
+        for column, column_type in (
+            ('SALARY_MIN', 'NUMBER'), ('SALARY_MAX', 'NUMBER'),
+            ('SALARY_CURRENCY', 'STRING'), ('SALARY_PERIOD', 'STRING'),
+        ):
+            cursor.execute(f"ALTER TABLE JOBLISTINGS_ARCHIVE ADD COLUMN IF NOT EXISTS {column} {column_type};")
+        cursor.execute("""
+            MERGE INTO JOBLISTINGS_ARCHIVE AS archive
+            USING (
+                SELECT JOB_ID, CONTENT_HASH, TITLE, COMPANY, LOCATION, DESCRIPTION,
+                       JOB_HIGHLIGHTS, APPLY_LINKS, POSTED_DATE, SKILLS,
+                       SALARY_MIN, SALARY_MAX, SALARY_CURRENCY, SALARY_PERIOD
+                FROM JOBLISTINGS
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY JOB_ID ORDER BY SEARCH_QUERY) = 1
+            ) AS listing
+            ON archive.JOB_ID = listing.JOB_ID
+            WHEN MATCHED AND archive.SALARY_MIN IS NULL AND listing.SALARY_MIN IS NOT NULL THEN UPDATE SET
+                SALARY_MIN = listing.SALARY_MIN, SALARY_MAX = listing.SALARY_MAX,
+                SALARY_CURRENCY = listing.SALARY_CURRENCY, SALARY_PERIOD = listing.SALARY_PERIOD
+            WHEN NOT MATCHED THEN INSERT (
+                JOB_ID, CONTENT_HASH, TITLE, COMPANY, LOCATION, DESCRIPTION,
+                JOB_HIGHLIGHTS, APPLY_LINKS, POSTED_DATE, SKILLS,
+                SALARY_MIN, SALARY_MAX, SALARY_CURRENCY, SALARY_PERIOD
+            ) VALUES (
+                listing.JOB_ID, listing.CONTENT_HASH, listing.TITLE, listing.COMPANY, listing.LOCATION,
+                listing.DESCRIPTION, listing.JOB_HIGHLIGHTS, listing.APPLY_LINKS, listing.POSTED_DATE,
+                listing.SKILLS, listing.SALARY_MIN, listing.SALARY_MAX, listing.SALARY_CURRENCY,
+                listing.SALARY_PERIOD
+            );
+        """)
+        print(f"Archived or backfilled {cursor.rowcount} listings")
+    finally:
+        cursor.close()
+
+def update_job_terms(conn, df, snowflake_database, snowflake_schema):
+    """
+    Append highlight term frequencies for listings not indexed yet to
+    JOB_TERMS. JOB_ID is content-derived, so a listing's terms never change
+    and archived listings keep theirs after they leave JOBLISTINGS. Word
+    clouds are built by summing these instead of re-tokenizing the text.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS JOB_TERMS (JOB_ID STRING, TERM STRING, FREQUENCY NUMBER) CLUSTER BY (JOB_ID);"
+        )
+        cursor.execute(
+            "CREATE OR REPLACE TEMPORARY TABLE JOB_TERMS_STAGE (JOB_ID STRING, TERM STRING, FREQUENCY NUMBER);"
+        )
+        terms_df = pd.DataFrame(job_term_rows(df), columns=['JOB_ID', 'TERM', 'FREQUENCY'])
+        if len(terms_df):
+            write_pandas(
+                conn=conn,
+                df=terms_df,
+                table_name='JOB_TERMS_STAGE',
+                database=snowflake_database,
+                schema=snowflake_schema,
+                quote_identifiers=False
+            )
+        cursor.execute("""
+            INSERT INTO JOB_TERMS (JOB_ID, TERM, FREQUENCY)
+            SELECT JOB_ID, TERM, FREQUENCY FROM JOB_TERMS_STAGE
+            WHERE JOB_ID NOT IN (SELECT JOB_ID FROM JOB_TERMS);
+        """)
+        print(f"Indexed {cursor.rowcount} new highlight terms")
+    finally:
+        cursor.close()
+
+def update_listing_rollups(conn):
+    """
+    Rebuild JOBLISTINGS_ROLLUP: listing counts for every combination of
+    company, location, search query and posted date (GROUP BY CUBE). The API
+    keeps this table in memory to serve the listings dashboard. GROUPING_ID
+    tells which dimensions a row is grouped by (bit set = rolled up).
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE OR REPLACE TABLE JOBLISTINGS_ROLLUP AS
+            SELECT
+                GROUPING_ID(COMPANY, LOCATION, SEARCH_QUERY, POSTED_DATE) AS GROUPING_ID,
+                COMPANY,
+                LOCATION,
+                SEARCH_QUERY,
+                POSTED_DATE,
+                COUNT(*) AS JOB_COUNT,
+                CURRENT_TIMESTAMP() AS REFRESHED_AT
+            FROM (
+                SELECT COMPANY, LOCATION, SEARCH_QUERY, TRY_TO_DATE(POSTED_DATE) AS POSTED_DATE
+                FROM JOBLISTINGS
+            )
+            GROUP BY CUBE (COMPANY, LOCATION, SEARCH_QUERY, POSTED_DATE);
+        """)
+        cursor.execute("SELECT COUNT(*) FROM JOBLISTINGS_ROLLUP")
+        print(f"Built {cursor.fetchone()[0]} listing rollup rows")
+    finally:
+        cursor.close()
 
 def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
     """
     Update Snowflake table with data from CSV file.
     - First deletes all existing data
     - Then uploads new data with proper column mapping
+    - Finally appends new listings to the archive, rebuilds the rollups and
+      indexes highlight terms
     """
     try:
         # Load environment variables
@@ -44,6 +218,7 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
         # Define the expected Snowflake table columns
         snowflake_columns = [
             'JOB_ID',
+            'CONTENT_HASH',
             'SEARCH_QUERY',
             'TITLE',
             'COMPANY',
@@ -52,12 +227,18 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
             'POSTED_AT',
             'POSTED_DATE',
             'APPLY_LINKS',
-            'JOB_HIGHLIGHTS'
+            'JOB_HIGHLIGHTS',
+            'SKILLS',
+            'SALARY_MIN',
+            'SALARY_MAX',
+            'SALARY_CURRENCY',
+            'SALARY_PERIOD'
         ]
         
         # Create mapping from CSV columns to Snowflake columns
         csv_to_snowflake_mapping = {
             'job_id': 'JOB_ID',
+            'content_hash': 'CONTENT_HASH',
             'search_query': 'SEARCH_QUERY',
             'title': 'TITLE',
             'company': 'COMPANY',
@@ -66,7 +247,12 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
             'posted_at': 'POSTED_AT',
             'posted_date': 'POSTED_DATE',
             'apply_links': 'APPLY_LINKS',
-            'job_highlights': 'JOB_HIGHLIGHTS'
+            'job_highlights': 'JOB_HIGHLIGHTS',
+            'skills': 'SKILLS',
+            'salary_min': 'SALARY_MIN',
+            'salary_max': 'SALARY_MAX',
+            'salary_currency': 'SALARY_CURRENCY',
+            'salary_period': 'SALARY_PERIOD'
         }
         
         # Rename columns to match Snowflake
@@ -83,6 +269,11 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
         
         print(f"Found {len(df)} rows in CSV file")
         
+        # A listing returned on two result pages of the same search comes back
+        # twice; (JOB_ID, SEARCH_QUERY) is the key /jobs/listings pages on
+        df = df.drop_duplicates(subset=['JOB_ID', 'SEARCH_QUERY'])
+        print(f"Loading {len(df)} unique listings per search query")
+        
         # Create Snowflake connection
         print("Connecting to Snowflake...")
         conn = snowflake.connector.connect(
@@ -97,6 +288,13 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
         
         try:
             cursor = conn.cursor()
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS SKILLS STRING;")
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS CONTENT_HASH STRING;")
+            # Annual salary range parsed at ingest (salary_extraction.parse_salary)
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS SALARY_MIN NUMBER;")
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS SALARY_MAX NUMBER;")
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS SALARY_CURRENCY STRING;")
+            cursor.execute("ALTER TABLE JOBLISTINGS ADD COLUMN IF NOT EXISTS SALARY_PERIOD STRING;")
             
             # First, delete all existing data
             print("Deleting existing data from Snowflake table...")
@@ -131,6 +329,11 @@ def update_snowflake_from_csv(csv_file='tech_jobs.csv'):
                 
                 if final_count != len(df):
                     print("WARNING: Row count mismatch between CSV and Snowflake table!")
+                
+                update_job_skills(conn, df, snowflake_database, snowflake_schema)
+                update_listing_archive(conn)
+                update_listing_rollups(conn)
+                update_job_terms(conn, df, snowflake_database, snowflake_schema)
             else:
                 print("Upload to Snowflake failed")
                 print("Output:", output)
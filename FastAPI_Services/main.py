@@ -1,20 +1,64 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel, EmailStr, field_validator, ValidationError
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from jose import jwt, JWTError, ExpiredSignatureError
 from passlib.context import CryptContext
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import asyncio
+import base64
+import gzip
+import hashlib
+import math
 import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from decimal import Decimal
 from uuid import uuid4, UUID
 from typing import Optional
 from snowflake.connector import connect, ProgrammingError
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 import json
-from io import BytesIO
-
-from typing import TypedDict, List, Dict, Any
+import httpx
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to a character estimate
+    tiktoken = None
+
+try:
+    from wordcloud import WordCloud
+except ImportError:  # Word cloud images are not rendered; term frequencies still are
+    WordCloud = None
+
+try:
+    import orjson
+except ImportError:  # Responses are serialized with the standard library
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Responses are not zstd-compressed
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # Responses are not brotli-compressed
+    brotli = None
+
+from typing import TypedDict, List, Dict, Any, AsyncIterator
 from langgraph.graph import StateGraph
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
@@ -43,18 +87,112 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# Upload limits for resumes and cover letters
+MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10"))
+MAX_UPLOAD_SIZE = MAX_UPLOAD_SIZE_MB * 1024 * 1024
+PRESIGNED_URL_EXPIRATION = int(os.getenv("PRESIGNED_URL_EXPIRATION", "900"))
+
+# Supported application documents and the user_profiles column holding their link
+DOCUMENT_LINK_COLUMNS = {
+    "resume": "resume_link",
+    "cover_letter": "cover_letter_link",
+}
+# ...and the column holding the SHA-256 of their current content
+DOCUMENT_HASH_COLUMNS = {
+    "resume": "resume_hash",
+    "cover_letter": "cover_letter_hash",
+}
+
 import os
 
 if "OPENAI_API_KEY" not in os.environ:
     raise ValueError("The OPENAI_API_KEY environment variable must be set.")
 
-# Initialize AWS S3 client
+# Initialize AWS S3 client (pool sized so concurrent uploads don't queue on connections)
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=AWS_ACCESS_KEY_ID,
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    region_name=AWS_REGION,
+    config=Config(
+        max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20")),
+        retries={"max_attempts": 3, "mode": "standard"},
+    ),
 )
 
+# Documents below the threshold go up in a single PUT; anything larger is sent
+# in 8 MB parts so at most a few chunks per upload are held in memory.
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+
+class LRUCache:
+    """
+    Small thread-safe least-recently-used cache for per-process state.
+    Entries optionally expire `ttl` seconds after they were set. With
+    `max_weight`, entries are also evicted while the summed `weigh(value)`
+    of all entries exceeds it.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, max_weight: Optional[int] = None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        _, _, weight = self._data.pop(key)
+        self.weight -= weight
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            expires_at, value, _ = self._data[key]
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        weight = self.weigh(value) if self.max_weight else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, value, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (self.max_weight and self.weight > self.max_weight):
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][1]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Extracted document text and structure keyed by (user id, document type, content hash)
+document_extraction_cache = LRUCache(maxsize=int(os.getenv("DOCUMENT_TEXT_CACHE_SIZE", "256")))
+
 # Security and hashing utilities
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -68,11 +206,21 @@ CREATE TABLE IF NOT EXISTS user_profiles (
     hashed_password STRING NOT NULL,             -- Hashed password
     resume_link STRING,                          -- Resume link (S3 URL)
     cover_letter_link STRING,                    -- Cover letter link (S3 URL)
+    resume_hash STRING,                          -- SHA-256 of the current resume
+    cover_letter_hash STRING,                    -- SHA-256 of the current cover letter
+    pending_until TIMESTAMP,                     -- Presigned signup not finalized; reclaimable after this
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Timestamp when record was created
     updated_at TIMESTAMP                          -- Timestamp when record was last updated
 );
 """
 
+# Tables created before content-addressed documents need the hash columns added
+ALTER_USER_PROFILES_QUERIES = [
+    "ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS resume_hash STRING",
+    "ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS cover_letter_hash STRING",
+    "ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS pending_until TIMESTAMP",
+]
+
 
 # Snowflake connection function
 def get_snowflake_connection():
@@ -94,6 +242,8 @@ def initialize_user_profiles_table():
         conn = get_snowflake_connection()
         cur = conn.cursor()
         cur.execute(CREATE_USER_PROFILES_TABLE_QUERY)
+        for query in ALTER_USER_PROFILES_QUERIES:
+            cur.execute(query)
         conn.commit()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating user_profiles table: {e}")
@@ -111,9 +261,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        # Usernames can be reclaimed (abandoned presigned signups), so the
+        # token is only valid for the account it was issued to
+        user_id: str = payload.get("uid")
+        if username is None or user_id is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=user_id)
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=401,
@@ -127,8 +280,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         conn = get_snowflake_connection()
         cur = conn.cursor()
-        query = f"SELECT id, email, resume_link, cover_letter_link, created_at, updated_at FROM {SNOWFLAKE_SCHEMA}.user_profiles WHERE username = %(username)s"
-        cur.execute(query, {'username': token_data.username})
+        query = f"SELECT id, email, resume_link, cover_letter_link, created_at, updated_at, resume_hash, cover_letter_hash FROM {SNOWFLAKE_SCHEMA}.user_profiles WHERE username = %(username)s AND id = %(id)s"
+        cur.execute(query, {'username': token_data.username, 'id': token_data.user_id})
         user = cur.fetchone()
         if user is None:
             raise credentials_exception
@@ -140,8 +293,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             cover_letter_link=user[3],
             created_at=user[4],
             updated_at=user[5],
+            resume_hash=user[6],
+            cover_letter_hash=user[7],
         )
         return user_out
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"Error retrieving user: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error.")
@@ -214,6 +371,8 @@ class UserOut(BaseModel):
     cover_letter_link: Optional[str]
     created_at: datetime
     updated_at: Optional[datetime]
+    resume_hash: Optional[str] = None
+    cover_letter_hash: Optional[str] = None
 
 class Token(BaseModel):
     access_token: str
@@ -221,14 +380,362 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[str] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    initialize_user_profiles_table()  # Ensure the table is created on startup
+    initialize_user_profiles_table()  # Ensure the tables are created on startup
+    initialize_saved_jobs_table()
+    initialize_job_archive_table()
+    # tiktoken downloads its BPE file on first use; do it now, off the event loop
+    await run_in_threadpool(get_token_encoder)
     yield
+    await close_http_client()
+    await task_queue.stop()
+    await close_llm_clients()
+    shutdown_pdf_executor()
 
 app = FastAPI(lifespan=lifespan)
 
+
+def json_default(value):
+    """Types that Snowflake rows and DataFrames contain but JSON encoders don't know"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    if isinstance(value, (UUID, bytes)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON rendered with orjson (stdlib json when it is not installed). Large
+    row lists are returned in one of these directly, which also skips
+    FastAPI's response_model validation and jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "1"))
+
+# Content encodings the server can produce, most preferred first
+RESPONSE_ENCODERS = {
+    **({"zstd": lambda body: zstandard.ZstdCompressor(level=3).compress(body)} if zstandard else {}),
+    **({"br": lambda body: brotli.compress(body, quality=4)} if brotli else {}),
+    "gzip": lambda body: gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL),
+}
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding in RESPONSE_ENCODERS the client accepts, if any"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name.strip())
+    return next((encoding for encoding in RESPONSE_ENCODERS if encoding in accepted), None)
+
+
+class CompressionMiddleware:
+    """
+    Compress complete, non-image response bodies of at least
+    COMPRESSION_MINIMUM_SIZE bytes with the best encoding the client
+    accepts. Streamed bodies
+    (server-sent events) pass through untouched so chunks are not held
+    back by the compressor.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http":
+            headers = dict(scope["headers"])
+            encoding = accepted_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is not None and message["type"] == "http.response.body":
+                initial, start = start, None
+                response_headers = MutableHeaders(raw=initial["headers"])
+                body = message.get("body", b"")
+                if (
+                    not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                    and "content-encoding" not in response_headers
+                    and not response_headers.get("content-type", "").startswith("image/")
+                ):
+                    body = await run_in_threadpool(RESPONSE_ENCODERS[encoding], body)
+                    response_headers["Content-Encoding"] = encoding
+                    response_headers["Content-Length"] = str(len(body))
+                    response_headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+app.add_middleware(CompressionMiddleware)
+
+class UploadTooLargeError(Exception):
+    """Raised when an uploaded document exceeds MAX_UPLOAD_SIZE."""
+
+
+class SizeLimitedReader:
+    """
+    Read-only wrapper around an upload's spooled file that counts bytes as
+    they are streamed to S3 and aborts once the size limit is exceeded.
+    """
+
+    def __init__(self, fileobj, limit: int):
+        self._fileobj = fileobj
+        self._limit = limit
+        self._bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        self._bytes_read += len(chunk)
+        if self._bytes_read > self._limit:
+            raise UploadTooLargeError(f"File exceeds the {MAX_UPLOAD_SIZE_MB} MB limit.")
+        return chunk
+
+
+def s3_object_url(key: str) -> str:
+    return f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+
+def document_key(user_id, document_type: str, content_hash: str) -> str:
+    """
+    Documents are content-addressed: the key changes only when the bytes do.
+    """
+    return f"user-profiles/{user_id}/{document_type}/{content_hash}.pdf"
+
+
+def s3_object_exists(key: str) -> bool:
+    try:
+        s3_client.head_object(Bucket=AWS_S3_BUCKET_NAME, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def hash_fileobj(fileobj) -> str:
+    """
+    SHA-256 of a file-like object, read in 1 MB chunks.
+    """
+    digest = hashlib.sha256()
+    reader = SizeLimitedReader(fileobj, MAX_UPLOAD_SIZE)
+    for chunk in iter(lambda: reader.read(1024 * 1024), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_upload(upload: UploadFile) -> str:
+    if upload.size is not None and upload.size > MAX_UPLOAD_SIZE:
+        raise UploadTooLargeError(f"File exceeds the {MAX_UPLOAD_SIZE_MB} MB limit.")
+    upload.file.seek(0)
+    content_hash = hash_fileobj(upload.file)
+    upload.file.seek(0)
+    return content_hash
+
+
+def upload_document_to_s3(upload: UploadFile, key: str):
+    """
+    Stream an UploadFile to S3 straight from its spooled temporary file.
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_SIZE:
+        raise UploadTooLargeError(f"File exceeds the {MAX_UPLOAD_SIZE_MB} MB limit.")
+    upload.file.seek(0)
+    s3_client.upload_fileobj(
+        SizeLimitedReader(upload.file, MAX_UPLOAD_SIZE),
+        AWS_S3_BUCKET_NAME,
+        key,
+        ExtraArgs={"ContentType": "application/pdf"},
+        Config=S3_TRANSFER_CONFIG,
+    )
+
+
+async def upload_documents_to_s3(uploads: Dict[str, UploadFile]):
+    """
+    Upload several documents concurrently. `uploads` maps S3 keys to files.
+    Blocking boto3 transfers run in the threadpool so the event loop stays free.
+    """
+    try:
+        await asyncio.gather(*(
+            run_in_threadpool(upload_document_to_s3, upload, key)
+            for key, upload in uploads.items()
+        ))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def store_documents(user_id, uploads: Dict[str, UploadFile],
+                          current_hashes: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """
+    Store documents under content-hash keys. `uploads` maps document type to file.
+    Returns {document_type: hash} for the documents whose content changed;
+    identical re-uploads and objects already in the bucket skip the S3 write.
+    """
+    try:
+        hashes = await asyncio.gather(*(run_in_threadpool(hash_upload, upload) for upload in uploads.values()))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    changed = {
+        document_type: content_hash
+        for document_type, content_hash in zip(uploads, hashes)
+        if content_hash != current_hashes.get(document_type)
+    }
+    keys = {document_type: document_key(user_id, document_type, content_hash)
+            for document_type, content_hash in changed.items()}
+    exists = await asyncio.gather(*(run_in_threadpool(s3_object_exists, key) for key in keys.values()))
+
+    async def store(document_type: str, key: str, present: bool):
+        # Each file is read by one step at a time: upload first, then extract its text
+        if not present:
+            await upload_documents_to_s3({key: uploads[document_type]})
+        await store_upload_text(user_id, document_type, changed[document_type], uploads[document_type])
+
+    # Documents are processed concurrently
+    await asyncio.gather(*(
+        store(document_type, key, present)
+        for (document_type, key), present in zip(keys.items(), exists)
+    ))
+    return changed
+
+
+def document_updates(user_id, changed: Dict[str, str]) -> Dict[str, str]:
+    """
+    Map changed document hashes to the user_profiles columns to update.
+    """
+    updates = {}
+    for document_type, content_hash in changed.items():
+        updates[DOCUMENT_LINK_COLUMNS[document_type]] = s3_object_url(document_key(user_id, document_type, content_hash))
+        updates[DOCUMENT_HASH_COLUMNS[document_type]] = content_hash
+    return updates
+
+
+def validate_new_user(email: str, username: str, password: str) -> UserCreate:
+    # Validate `user` fields using Pydantic model
+    try:
+        return UserCreate(email=email, username=username, password=password)
+    except ValidationError as ve:
+        error_details = [{"loc": err["loc"], "msg": err["msg"]} for err in ve.errors()]
+        raise HTTPException(status_code=400, detail={"validation_errors": error_details})
+
+
+def ensure_user_available(cur, user_model: UserCreate):
+    # Presigned signups whose uploads were never finalized release their email/username
+    cur.execute(
+        """
+        DELETE FROM user_profiles
+        WHERE (email = %(email)s OR username = %(username)s)
+          AND pending_until < current_timestamp()
+        """,
+        {'email': user_model.email, 'username': user_model.username},
+    )
+
+    # **Check if the email already exists**
+    check_user_query = """
+    SELECT email, username FROM user_profiles WHERE email = %(email)s OR username = %(username)s
+    """
+    cur.execute(check_user_query, {'email': user_model.email, 'username': user_model.username})
+    existing_user = cur.fetchone()
+
+    if existing_user:
+        existing_email, existing_username = existing_user
+
+        if existing_email.lower() == user_model.email.lower():
+            raise HTTPException(status_code=400, detail="A user with this email already exists.")
+        elif existing_username.lower() == user_model.username.lower():
+            raise HTTPException(status_code=400, detail="A user with this username already exists.")
+        else:
+            # This case should not occur but added for completeness
+            raise HTTPException(status_code=400, detail="A user with this email or username already exists.")
+
+
+def insert_user_profile(conn, cur, user_id: str, user_model: UserCreate,
+                        documents: Optional[Dict[str, str]] = None,
+                        pending_seconds: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Insert a new user. `documents` maps document type to content hash.
+    With `pending_seconds` the account stays pending until its documents are
+    finalized, and another signup may reclaim it once that window has passed.
+    """
+    hashed_password = hash_password(user_model.password)
+    updates = document_updates(user_id, documents or {})
+
+    # **Insert user data into Snowflake with updated_at set to NULL**
+    insert_query = """
+    INSERT INTO user_profiles 
+        (id, username, email, hashed_password, resume_link, cover_letter_link,
+         resume_hash, cover_letter_hash, pending_until, created_at, updated_at)
+    VALUES
+        (%(id)s, %(username)s, %(email)s, %(hashed_password)s, %(resume_link)s, %(cover_letter_link)s,
+         %(resume_hash)s, %(cover_letter_hash)s,
+         DATEADD(second, %(pending_seconds)s, current_timestamp()), current_timestamp(), NULL)
+    """
+    
+    params = {
+        'id': user_id,
+        'username': user_model.username,
+        'email': user_model.email,
+        'hashed_password': hashed_password,
+        'resume_link': updates.get('resume_link'),
+        'cover_letter_link': updates.get('cover_letter_link'),
+        'resume_hash': updates.get('resume_hash'),
+        'cover_letter_hash': updates.get('cover_letter_hash'),
+        'pending_seconds': pending_seconds,
+    }
+
+    cur.execute(insert_query, params)
+    conn.commit()
+
+    # Retrieve created_at timestamp; updated_at will be None
+    cur.execute(
+        "SELECT created_at FROM user_profiles WHERE id = %(id)s",
+        {'id': user_id}
+    )        
+    
+    result = cur.fetchone()
+    if not result:
+        raise HTTPException(status_code=500, detail="User creation failed.")
+
+    return {
+        "id": user_id,
+        "username": user_model.username,
+        "email": user_model.email,
+        "resume_link": params['resume_link'],
+        "cover_letter_link": params['cover_letter_link'],
+        "created_at": result[0],
+        "updated_at": None,  # Since updated_at is NULL during registration
+        "resume_hash": params['resume_hash'],
+        "cover_letter_hash": params['cover_letter_hash'],
+    }
+
+
 @app.post("/register", response_model=UserOut)
 async def register_user(
     email: EmailStr = Form(..., description="User's email address"),
@@ -238,118 +745,77 @@ async def register_user(
     cover_letter: UploadFile = File(...)
 ):
     try:
-        resume_content = await resume.read()
-        cover_letter_content = await cover_letter.read()
-
-        # Validate `user` fields using Pydantic model
-        try:
-            user_model = UserCreate(email=email, username=username, password=password)
-        except ValidationError as ve:
-            error_details = [{"loc": err["loc"], "msg": err["msg"]} for err in ve.errors()]
-            raise HTTPException(status_code=400, detail={"validation_errors": error_details})
-        # Validate `user` fields using Pydantic model
-
-        user_model = UserCreate(email=email, username=username, password=password)
+        user_model = validate_new_user(email, username, password)
 
         # Validate file uploads
         if not resume or not cover_letter:
             raise HTTPException(status_code=400, detail="Both 'resume' and 'cover_letter' files are required.")
 
-        # **Check if the email already exists**
         conn = get_snowflake_connection()
         cur = conn.cursor()
-        
-        check_user_query = """
-        SELECT email, username FROM user_profiles WHERE email = %(email)s OR username = %(username)s
-        """
-        cur.execute(check_user_query, {'email': user_model.email, 'username': user_model.username})
-        existing_user = cur.fetchone()
-
-        if existing_user:
-            existing_email, existing_username = existing_user
+        ensure_user_available(cur, user_model)
 
-            if existing_email.lower() == user_model.email.lower():
-                raise HTTPException(status_code=400, detail="A user with this email already exists.")
-            elif existing_username.lower() == user_model.username.lower():
-                raise HTTPException(status_code=400, detail="A user with this username already exists.")
-            else:
-                # This case should not occur but added for completeness
-                raise HTTPException(status_code=400, detail="A user with this email or username already exists.")
-        
         # Proceed with file uploads and user creation
-        hashed_password = hash_password(user_model.password)
         user_id = str(uuid4())
-        folder_name = f"user-profiles/{user_id}/"
+        documents = await store_documents(user_id, {"resume": resume, "cover_letter": cover_letter}, {})
 
-        resume_key = f"{folder_name}resume.pdf"
-        cover_letter_key = f"{folder_name}cover_letter.pdf"
+        return insert_user_profile(conn, cur, user_id, user_model, documents)
 
-        resume_stream = BytesIO(resume_content)
-        cover_letter_stream = BytesIO(cover_letter_content)
-        
-        # Upload files to S3 (ensure s3_client is properly initialized)
-        s3_client.upload_fileobj(
-            resume_stream,
-            AWS_S3_BUCKET_NAME,
-            resume_key,
-            ExtraArgs={'ContentType': 'application/pdf'}
-        )
-        
-        s3_client.upload_fileobj(
-            cover_letter_stream,
-            AWS_S3_BUCKET_NAME,
-            cover_letter_key,
-            ExtraArgs={'ContentType': 'application/pdf'}
-        )
+    except HTTPException as e:
+        # Re-raise HTTPExceptions to be handled by FastAPI
+        raise e
 
-        resume_url = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{resume_key}"
-        cover_letter_url = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{cover_letter_key}"
+    except Exception as e:
+        print(f"Error details: {str(e)}")  # Detailed error logging
+        raise HTTPException(status_code=500, detail="An error occurred while registering the user.")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
 
-        # **Insert user data into Snowflake with updated_at set to NULL**
-        insert_query = """
-        INSERT INTO user_profiles 
-            (id, username, email, hashed_password, resume_link, cover_letter_link, created_at, updated_at)
-        VALUES
-            (%(id)s, %(username)s, %(email)s, %(hashed_password)s, %(resume_link)s, %(cover_letter_link)s, current_timestamp(), NULL)
-        """
-        
-        params = {
-            'id': user_id,
-            'username': user_model.username,
-            'email': user_model.email,
-            'hashed_password': hashed_password,
-            'resume_link': resume_url,
-            'cover_letter_link': cover_letter_url
-        }
 
-        cur.execute(insert_query, params)
-        conn.commit()
+@app.post("/register/presigned")
+async def register_user_presigned(
+    email: EmailStr = Form(..., description="User's email address"),
+    username: str = Form(..., description="Desired username"),
+    password: str = Form(..., description="User's password"),
+    resume_sha256: str = Form(..., description="SHA-256 of the resume"),
+    cover_letter_sha256: str = Form(..., description="SHA-256 of the cover letter"),
+):
+    """
+    Create a pending account without documents and return presigned POSTs for
+    the resume and cover letter, plus an access token for /users/me/files/finalize.
+    If finalize never happens, the email and username can be registered again
+    once the presigned POSTs have expired.
+    """
+    try:
+        user_model = validate_new_user(email, username, password)
+        hashes = validate_document_hashes({"resume": resume_sha256, "cover_letter": cover_letter_sha256})
 
-        # Retrieve created_at timestamp; updated_at will be None
-        cur.execute(
-            "SELECT created_at FROM user_profiles WHERE id = %(id)s",
-            {'id': user_id}
-        )        
-        
-        result = cur.fetchone()
-        if result:
-            created_at = result[0]
-            updated_at = None  # Since updated_at is NULL during registration
-        else:
-            raise HTTPException(status_code=500, detail="User creation failed.")
+        conn = get_snowflake_connection()
+        cur = conn.cursor()
+        ensure_user_available(cur, user_model)
+
+        user_id = str(uuid4())
+        user_out = insert_user_profile(conn, cur, user_id, user_model,
+                                       pending_seconds=PRESIGNED_URL_EXPIRATION)
+
+        uploads = {
+            document_type: await run_in_threadpool(create_presigned_upload, user_id, document_type, content_hash, None)
+            for document_type, content_hash in hashes.items()
+        }
+        access_token = create_access_token(data={"sub": user_model.username, "uid": user_id})
 
         return {
-            "id": user_id,
-            "username": user_model.username,
-            "email": user_model.email,
-            "resume_link": resume_url,
-            "cover_letter_link": cover_letter_url,
-            "created_at": created_at,
-            "updated_at": updated_at
+            "user": user_out,
+            "access_token": access_token,
+            "token_type": "bearer",
+            "uploads": uploads,
+            "expires_in": PRESIGNED_URL_EXPIRATION,
         }
 
     except HTTPException as e:
-        # Re-raise HTTPExceptions to be handled by FastAPI
         raise e
 
     except Exception as e:
@@ -372,7 +838,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Incorrect username or password.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user["username"]})
+    access_token = create_access_token(data={"sub": user["username"], "uid": str(user["id"])})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Get current user endpoint
@@ -391,86 +857,245 @@ async def update_user_files(
     Updates the logged-in user's resume and/or cover letter.
     """
     try:
+        uploads = {}
+        if resume:
+            uploads["resume"] = resume
+        if cover_letter:
+            uploads["cover_letter"] = cover_letter
+
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No files provided for update.")
+
+        changed = await store_documents(current_user.id, uploads, current_document_hashes(current_user))
+        if not changed:
+            # Identical re-upload: nothing to write
+            return current_user
+
         conn = get_snowflake_connection()
         cur = conn.cursor()
+        return update_user_document_links(conn, cur, current_user.id, document_updates(current_user.id, changed))
 
-        folder_name = f"user-profiles/{current_user.id}/"
-        updates = {}
-        if resume:
-            # Read resume content and upload to S3
-            resume_content = await resume.read()
-            resume_key = f"{folder_name}resume.pdf"
-            resume_stream = BytesIO(resume_content)
-            s3_client.upload_fileobj(
-                resume_stream,
-                AWS_S3_BUCKET_NAME,
-                resume_key,
-                ExtraArgs={"ContentType": "application/pdf"}
-            )
-            updates["resume_link"] = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{resume_key}"
+    except HTTPException as e:
+        raise e
 
-        if cover_letter:
-            # Read cover letter content and upload to S3
-            cover_letter_content = await cover_letter.read()
-            cover_letter_key = f"{folder_name}cover_letter.pdf"
-            cover_letter_stream = BytesIO(cover_letter_content)
-            s3_client.upload_fileobj(
-                cover_letter_stream,
-                AWS_S3_BUCKET_NAME,
-                cover_letter_key,
-                ExtraArgs={"ContentType": "application/pdf"}
+    except Exception as e:
+        print(f"Error details: {str(e)}")  # Log error details
+        raise HTTPException(status_code=500, detail="An error occurred while updating files.")
+
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+def update_user_document_links(conn, cur, user_id, updates: Dict[str, str]) -> UserOut:
+    """
+    Write new document links to user_profiles and return the refreshed user.
+    """
+    # Construct the SQL update query dynamically
+    update_query = f"""
+    UPDATE {SNOWFLAKE_SCHEMA}.user_profiles
+    SET updated_at = current_timestamp(), pending_until = NULL
+    """
+    update_params = {}
+    for key, value in updates.items():
+        update_query += f", {key} = %({key})s"
+        update_params[key] = value
+    update_query += " WHERE id = %(id)s"
+    update_params["id"] = str(user_id)
+
+    # Execute the update query
+    cur.execute(update_query, update_params)
+    conn.commit()
+
+    # Retrieve updated user data
+    cur.execute(
+        f"""
+        SELECT id, username, email, resume_link, cover_letter_link, created_at, updated_at,
+               resume_hash, cover_letter_hash
+        FROM {SNOWFLAKE_SCHEMA}.user_profiles
+        WHERE id = %(id)s
+        """,
+        {"id": str(user_id)}
+    )
+    user = cur.fetchone()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found after update.")
+
+    # Return updated user details
+    return UserOut(
+        id=user[0],
+        username=user[1],
+        email=user[2],
+        resume_link=user[3],
+        cover_letter_link=user[4],
+        created_at=user[5],
+        updated_at=user[6],
+        resume_hash=user[7],
+        cover_letter_hash=user[8],
+    )
+
+
+def current_document_hashes(user: UserOut) -> Dict[str, Optional[str]]:
+    return {"resume": user.resume_hash, "cover_letter": user.cover_letter_hash}
+
+
+SHA256_HEX_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def validate_document_hashes(hashes: Dict[str, str]) -> Dict[str, str]:
+    unknown = [doc for doc in hashes if doc not in DOCUMENT_LINK_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown document types: {unknown}")
+    normalized = {doc: value.lower() for doc, value in hashes.items()}
+    invalid = [doc for doc, value in normalized.items() if not SHA256_HEX_PATTERN.match(value)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid SHA-256 for: {invalid}")
+    return normalized
+
+
+def create_presigned_upload(user_id, document_type: str, content_hash: str,
+                            current_hash: Optional[str]) -> Dict[str, Any]:
+    """
+    Build a presigned POST that lets the client upload a PDF directly to S3.
+    The policy pins the content-hash key, the content type, the SHA-256
+    checksum and the maximum size. Content that is already stored is reported
+    with `exists` and no upload policy.
+    """
+    key = document_key(user_id, document_type, content_hash)
+    if content_hash == current_hash or s3_object_exists(key):
+        return {"key": key, "exists": True}
+
+    checksum = base64.b64encode(bytes.fromhex(content_hash)).decode()
+    presigned_post = s3_client.generate_presigned_post(
+        Bucket=AWS_S3_BUCKET_NAME,
+        Key=key,
+        Fields={"Content-Type": "application/pdf", "x-amz-checksum-sha256": checksum},
+        Conditions=[
+            {"Content-Type": "application/pdf"},
+            {"x-amz-checksum-sha256": checksum},
+            ["content-length-range", 1, MAX_UPLOAD_SIZE],
+        ],
+        ExpiresIn=PRESIGNED_URL_EXPIRATION,
+    )
+    return {"key": key, "exists": False, "url": presigned_post["url"], "fields": presigned_post["fields"]}
+
+
+def verify_uploaded_document(user_id, document_type: str, key: str) -> str:
+    """
+    Confirm that a client-side upload landed where the presigned POST allowed
+    and that its content matches the hash in the key. Returns the hash.
+    """
+    match = re.fullmatch(rf"user-profiles/{user_id}/{document_type}/([0-9a-f]{{64}})\.pdf", key)
+    if not match:
+        raise HTTPException(status_code=400, detail=f"Invalid key for {document_type}.")
+    content_hash = match.group(1)
+
+    try:
+        head = s3_client.head_object(Bucket=AWS_S3_BUCKET_NAME, Key=key, ChecksumMode="ENABLED")
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            raise HTTPException(status_code=400, detail=f"No uploaded {document_type} found.")
+        raise
+    if head.get("ContentLength", 0) > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_SIZE_MB} MB limit.")
+    if head.get("ContentType") != "application/pdf":
+        raise HTTPException(status_code=400, detail=f"Uploaded {document_type} must be a PDF.")
+
+    # S3 validated the checksum on upload; only rehash when it wasn't recorded
+    checksum = head.get("ChecksumSHA256")
+    if checksum and "-" not in checksum:
+        stored_hash = base64.b64decode(checksum).hex()
+    else:
+        body = s3_client.get_object(Bucket=AWS_S3_BUCKET_NAME, Key=key)["Body"]
+        stored_hash = hash_fileobj(body)
+    if stored_hash != content_hash:
+        raise HTTPException(status_code=400, detail=f"Uploaded {document_type} does not match its hash.")
+    return content_hash
+
+
+class PresignRequest(BaseModel):
+    documents: Dict[str, str]  # document type -> SHA-256 of the file
+
+class FinalizeUploadRequest(BaseModel):
+    resume_key: Optional[str] = None
+    cover_letter_key: Optional[str] = None
+
+
+@app.post("/users/me/files/presign")
+async def presign_user_files(
+    presign_request: PresignRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Issue presigned POST URLs so the client can upload documents straight to S3.
+    Call /users/me/files/finalize once the uploads have completed.
+    """
+    hashes = validate_document_hashes(presign_request.documents)
+    if not hashes:
+        raise HTTPException(status_code=400, detail="At least one document is required.")
+    current_hashes = current_document_hashes(current_user)
+    try:
+        uploads = {
+            document_type: await run_in_threadpool(
+                create_presigned_upload, current_user.id, document_type, content_hash, current_hashes[document_type]
             )
-            updates["cover_letter_link"] = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com/{cover_letter_key}"
+            for document_type, content_hash in hashes.items()
+        }
+        return {"uploads": uploads, "expires_in": PRESIGNED_URL_EXPIRATION}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating upload URLs: {str(e)}")
 
-        if not updates:
+
+@app.post("/users/me/files/finalize", response_model=UserOut)
+async def finalize_user_files(
+    finalize_request: FinalizeUploadRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Verify documents uploaded through presigned POSTs and record their links.
+    """
+    try:
+        keys = {
+            "resume": finalize_request.resume_key,
+            "cover_letter": finalize_request.cover_letter_key,
+        }
+        keys = {document_type: key for document_type, key in keys.items() if key}
+        if not keys:
             raise HTTPException(status_code=400, detail="No files provided for update.")
 
-        # Construct the SQL update query dynamically
-        update_query = f"""
-        UPDATE {SNOWFLAKE_SCHEMA}.user_profiles
-        SET updated_at = current_timestamp()
-        """
-        update_params = {}
-        for key, value in updates.items():
-            update_query += f", {key} = %({key})s"
-            update_params[key] = value
-        update_query += " WHERE id = %(id)s"
-        update_params["id"] = str(current_user.id)
-
-        # Execute the update query
-        cur.execute(update_query, update_params)
-        conn.commit()
+        hashes = await asyncio.gather(*(
+            run_in_threadpool(verify_uploaded_document, current_user.id, document_type, key)
+            for document_type, key in keys.items()
+        ))
 
-        # Retrieve updated user data
-        cur.execute(
-            f"""
-            SELECT id, username, email, resume_link, cover_letter_link, created_at, updated_at 
-            FROM {SNOWFLAKE_SCHEMA}.user_profiles
-            WHERE id = %(id)s
-            """,
-            {"id": str(current_user.id)}
-        )
-        user = cur.fetchone()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found after update.")
+        current_hashes = current_document_hashes(current_user)
+        changed = {
+            document_type: content_hash
+            for document_type, content_hash in zip(keys, hashes)
+            if content_hash != current_hashes[document_type]
+        }
+        if not changed:
+            return current_user
+
+        # Extract text once now so feedback requests never have to parse the PDF
+        for document_type, content_hash in changed.items():
+            task_queue.submit(
+                "extract_document", current_user.id,
+                store_s3_document_text, current_user.id, document_type, content_hash,
+                dedup_key=task_input_hash("extract_document", document_key(current_user.id, document_type, content_hash)),
+            )
 
-        # Return updated user details
-        return UserOut(
-            id=user[0],
-            username=user[1],
-            email=user[2],
-            resume_link=user[3],
-            cover_letter_link=user[4],
-            created_at=user[5],
-            updated_at=user[6],
-        )
+        conn = get_snowflake_connection()
+        cur = conn.cursor()
+        return update_user_document_links(conn, cur, current_user.id, document_updates(current_user.id, changed))
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
         print(f"Error details: {str(e)}")  # Log error details
-        raise HTTPException(status_code=500, detail="An error occurred while updating files.")
+        raise HTTPException(status_code=500, detail="An error occurred while finalizing files.")
 
     finally:
         if "cur" in locals() and cur:
@@ -507,97 +1132,366 @@ class AgentState(TypedDict):
     results: str
     final_output: str
 
-    # Initialize LLM
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
-def parse_natural_query(state: AgentState) -> AgentState:
-    parser_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an expert at parsing job search queries. Extract the column names 
-        and their corresponding values based on the following schema map:
-        {{
-            "role": "SEARCH_QUERY",
-            "job": "SEARCH_QUERY",
-            "title": "TITLE",
-            "company": "COMPANY",
-            "location": "LOCATION",
-            "description": "DESCRIPTION",
-            "posted_date": "POSTED_DATE"
-        }}
+# Shared LLM clients. They are created once per process so connections to the
+# provider are kept alive and reused instead of being re-established per call.
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
 
-        Include relevant synonyms for each value from this synonym map:
-        {{
-            "SEARCH_QUERY": {{
-                "data": [
-                    "data", "data engineer", "data scientist", 
-                    "data analyst", "data specialist", "data science", 
-                    "data engineering", "data analytics"
-                ],
-                "data engineer": ["data engineer", "data engineering"],
-                "data scientist": ["data scientist", "data science", "machine learning scientist"],
-                "AI engineer": ["AI engineer", "artificial intelligence engineer"],
-                "machine learning engineer": ["machine learning engineer", "ML engineer"],
-                "data analyst": ["data analyst", "data analytics"],
-                "AI/ML engineer": ["AI/ML engineer", "artificial intelligence/machine learning engineer"],
-                "software engineer": ["software engineer", "software developer", "software programming"],
-                "devops engineer": ["devops engineer", "site reliability engineer", "SRE"],
-                "full stack engineer": ["full stack engineer", "full stack developer", "front end and back end developer"]
-            }}
-        }}
+llm_http_limits = httpx.Limits(
+    max_connections=LLM_MAX_CONNECTIONS,
+    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+    keepalive_expiry=60,
+)
+llm_http_client = httpx.Client(limits=llm_http_limits, timeout=LLM_REQUEST_TIMEOUT)
+llm_async_http_client = httpx.AsyncClient(limits=llm_http_limits, timeout=LLM_REQUEST_TIMEOUT)
+
+
+def create_chat_llm(temperature: float) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=LLM_MODEL,
+        temperature=temperature,
+        request_timeout=LLM_REQUEST_TIMEOUT,
+        max_retries=2,
+        http_client=llm_http_client,
+        http_async_client=llm_async_http_client,
+    )
 
-        If the query does not mention a specific role, job, title, company, or location explicitly (e.g., "give me jobs"), 
-        or is irrelevant, return:
-        {{
-            'role': [], 
-            'company': [], 
-            'location': [], 
-            'title': [], 
-            'description': [], 
-            'posted_date': []
-        }}.
-
-        Return a valid Python dictionary where:
-        - Keys are column names from the schema map.
-        - Values are lists of terms to search for, including synonyms.
-        Format the output as valid Python syntax with no extra text or code blocks.
-        Example: {{'column_name': ['value1', 'value2']}}"""),
-        ("user", "Parse this job search query: {natural_query}")
-    ])
 
-    
-    chain = parser_prompt | llm
-    response = chain.invoke({
-        "natural_query": state["natural_query"]
-    })
-    
-    try:
-        content = response.content if hasattr(response, 'content') else response
-        print(f"Raw LLM response: {content}")
-        
-        sanitized_response = content.strip("```python").strip("```").strip()
-        parsed = ast.literal_eval(sanitized_response)
-        
-        if isinstance(parsed, dict) and all(isinstance(v, list) for v in parsed.values()):
-            state["parsed_query"] = parsed
-        else:
-            raise ValueError("Parsed query does not return valid lists of terms.")
-    except Exception as e:
-        state["parsed_query"] = {"error": f"Parsing error: {str(e)}"}
-    
-    print(f"Parsed query: {state['parsed_query']}")
-    return state
+# Query parsing is deterministic; feedback and chat use a higher temperature
+llm = create_chat_llm(temperature=0)
+feedback_llm = create_chat_llm(temperature=0.7)
 
 
-def write_sql_query(state: AgentState) -> AgentState:
-    conditions = []
-    schema_to_table_map = {
-        "role": "SEARCH_QUERY",
-        "job": "SEARCH_QUERY",
-        "title": "TITLE",
-        "company": "COMPANY",
-        "location": "LOCATION",
-        "description": "DESCRIPTION",
-        "posted_date": "POSTED_DATE"
-    }
+async def close_llm_clients():
+    await llm_async_http_client.aclose()
+    llm_http_client.close()
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds in-flight calls for one endpoint. Up to `limit` calls run at once and
+    at most `max_waiting` more wait up to `wait_timeout` seconds for a slot; any
+    further request is rejected with 429 so queued requests keep a bounded latency.
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int, wait_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    def _reject(self) -> HTTPException:
+        return HTTPException(
+            status_code=429,
+            detail=f"Too many concurrent {self.name} requests. Please retry shortly.",
+            headers={"Retry-After": str(max(1, int(self.wait_timeout)))},
+        )
+
+    async def acquire(self):
+        if self._semaphore.locked() and self._waiting >= self.max_waiting:
+            raise self._reject()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject()
+        finally:
+            self._waiting -= 1
+
+    def release(self):
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def create_limiter(name: str, default_limit: int) -> ConcurrencyLimiter:
+    """
+    Limiter configured from LLM_<NAME>_CONCURRENCY and LLM_<NAME>_QUEUE_SIZE.
+    """
+    prefix = f"LLM_{name.upper().replace('-', '_')}"
+    return ConcurrencyLimiter(
+        name=name,
+        limit=int(os.getenv(f"{prefix}_CONCURRENCY", str(default_limit))),
+        max_waiting=int(os.getenv(f"{prefix}_QUEUE_SIZE", str(default_limit * 2))),
+        wait_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+    )
+
+
+search_limiter = create_limiter("search", 8)
+feedback_limiter = create_limiter("feedback", 8)
+chat_feedback_limiter = create_limiter("chat-feedback", 8)
+
+
+class TaskQueue:
+    """
+    In-process queue for slow LLM and document work. Submitting returns a task
+    record at once; `workers` coroutines run tasks with retries, identical
+    submissions are deduplicated by input hash, and finished tasks are kept
+    for `retention` seconds so clients can poll or stream their status.
+    Workers are started lazily on the running event loop.
+    """
+
+    def __init__(self, workers: int, max_size: int, max_retries: int, retry_delay: float, retention: float):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.tasks = LRUCache(maxsize=int(os.getenv("TASK_RETENTION_SIZE", "10000")), ttl=retention)
+        self._dedup = LRUCache(maxsize=int(os.getenv("TASK_RETENTION_SIZE", "10000")), ttl=retention)
+        self._callables: Dict[str, tuple] = {}
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(
+        self,
+        kind: str,
+        user_id,
+        func,
+        *args,
+        dedup_key: Optional[str] = None,
+        reuse_completed: bool = True,
+        task_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Queue `func(*args)` and return its task record. If a task with the same
+        `dedup_key` is queued or running (or completed, with `reuse_completed`),
+        that task is returned instead. Raises 429 when the queue is full.
+        """
+        self._ensure_started()
+        if dedup_key:
+            existing = self.tasks.get(self._dedup.get(dedup_key))
+            if existing and (
+                existing["status"] in ("queued", "running")
+                or (reuse_completed and existing["status"] == "completed")
+            ):
+                return existing
+
+        now = datetime.utcnow().isoformat()
+        task = {
+            "task_id": task_id or str(uuid4()),
+            "kind": kind,
+            "user_id": str(user_id),
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            self._queue.put_nowait(task["task_id"])
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many queued tasks. Please retry shortly.",
+                headers={"Retry-After": str(max(1, int(self.retry_delay)))},
+            )
+        self.tasks.set(task["task_id"], task)
+        self._callables[task["task_id"]] = (func, args)
+        self._finished[task["task_id"]] = asyncio.Event()
+        if dedup_key:
+            self._dedup.set(dedup_key, task["task_id"])
+        return task
+
+    async def wait(self, task_id: str, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for a task to finish.
+        """
+        finished = self._finished.get(task_id)
+        if finished is None:
+            return True
+        try:
+            await asyncio.wait_for(finished.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self):
+        while True:
+            task_id = await self._queue.get()
+            try:
+                await self._run(task_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, task_id: str):
+        task = self.tasks.get(task_id)
+        func, args = self._callables.get(task_id, (None, None))
+        if task is None or func is None:
+            return
+
+        task["status"] = "running"
+        task["attempts"] += 1
+        task["updated_at"] = datetime.utcnow().isoformat()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                task["result"] = await func(*args)
+            else:
+                task["result"] = await run_in_threadpool(func, *args)
+            task["status"] = "completed"
+            task["error"] = None
+        except Exception as e:
+            # Client errors will not succeed on retry
+            retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+            task["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+            if retryable and task["attempts"] <= self.max_retries:
+                task["status"] = "queued"
+                task["updated_at"] = datetime.utcnow().isoformat()
+                delay = self.retry_delay * 2 ** (task["attempts"] - 1)
+                self._loop.call_later(delay, self._requeue, task_id)
+                return
+            task["status"] = "failed"
+
+        task["updated_at"] = datetime.utcnow().isoformat()
+        self._callables.pop(task_id, None)
+        finished = self._finished.pop(task_id, None)
+        if finished is not None:
+            finished.set()
+
+    def _requeue(self, task_id: str):
+        try:
+            self._queue.put_nowait(task_id)
+        except asyncio.QueueFull:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                task["status"] = "failed"
+                task["error"] = "Task queue is full."
+            self._callables.pop(task_id, None)
+            finished = self._finished.pop(task_id, None)
+            if finished is not None:
+                finished.set()
+
+    async def stop(self):
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._loop = None
+
+
+task_queue = TaskQueue(
+    workers=int(os.getenv("TASK_QUEUE_WORKERS", "4")),
+    max_size=int(os.getenv("TASK_QUEUE_MAX_SIZE", "1000")),
+    max_retries=int(os.getenv("TASK_MAX_RETRIES", "2")),
+    retry_delay=float(os.getenv("TASK_RETRY_DELAY_SECONDS", "2")),
+    retention=float(os.getenv("TASK_RESULT_TTL_SECONDS", "3600")),
+)
+
+
+def task_input_hash(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(hashlib.sha256(str(part).encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+QUERY_PARSER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert at parsing job search queries. Extract the column names 
+    and their corresponding values based on the following schema map:
+    {{
+        "role": "SEARCH_QUERY",
+        "job": "SEARCH_QUERY",
+        "title": "TITLE",
+        "company": "COMPANY",
+        "location": "LOCATION",
+        "description": "DESCRIPTION",
+        "posted_date": "POSTED_DATE"
+    }}
+
+    Include relevant synonyms for each value from this synonym map:
+    {{
+        "SEARCH_QUERY": {{
+            "data": [
+                "data", "data engineer", "data scientist", 
+                "data analyst", "data specialist", "data science", 
+                "data engineering", "data analytics"
+            ],
+            "data engineer": ["data engineer", "data engineering"],
+            "data scientist": ["data scientist", "data science", "machine learning scientist"],
+            "AI engineer": ["AI engineer", "artificial intelligence engineer"],
+            "machine learning engineer": ["machine learning engineer", "ML engineer"],
+            "data analyst": ["data analyst", "data analytics"],
+            "AI/ML engineer": ["AI/ML engineer", "artificial intelligence/machine learning engineer"],
+            "software engineer": ["software engineer", "software developer", "software programming"],
+            "devops engineer": ["devops engineer", "site reliability engineer", "SRE"],
+            "full stack engineer": ["full stack engineer", "full stack developer", "front end and back end developer"]
+        }}
+    }}
+
+    If the query does not mention a specific role, job, title, company, or location explicitly (e.g., "give me jobs"), 
+    or is irrelevant, return:
+    {{
+        'role': [], 
+        'company': [], 
+        'location': [], 
+        'title': [], 
+        'description': [], 
+        'posted_date': []
+    }}.
+
+    Return a valid Python dictionary where:
+    - Keys are column names from the schema map.
+    - Values are lists of terms to search for, including synonyms.
+    Format the output as valid Python syntax with no extra text or code blocks.
+    Example: {{'column_name': ['value1', 'value2']}}"""),
+    ("user", "Parse this job search query: {natural_query}")
+])
+
+
+def parse_natural_query(state: AgentState) -> AgentState:
+    chain = QUERY_PARSER_PROMPT | llm
+    response = chain.invoke({
+        "natural_query": state["natural_query"]
+    })
+    
+    try:
+        content = response.content if hasattr(response, 'content') else response
+        print(f"Raw LLM response: {content}")
+        
+        sanitized_response = content.strip("```python").strip("```").strip()
+        parsed = ast.literal_eval(sanitized_response)
+        
+        if isinstance(parsed, dict) and all(isinstance(v, list) for v in parsed.values()):
+            state["parsed_query"] = parsed
+        else:
+            raise ValueError("Parsed query does not return valid lists of terms.")
+    except Exception as e:
+        state["parsed_query"] = {"error": f"Parsing error: {str(e)}"}
+    
+    print(f"Parsed query: {state['parsed_query']}")
+    return state
+
+
+def write_sql_query(state: AgentState) -> AgentState:
+    conditions = []
+    schema_to_table_map = {
+        "role": "SEARCH_QUERY",
+        "job": "SEARCH_QUERY",
+        "title": "TITLE",
+        "company": "COMPANY",
+        "location": "LOCATION",
+        "description": "DESCRIPTION",
+        "posted_date": "POSTED_DATE"
+    }
     
     # Consolidate and deduplicate conditions for fields mapping to the same column
     column_conditions = {}
@@ -684,6 +1578,9 @@ def create_workflow():
     
     return workflow.compile()
 
+
+search_graph = create_workflow()
+
 # Add this to your existing endpoint
 @app.get("/search/jobs", response_model=JobSearchResponse)
 async def search_job_listings(
@@ -691,7 +1588,6 @@ async def search_job_listings(
     current_user: UserOut = Depends(get_current_user)
 ):
     try:
-        graph = create_workflow()
         initial_state = {
             "natural_query": query,
             "parsed_query": {},
@@ -699,7 +1595,9 @@ async def search_job_listings(
             "results": "",
             "final_output": ""
         }
-        result = graph.invoke(initial_state)
+        # The graph makes blocking LLM and Snowflake calls; keep them off the event loop
+        async with search_limiter:
+            result = await run_in_threadpool(search_graph.invoke, initial_state)
         
         if result["final_output"]["status"] == "error":
             raise HTTPException(
@@ -707,7 +1605,10 @@ async def search_job_listings(
                 detail=result["final_output"]["message"]
             )
             
-        return result["final_output"]
+        # Rows straight from the DataFrame; returned as is rather than re-validated against JobSearchResponse
+        return FastJSONResponse(content=result["final_output"])
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -727,102 +1628,152 @@ def get_user_results_db_connection():
         )
     except ProgrammingError as e:
         raise HTTPException(status_code=500, detail=f"Snowflake connection error for USER_RESULTS_DB: {e}")
-    
+
+
+# Saved jobs for all users live in one table keyed by (user_id, job_id) and
+# clustered by user_id. It replaces the per-user user_<uuid> tables; existing
+# tables are copied over with migrate_saved_jobs.py.
+#
+# A saved job is a reference to JOBLISTINGS_ARCHIVE, the append-only listing
+# archive the Airflow load maintains, plus the user's own status and feedback.
+# The listing columns are only filled for rows saved before the archive existed.
+CREATE_SAVED_JOBS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS SAVED_JOBS (
+    user_id STRING NOT NULL,               -- Owner (user_profiles.id)
+    job_id STRING NOT NULL,                -- Job ID from JOBLISTINGS_ARCHIVE
+    title STRING,                          -- Legacy listing snapshot
+    company STRING,                        -- Legacy listing snapshot
+    location STRING,                       -- Legacy listing snapshot
+    description TEXT,                      -- Legacy listing snapshot
+    job_highlights TEXT,                   -- Legacy listing snapshot
+    apply_links STRING,                    -- Legacy listing snapshot
+    posted_date STRING,                    -- Legacy listing snapshot
+    status STRING DEFAULT 'Not Applied',   -- Application status
+    feedback TEXT,                         -- Feedback on the application
+    feedback_key STRING,                   -- Hash of the inputs the feedback was generated from
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Creation timestamp
+    updated_at TIMESTAMP,                  -- Update timestamp
+    PRIMARY KEY (user_id, job_id)
+)
+CLUSTER BY (user_id);
+"""
+
+# The archive lives in the job listings database
+JOB_ARCHIVE_TABLE = f"{os.getenv('SNOWFLAKE_JOBSDB')}.{os.getenv('SNOWFLAKE_SCHEMA')}.JOBLISTINGS_ARCHIVE"
+
+# Same schema as Airflow/dags/upload_table.update_listing_archive, so saves and
+# reads work on a fresh deploy before the first DAG run
+CREATE_JOB_ARCHIVE_TABLE_QUERY = f"""
+CREATE TABLE IF NOT EXISTS {JOB_ARCHIVE_TABLE} (
+    JOB_ID STRING NOT NULL,
+    CONTENT_HASH STRING NOT NULL,
+    TITLE STRING,
+    COMPANY STRING,
+    LOCATION STRING,
+    DESCRIPTION STRING,
+    JOB_HIGHLIGHTS STRING,
+    APPLY_LINKS STRING,
+    POSTED_DATE STRING,
+    SKILLS STRING,
+    SALARY_MIN NUMBER,
+    SALARY_MAX NUMBER,
+    SALARY_CURRENCY STRING,
+    SALARY_PERIOD STRING,
+    ARCHIVED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (JOB_ID)
+);
+"""
+
+# Highlight term frequencies per listing, appended by the Airflow load
+JOB_TERMS_TABLE = f"{os.getenv('SNOWFLAKE_JOBSDB')}.{os.getenv('SNOWFLAKE_SCHEMA')}.JOB_TERMS"
+
+# Saved jobs joined to their archived listing
+SAVED_JOBS_SOURCE = f"SAVED_JOBS s LEFT JOIN {JOB_ARCHIVE_TABLE} a ON a.job_id = s.job_id"
+
+
+def listing_column(column: str) -> str:
+    return f"COALESCE(a.{column}, s.{column}) AS {column}"
+
+
+# Columns returned to clients, in the order the per-user tables used
+SAVED_JOB_COLUMNS = ", ".join(
+    ["s.job_id"]
+    + [listing_column(column) for column in (
+        "title", "company", "location", "description", "job_highlights", "apply_links", "posted_date",
+    )]
+    + ["s.status", "s.feedback", "s.created_at", "s.updated_at"]
+)
+
+
+def initialize_saved_jobs_table():
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        cur.execute(CREATE_SAVED_JOBS_TABLE_QUERY)
+        conn.commit()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating SAVED_JOBS table: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+def initialize_job_archive_table():
+    try:
+        conn = get_snowflake_joblistings_connection()
+        cur = conn.cursor()
+        cur.execute(CREATE_JOB_ARCHIVE_TABLE_QUERY)
+        conn.commit()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating JOBLISTINGS_ARCHIVE table: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
 @app.post("/jobs/save")
 async def save_job(
     job_id: str = Form(...),
-    title: str = Form(None),
-    company: str = Form(None),
-    location: str = Form(None),
-    description: str = Form(None),
-    job_highlights: str = Form(None),
-    apply_links: str = Form(None),
-    posted_date: str = Form(None),
     status: str = Form("Not Applied"),
     current_user: UserOut = Depends(get_current_user)
 ):
     """
-    Save job details for the logged-in user.
-    Creates a new table for the user based on their UUID if it does not already exist.
+    Save a reference to an archived listing for the logged-in user. The listing
+    details are joined from the archive on read.
     """
     try:
         conn = get_user_results_db_connection()
         cur = conn.cursor()
 
-        # Ensure the UUID is converted to a string before replacing characters
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"
-
-        # Create table if it doesn't exist
-        create_table_query = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            job_id STRING NOT NULL,                -- Unique Job ID
-            title STRING,                          -- Job title
-            company STRING,                        -- Company name
-            location STRING,                       -- Job location
-            description TEXT,                      -- Job description
-            job_highlights TEXT,                   -- Job highlights
-            apply_links STRING,                    -- Application link
-            posted_date STRING,                    -- Job posting date
-            status STRING DEFAULT 'Not Applied',   -- Application status
-            feedback TEXT,                         -- Feedback on the application
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Creation timestamp
-            updated_at TIMESTAMP,                  -- Update timestamp
-            PRIMARY KEY (job_id)                   -- Primary key for unique jobs
-        );
-        """
-        cur.execute(create_table_query)
-
-        # Use a MERGE statement for upserting
+        # Upsert only when the listing exists in the archive
         merge_query = f"""
-        MERGE INTO {table_name} AS target
-        USING (SELECT
-            %(job_id)s AS job_id,
-            %(title)s AS title,
-            %(company)s AS company,
-            %(location)s AS location,
-            %(description)s AS description,
-            %(job_highlights)s AS job_highlights,
-            %(apply_links)s AS apply_links,
-            %(posted_date)s AS posted_date,
-            %(status)s AS status,
-            CURRENT_TIMESTAMP AS updated_at
-        ) AS source
-        ON target.job_id = source.job_id
+        MERGE INTO SAVED_JOBS AS target
+        USING (SELECT job_id FROM {JOB_ARCHIVE_TABLE} WHERE job_id = %(job_id)s) AS source
+        ON target.user_id = %(user_id)s AND target.job_id = source.job_id
         WHEN MATCHED THEN UPDATE SET
-            title = source.title,
-            company = source.company,
-            location = source.location,
-            description = source.description,
-            job_highlights = source.job_highlights,
-            apply_links = source.apply_links,
-            posted_date = source.posted_date,
-            status = source.status,
-            updated_at = source.updated_at
-        WHEN NOT MATCHED THEN INSERT (
-            job_id, title, company, location, description, 
-            job_highlights, apply_links, posted_date, status, created_at, updated_at
-        )
-        VALUES (
-            source.job_id, source.title, source.company, source.location, source.description,
-            source.job_highlights, source.apply_links, source.posted_date, source.status, CURRENT_TIMESTAMP, NULL
-        );
+            status = %(status)s,
+            updated_at = CURRENT_TIMESTAMP
+        WHEN NOT MATCHED THEN INSERT (user_id, job_id, status, created_at, updated_at)
+        VALUES (%(user_id)s, source.job_id, %(status)s, CURRENT_TIMESTAMP, NULL);
         """
         params = {
+            'user_id': str(current_user.id),
             'job_id': job_id,
-            'title': title,
-            'company': company,
-            'location': location,
-            'description': description,
-            'job_highlights': job_highlights,
-            'apply_links': apply_links,
-            'posted_date': posted_date,
             'status': status
         }
 
         cur.execute(merge_query, params)
         conn.commit()
 
-        return {"message": f"Job saved successfully in table '{table_name}'."}
+        if cur.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Job listing not found.")
+        refresh_saved_jobs_cache(cur, current_user.id, [job_id])
+
+        return {"message": "Job saved successfully."}
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving job: {e}")
     finally:
@@ -831,36 +1782,184 @@ async def save_job(
         if "conn" in locals() and conn:
             conn.close()
 
-@app.get("/jobs/saved", response_model=list)
-async def get_saved_jobs(current_user: UserOut = Depends(get_current_user)):
+def saved_jobs_version(cur, user_id: str) -> tuple:
     """
-    Fetch all saved jobs for the logged-in user.
+    Row count and latest change of the user's saved jobs. Any insert or update
+    moves the timestamp and any delete lowers the count, so together they
+    identify a version of the saved list without reading its rows.
     """
-    try:
-        conn = get_user_results_db_connection()
-        cur = conn.cursor()
+    cur.execute(
+        "SELECT COUNT(*), MAX(COALESCE(updated_at, created_at)) FROM SAVED_JOBS WHERE user_id = %(user_id)s",
+        {"user_id": user_id},
+    )
+    count, last_modified = cur.fetchone()
+    return count, last_modified
 
-        # Dynamically generate the table name
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"
 
-        # Query to fetch all jobs
-        fetch_jobs_query = f"SELECT * FROM {table_name};"
-        cur.execute(fetch_jobs_query)
-        columns = [col[0] for col in cur.description]  # Get column names
-        rows = cur.fetchall()
+def saved_jobs_etag(user_id: str, count: int, last_modified) -> str:
+    version = f"{user_id}:{count}:{last_modified.isoformat() if last_modified else ''}"
+    return f'"{hashlib.sha256(version.encode()).hexdigest()[:32]}"'
 
-        # Format results as a list of dictionaries
-        saved_jobs = [dict(zip(columns, row)) for row in rows]
 
-        return saved_jobs
+# Saved jobs per user, written through by every saved-job mutation in this
+# process. Changes made by other workers are picked up by comparing the cached
+# version with saved_jobs_version(), at most every REVALIDATE_SECONDS.
+SAVED_JOBS_CACHE_REVALIDATE_SECONDS = float(os.getenv("SAVED_JOBS_CACHE_REVALIDATE_SECONDS", "10"))
+saved_jobs_cache = LRUCache(
+    maxsize=int(os.getenv("SAVED_JOBS_CACHE_USERS", "1000")),
+    ttl=float(os.getenv("SAVED_JOBS_CACHE_TTL_SECONDS", "900")),
+    max_weight=int(os.getenv("SAVED_JOBS_CACHE_BYTES", str(64 * 1024 * 1024))),
+    weigh=lambda entry: entry["size"],
+)
+
+
+def saved_job_size(job: Dict[str, Any]) -> int:
+    """Approximate in-memory size of one cached row, in bytes"""
+    return 64 + sum(len(str(value)) for value in job.values())
+
+
+def cache_saved_jobs(user_id: str, jobs: Dict[str, Dict[str, Any]], count: int, last_modified):
+    # Entries are replaced, never mutated, so concurrent readers see a consistent copy
+    saved_jobs_cache.set(user_id, {
+        "jobs": jobs,
+        "count": count,
+        "last_modified": last_modified,
+        "validated_at": time.monotonic(),
+        "size": sum(saved_job_size(job) for job in jobs.values()),
+    })
+
+
+def fetch_saved_job_rows(cur, user_id: str, job_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """The user's saved jobs (or only `job_ids`) keyed by job id"""
+    query = f"SELECT {SAVED_JOB_COLUMNS} FROM {SAVED_JOBS_SOURCE} WHERE s.user_id = %(user_id)s"
+    params = {"user_id": user_id}
+    if job_ids:
+        query += f" AND s.job_id IN ({', '.join(f'%(id_{i})s' for i in range(len(job_ids)))})"
+        params.update({f"id_{i}": job_id for i, job_id in enumerate(job_ids)})
+    cur.execute(query, params)
+    columns = [col[0] for col in cur.description]  # Get column names
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    return {row["JOB_ID"]: row for row in rows}
+
+
+def refresh_saved_jobs_cache(cur, user_id, job_ids: List[str]):
+    """
+    Write the rows of `job_ids` through to the user's cached saved jobs after
+    they were inserted, updated or deleted. The entry is dropped when rows
+    other than `job_ids` changed since it was cached (another worker wrote
+    to the list too), so the new version is never stamped on stale rows.
+    """
+    user_id = str(user_id)
+    entry = saved_jobs_cache.get(user_id)
+    if entry is None or not job_ids:
+        return
+    try:
+        changed = fetch_saved_job_rows(cur, user_id, job_ids)
+        jobs = {job_id: job for job_id, job in entry["jobs"].items() if job_id not in job_ids}
+        jobs.update(changed)
+
+        placeholders = ", ".join(f"%(id_{i})s" for i in range(len(job_ids)))
+        cur.execute(
+            f"""
+            SELECT COUNT(*), MAX(COALESCE(updated_at, created_at)),
+                   COUNT_IF(job_id NOT IN ({placeholders}) AND (
+                       %(cached_at)s IS NULL OR COALESCE(updated_at, created_at) > %(cached_at)s
+                   ))
+            FROM SAVED_JOBS WHERE user_id = %(user_id)s
+            """,
+            {
+                "user_id": user_id,
+                "cached_at": entry["last_modified"],
+                **{f"id_{i}": job_id for i, job_id in enumerate(job_ids)},
+            },
+        )
+        count, last_modified, changed_elsewhere = cur.fetchone()
+        if count == len(jobs) and not changed_elsewhere:
+            cache_saved_jobs(user_id, jobs, count, last_modified)
+        else:
+            saved_jobs_cache.pop(user_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching saved jobs: {e}")
+        print(f"Error refreshing saved jobs cache: {str(e)}")
+        saved_jobs_cache.pop(user_id)
+
+
+def load_saved_jobs(user_id: str) -> Dict[str, Any]:
+    """
+    The user's cached saved jobs, revalidated against Snowflake when the entry
+    is older than SAVED_JOBS_CACHE_REVALIDATE_SECONDS and reloaded when stale.
+    """
+    entry = saved_jobs_cache.get(user_id)
+    if entry and time.monotonic() - entry["validated_at"] < SAVED_JOBS_CACHE_REVALIDATE_SECONDS:
+        return entry
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+
+        count, last_modified = saved_jobs_version(cur, user_id)
+        if entry and (entry["count"], entry["last_modified"]) == (count, last_modified):
+            jobs = entry["jobs"]
+        else:
+            jobs = fetch_saved_job_rows(cur, user_id)
+        cache_saved_jobs(user_id, jobs, count, last_modified)
+        return {"jobs": jobs, "count": count, "last_modified": last_modified}
     finally:
         if "cur" in locals() and cur:
             cur.close()
         if "conn" in locals() and conn:
             conn.close()
 
+
+def changed_since(job: Dict[str, Any], updated_since: datetime) -> bool:
+    changed_at = job.get("UPDATED_AT") or job.get("CREATED_AT")
+    return changed_at is None or changed_at >= updated_since
+
+
+def fetch_saved_jobs_response(request: Request, user_id: str, updated_since: Optional[datetime]) -> Response:
+    """
+    The user's saved jobs as a conditional response:
+    - 304 when If-None-Match matches the current version
+    - only rows changed at or after `updated_since` when it is given
+
+    X-Total-Count and X-Last-Modified let clients merge a delta into a local
+    copy; a merged copy larger than X-Total-Count means rows were deleted.
+    """
+    saved = load_saved_jobs(user_id)
+    count, last_modified = saved["count"], saved["last_modified"]
+    etag = saved_jobs_etag(user_id, count, last_modified)
+    headers = {
+        "ETag": etag,
+        "X-Total-Count": str(count),
+        "X-Last-Modified": last_modified.isoformat() if last_modified else "",
+    }
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    saved_jobs = list(saved["jobs"].values())
+    if updated_since:
+        # Stored timestamps (and so X-Last-Modified) are naive
+        updated_since = updated_since.replace(tzinfo=None)
+        saved_jobs = [job for job in saved_jobs if changed_since(job, updated_since)]
+
+    return FastJSONResponse(content=saved_jobs, headers=headers)
+
+
+@app.get("/jobs/saved", response_model=list)
+async def get_saved_jobs(
+    request: Request,
+    updated_since: Optional[datetime] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Fetch all saved jobs for the logged-in user, or only those changed since
+    `updated_since`. Honors If-None-Match.
+    """
+    try:
+        return await run_in_threadpool(fetch_saved_jobs_response, request, str(current_user.id), updated_since)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching saved jobs: {e}")
+
 @app.put("/jobs/update-status")
 async def update_job_status(
     job_id: str = Form(...),
@@ -874,18 +1973,16 @@ async def update_job_status(
         conn = get_user_results_db_connection()
         cur = conn.cursor() 
 
-        # Dynamically generate the table name
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"
-
         # Update query
-        update_query = f"""
-        UPDATE {table_name}
+        update_query = """
+        UPDATE SAVED_JOBS
         SET status = %(new_status)s, updated_at = CURRENT_TIMESTAMP
-        WHERE job_id = %(job_id)s;
+        WHERE user_id = %(user_id)s AND job_id = %(job_id)s;
         """
-        params = {'job_id': job_id, 'new_status': new_status}
+        params = {'user_id': str(current_user.id), 'job_id': job_id, 'new_status': new_status}
         cur.execute(update_query, params)
         conn.commit()
+        refresh_saved_jobs_cache(cur, current_user.id, [job_id])
 
         return {"message": "Job status updated successfully."}
     except Exception as e:
@@ -905,27 +2002,15 @@ async def delete_job(job_id: str, current_user: UserOut = Depends(get_current_us
         conn = get_user_results_db_connection()
         cur = conn.cursor()
 
-        # Generate the user's table name dynamically based on their UUID
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"  # Convert UUID to string first
-
-        # Check if the table exists
-        check_table_query = f"""
-        SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-        WHERE TABLE_NAME = '{table_name.upper()}' 
-        AND TABLE_SCHEMA = '{os.getenv("SNOWFLAKE_SCHEMA").upper()}';
-        """
-        cur.execute(check_table_query)
-        if cur.fetchone()[0] == 0:
-            raise HTTPException(status_code=404, detail="No saved jobs found for this user.")
-
         # Delete the job
-        delete_query = f"DELETE FROM {table_name} WHERE job_id = %s"
-        cur.execute(delete_query, (job_id,))
+        delete_query = "DELETE FROM SAVED_JOBS WHERE user_id = %s AND job_id = %s"
+        cur.execute(delete_query, (str(current_user.id), job_id))
         conn.commit()
 
         # Check if the job was deleted
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job not found or already deleted.")
+        refresh_saved_jobs_cache(cur, current_user.id, [job_id])
 
         return {"message": "Job deleted successfully."}
     except HTTPException as e:
@@ -938,237 +2023,1431 @@ async def delete_job(job_id: str, current_user: UserOut = Depends(get_current_us
         if "conn" in locals() and conn:
             conn.close()
 
-import fitz 
+MAX_BULK_JOBS = int(os.getenv("MAX_BULK_JOBS", "500"))
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
-    text = ""
-    try:
-        with fitz.open(stream=pdf_content, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}")
-    return text
 
-import requests
+class BulkSaveItem(BaseModel):
+    job_id: str
+    status: str = "Not Applied"
 
-@app.post("/feedback")
-async def generate_feedback(
-    job_id: str,
-    description: str,
-    highlights: str,
-    current_user: UserOut = Depends(get_current_user),
-):
-    """
-    Generate detailed feedback for the user's resume and cover letter based on the job description and highlights.
-    """
-    try:
-        # Fetch the publicly accessible links for the resume and cover letter
-        resume_link = current_user.resume_link
-        cover_letter_link = current_user.cover_letter_link
-        if not resume_link or not cover_letter_link:
-            raise HTTPException(status_code=400, detail="Resume or cover letter not found.")
+class BulkSaveRequest(BaseModel):
+    jobs: List[BulkSaveItem]
 
-        # Fetch the files from the public URLs
-        resume_response = requests.get(resume_link)
-        cover_letter_response = requests.get(cover_letter_link)
-
-        # Check for successful retrieval
-        if resume_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch resume from the provided URL.")
-        if cover_letter_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch cover letter from the provided URL.")
-
-        # Extract text from PDFs
-        resume_text = extract_text_from_pdf(resume_response.content)
-        cover_letter_text = extract_text_from_pdf(cover_letter_response.content)
-
-        # Debug: Log extracted content (optional, remove in production)
-        print("=== Extracted Resume Content ===")
-        print(resume_text)
-        print("\n=== Extracted Cover Letter Content ===")
-        print(cover_letter_text)
-
-        # Prepare context for the LLM
-        context = {
-            "job_description": description,
-            "job_highlights": highlights,
-            "resume_text": resume_text,
-            "cover_letter_text": cover_letter_text,
-        }
+class BulkStatusItem(BaseModel):
+    job_id: str
+    new_status: str
 
-        # Create a prompt template
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert career advisor."),
-            ("user", """
-                Job Description:
-                {job_description}
-
-                Job Highlights:
-                {job_highlights}
-
-                Candidate's Resume:
-                {resume_text}
-
-                Candidate's Cover Letter:
-                {cover_letter_text}
-
-                Instructions:
-                - Validate the document type before providing feedback:
-                    - If the content is not a resume or cover letter, respond with: "The provided content is not relevant for resume or cover letter feedback. Please provide relevant documents."
-                - Provide detailed feedback on the resume and cover letter separately if valid:
-                    - For the resume:
-                        - Assess how well it aligns with the job description and highlights.
-                        Example: "The resume lists project management experience, which aligns well with the job requirement for managing cross-functional teams. However, it lacks specific details about the size or scope of projects managed. Include quantifiable metrics like team size or budget managed to strengthen alignment."
-                        - Provide specific suggestions for improvement, such as tailoring skills, optimizing keywords, or restructuring sections for clarity.
-                        Example: "The 'Skills' section could include keywords directly from the job description, such as 'Agile methodology' or 'data-driven decision making.'"
-                        - Highlight any missing sections or areas for enhancement (e.g., education, work experience, or technical skills).
-                        Example: "The resume does not include a 'Technical Skills' section, which is crucial for this role. Add a section highlighting your proficiency with tools like Jira, Tableau, or SQL."
-                        - Provide a relevance score (0-100) indicating how well the resume matches the job requirements.
-                        Example: "Relevance Score: 85/100. The resume aligns well overall but could benefit from more tailored keywords and quantifiable achievements."
-                    - For the cover letter:
-                        - Evaluate its tone, structure, and alignment with the job description and highlights.
-                        Example: "The tone of the cover letter is professional but lacks enthusiasm for the specific role. Adding a sentence about why you are excited about this company's mission would improve it."
-                        - Suggest ways to make the cover letter more compelling and tailored, such as emphasizing achievements or customizing the tone to the company culture.
-                        Example: "Mention your success in reducing project timelines by 20% in your last role to demonstrate your ability to meet the job's emphasis on efficiency."
-                        - Highlight areas where it lacks personalization or fails to address key job requirements.
-                        Example: "The cover letter is generic and does not mention the company's recent product launch, which is a key highlight. Include a sentence demonstrating your knowledge of this and how your skills can contribute to its success."
-                    - If either the resume or cover letter has insufficient content or is overly generic, provide constructive feedback to address this.
-                        Example: "The resume provides only a list of job titles without describing responsibilities or achievements. Include bullet points that explain your impact in each role."
-
-                Focus on actionable feedback that helps the candidate improve alignment with the job.
-            """),
-        ])
-
-        # Initialize LangChain LLM
-        chat_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-        response = chat_llm.invoke(prompt_template.format(**context))
-
-        return {"feedback": response.content}
+class BulkStatusRequest(BaseModel):
+    updates: List[BulkStatusItem]
 
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-    
+class BulkDeleteRequest(BaseModel):
+    job_ids: List[str]
 
-@app.post("/chat-feedback")
-async def chat_feedback(
-    document_type: str = Form(..., description="Type of document (resume or cover letter)"),
-    question: str = Form(..., description="User's specific question"),
-    description: str = Form(..., description="Job description for context"),
-    highlights: str = Form(..., description="Job highlights for context"),
-    current_user: UserOut = Depends(get_current_user),
-):
+
+def unique_job_items(items: list, key=lambda item: item) -> list:
     """
-    Generate feedback for a specific question based on the user's selected document.
+    Items with duplicate job ids dropped (the last one wins), bounded by
+    MAX_BULK_JOBS. A MERGE source must not match a target row twice.
     """
-    try:
-        # Get public resume and cover letter links
-        if document_type == "resume":
-            document_link = current_user.resume_link
-        elif document_type == "cover_letter":
-            document_link = current_user.cover_letter_link
-        else:
-            raise HTTPException(status_code=400, detail="Invalid document type.")
-
-        if not document_link:
-            raise HTTPException(status_code=400, detail="Selected document not found.")
+    if not items:
+        raise HTTPException(status_code=400, detail="No jobs provided.")
+    unique = {key(item): item for item in items}
+    if len(unique) > MAX_BULK_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_JOBS} jobs can be changed at once.")
+    return list(unique.values())
 
-        # Fetch the document content
-        document_response = requests.get(document_link)
-        if document_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to fetch the document.")
 
-        document_text = extract_text_from_pdf(document_response.content)
+def values_clause(rows: List[tuple], prefix: str = "v") -> tuple:
+    """
+    A multi-row VALUES list of placeholders and its parameters. Columns are
+    exposed by Snowflake as column1, column2, ...
+    """
+    placeholders = []
+    params = {}
+    for i, row in enumerate(rows):
+        names = [f"{prefix}_{i}_{j}" for j in range(len(row))]
+        placeholders.append("(" + ", ".join(f"%({name})s" for name in names) + ")")
+        params.update(zip(names, row))
+    return "VALUES " + ", ".join(placeholders), params
 
-        # Prepare context for the LLM
-        context = {
-            "job_description": description,
-            "job_highlights": highlights,
-            "document_text": document_text,
-            "question": question,
-        }
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", "You are a career coach specializing in job applications."),
-            ("user", """
-                Job Description:
-                {job_description}
-
-                Job Highlights:
-                {job_highlights}
-
-                Selected Document Content:
-                {document_text}
-
-                Question:
-                {question}
-
-                Instructions:
-                - If the document content is a resume:
-                    - Provide detailed suggestions and improvements based on the alignment with the job description and highlights.
-                    - Highlight specific areas that can be improved, such as tailoring skills, optimizing keywords, or structuring the resume for clarity and relevance.
-                    - Provide a relevance score (0-100) indicating how well the resume matches the job requirements, based on factors like skills, experience, and alignment with job highlights.
-                - If the document content is a cover letter:
-                    - Provide detailed suggestions and improvements based on how well it aligns with the job description and highlights.
-                    - Suggest ways to make the cover letter more compelling and tailored, such as emphasizing achievements or aligning the tone with the company culture.
-                - If the document content is irrelevant (not a resume or cover letter):
-                    - Respond with: "The provided content is not relevant for resume or cover letter feedback. Please provide relevant documents."
-                - If the user asks anything irrelevant (not related to job applications, resumes, or cover letters):
-                    - Respond with: "The question is not related to job applications, resumes, or cover letters. I can only assist with these topics."
-                - Address edge cases such as:
-                    - Missing key sections in the resume (e.g., education, work experience).
-                    - Overly generic cover letters that lack customization.
-                    - Documents with insufficient content for evaluation.
-                - Focus feedback specifically on how the document content can better align with the job requirements and make a stronger impact.
-
-                Provide your response accordingly.
-            """),
-        ])
-
-        # Generate response using LangChain LLM
-        chat_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-        response = chat_llm.invoke(prompt_template.format(**context))
 
-        return {"response": response.content}
+def select_job_ids(cur, query: str, job_ids: List[str], params: Dict[str, Any]) -> set:
+    """Run `query` with an `{ids}` IN-list placeholder and return the job ids it selects."""
+    placeholders = ", ".join(f"%(id_{i})s" for i in range(len(job_ids)))
+    params = {**params, **{f"id_{i}": job_id for i, job_id in enumerate(job_ids)}}
+    cur.execute(query.format(ids=placeholders), params)
+    return {row[0] for row in cur.fetchall()}
 
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+def bulk_results(job_ids: List[str], applied: set, applied_status: str) -> Dict[str, Any]:
+    results = [
+        {"job_id": job_id, "status": applied_status if job_id in applied else "not_found"}
+        for job_id in job_ids
+    ]
+    return {"count": len(applied), "results": results}
 
-class SaveFeedbackRequest(BaseModel):
-    job_id: str
-    feedback: str
 
-@app.post("/jobs/save-feedback")
-async def save_feedback(
-    feedback_request: SaveFeedbackRequest,
-    current_user: UserOut = Depends(get_current_user),
-):
+@app.post("/jobs/save/bulk")
+async def save_jobs_bulk(request: BulkSaveRequest, current_user: UserOut = Depends(get_current_user)):
     """
-    Save feedback to the logged-in user's saved jobs table.
+    Save many archived listings for the logged-in user with one MERGE.
+    Listings missing from the archive are reported as not_found.
     """
     try:
+        jobs = unique_job_items(request.jobs, key=lambda job: job.job_id)
+        job_ids = [job.job_id for job in jobs]
+        user_id = str(current_user.id)
+
         conn = get_user_results_db_connection()
         cur = conn.cursor()
 
-        # Get the table name for the current user
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"
-        
-        # Update the feedback for the specific job
-        update_query = f"""
-        UPDATE {table_name}
-        SET feedback = %(feedback)s, updated_at = CURRENT_TIMESTAMP
-        WHERE job_id = %(job_id)s
-        """
+        found = select_job_ids(cur, f"SELECT job_id FROM {JOB_ARCHIVE_TABLE} WHERE job_id IN ({{ids}})", job_ids, {})
+        rows = [(job.job_id, job.status) for job in jobs if job.job_id in found]
+        if rows:
+            values, params = values_clause(rows)
+            params["user_id"] = user_id
+            cur.execute(
+                f"""
+                MERGE INTO SAVED_JOBS AS target
+                USING (SELECT column1 AS job_id, column2 AS status FROM {values}) AS source
+                ON target.user_id = %(user_id)s AND target.job_id = source.job_id
+                WHEN MATCHED THEN UPDATE SET
+                    status = source.status,
+                    updated_at = CURRENT_TIMESTAMP
+                WHEN NOT MATCHED THEN INSERT (user_id, job_id, status, created_at, updated_at)
+                VALUES (%(user_id)s, source.job_id, source.status, CURRENT_TIMESTAMP, NULL);
+                """,
+                params,
+            )
+            conn.commit()
+            refresh_saved_jobs_cache(cur, user_id, [row[0] for row in rows])
+
+        return bulk_results(job_ids, found, "saved")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving jobs: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+@app.put("/jobs/update-status/bulk")
+async def update_job_status_bulk(request: BulkStatusRequest, current_user: UserOut = Depends(get_current_user)):
+    """
+    Update the status of many saved jobs with one UPDATE. Jobs the user has
+    not saved are reported as not_found.
+    """
+    try:
+        updates = unique_job_items(request.updates, key=lambda update: update.job_id)
+        job_ids = [update.job_id for update in updates]
+        user_id = str(current_user.id)
+
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+
+        saved = select_job_ids(
+            cur,
+            "SELECT job_id FROM SAVED_JOBS WHERE user_id = %(user_id)s AND job_id IN ({ids})",
+            job_ids,
+            {"user_id": user_id},
+        )
+        rows = [(update.job_id, update.new_status) for update in updates if update.job_id in saved]
+        if rows:
+            values, params = values_clause(rows)
+            params["user_id"] = user_id
+            cur.execute(
+                f"""
+                UPDATE SAVED_JOBS
+                SET status = source.new_status, updated_at = CURRENT_TIMESTAMP
+                FROM (SELECT column1 AS job_id, column2 AS new_status FROM {values}) AS source
+                WHERE SAVED_JOBS.user_id = %(user_id)s AND SAVED_JOBS.job_id = source.job_id;
+                """,
+                params,
+            )
+            conn.commit()
+            refresh_saved_jobs_cache(cur, user_id, [row[0] for row in rows])
+
+        return bulk_results(job_ids, saved, "updated")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating job statuses: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+@app.post("/jobs/delete/bulk")
+async def delete_jobs_bulk(request: BulkDeleteRequest, current_user: UserOut = Depends(get_current_user)):
+    """
+    Delete many saved jobs with one DELETE. Jobs the user has not saved are
+    reported as not_found.
+    """
+    try:
+        job_ids = unique_job_items(request.job_ids)
+        params = {"user_id": str(current_user.id)}
+
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+
+        saved = select_job_ids(
+            cur, "SELECT job_id FROM SAVED_JOBS WHERE user_id = %(user_id)s AND job_id IN ({ids})", job_ids, params
+        )
+        if saved:
+            delete_ids = sorted(saved)
+            placeholders = ", ".join(f"%(id_{i})s" for i in range(len(delete_ids)))
+            params.update({f"id_{i}": job_id for i, job_id in enumerate(delete_ids)})
+            cur.execute(
+                f"DELETE FROM SAVED_JOBS WHERE user_id = %(user_id)s AND job_id IN ({placeholders})",
+                params,
+            )
+            conn.commit()
+            refresh_saved_jobs_cache(cur, params["user_id"], delete_ids)
+
+        return bulk_results(job_ids, saved, "deleted")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting jobs: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+import fitz 
+
+# PDF extraction limits and process pool sizing (0 workers extracts in-process)
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(MAX_UPLOAD_SIZE)))
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", "2"))
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "8"))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv("PDF_EXTRACTION_TIMEOUT", "30"))
+pdf_executor: Optional[ProcessPoolExecutor] = None
+
+
+class PDFExtraction(TypedDict):
+    text: str
+    pages: List[Dict[str, Any]]      # {"page", "text", "headings"}
+    sections: List[Dict[str, Any]]   # {"heading", "page", "text"}
+    page_count: int
+    truncated: bool
+    elapsed_ms: float
+
+
+def get_pdf_executor() -> Optional[ProcessPoolExecutor]:
+    global pdf_executor
+    if pdf_executor is None and PDF_EXTRACTION_WORKERS > 0:
+        pdf_executor = ProcessPoolExecutor(max_workers=PDF_EXTRACTION_WORKERS)
+    return pdf_executor
+
+
+def shutdown_pdf_executor():
+    if pdf_executor is not None:
+        pdf_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_page_range(pdf_content: bytes, start: int, stop: int) -> List[Dict[str, Any]]:
+    """
+    Worker: extract pages [start, stop) as lines annotated with font size and
+    weight, which the parent uses to detect headings.
+    """
+    pages = []
+    with fitz.open(stream=pdf_content, filetype="pdf") as doc:
+        for number in range(start, stop):
+            lines = []
+            for block in doc[number].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    lines.append({
+                        "text": "".join(span["text"] for span in spans).strip(),
+                        "size": round(max(span["size"] for span in spans), 1),
+                        "bold": all(span["flags"] & 16 for span in spans),
+                    })
+            pages.append({"page": number + 1, "lines": lines})
+    return pages
+
+
+def is_heading(line: Dict[str, Any], body_size: float) -> bool:
+    text = line["text"]
+    if len(text) > 80 or text.endswith((".", ",", ";")):
+        return False
+    return (
+        line["size"] >= body_size * 1.15
+        or line["bold"]
+        or (text.isupper() and len(text.split()) <= 6)
+    )
+
+
+def build_pdf_structure(raw_pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turn extracted lines into page text, per-page headings and heading-delimited
+    sections. The body font size is the size carrying the most characters.
+    """
+    size_weights = {}
+    for page in raw_pages:
+        for line in page["lines"]:
+            size_weights[line["size"]] = size_weights.get(line["size"], 0) + len(line["text"])
+    body_size = max(size_weights, key=size_weights.get) if size_weights else 0
+
+    pages, sections = [], []
+    current = {"heading": None, "page": 1, "lines": []}
+    for page in raw_pages:
+        headings = []
+        for line in page["lines"]:
+            if is_heading(line, body_size):
+                headings.append(line["text"])
+                if current["lines"] or current["heading"]:
+                    sections.append(current)
+                current = {"heading": line["text"], "page": page["page"], "lines": []}
+            else:
+                current["lines"].append(line["text"])
+        page_text = "\n".join(line["text"] for line in page["lines"])
+        pages.append({"page": page["page"], "text": page_text, "headings": headings})
+    if current["lines"] or current["heading"]:
+        sections.append(current)
+
+    return {
+        "text": "\n".join(page["text"] for page in pages),
+        "pages": pages,
+        "sections": [
+            {"heading": section["heading"], "page": section["page"], "text": "\n".join(section["lines"])}
+            for section in sections
+        ],
+    }
+
+
+def extract_pdf(pdf_content: bytes) -> PDFExtraction:
+    """
+    Extract text and structure from a PDF in the process pool. Large documents
+    are split into page ranges that are parsed in parallel. At most
+    MAX_PDF_PAGES pages are read; larger inputs than MAX_PDF_BYTES are refused.
+    """
+    started = time.perf_counter()
+    if len(pdf_content) > MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail="PDF exceeds the maximum size for text extraction.")
+    try:
+        with fitz.open(stream=pdf_content, filetype="pdf") as doc:
+            page_count = doc.page_count
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}")
+    pages_to_read = min(page_count, MAX_PDF_PAGES)
+
+    executor = get_pdf_executor()
+    futures = []
+    try:
+        if executor is None:
+            raw_pages = extract_page_range(pdf_content, 0, pages_to_read)
+        else:
+            if pages_to_read > PDF_PARALLEL_PAGE_THRESHOLD:
+                step = -(-pages_to_read // PDF_EXTRACTION_WORKERS)
+            else:
+                step = max(pages_to_read, 1)
+            futures = [
+                executor.submit(extract_page_range, pdf_content, start, min(start + step, pages_to_read))
+                for start in range(0, pages_to_read, step)
+            ]
+            # One deadline for the whole document, not per page range
+            deadline = time.monotonic() + PDF_EXTRACTION_TIMEOUT
+            raw_pages = [
+                page
+                for future in futures
+                for page in future.result(timeout=max(0, deadline - time.monotonic()))
+            ]
+    except FutureTimeoutError:
+        # Ranges that have not started are dropped; a range already running in
+        # a worker process cannot be interrupted and finishes on its own
+        for future in futures:
+            future.cancel()
+        raise HTTPException(status_code=504, detail="Timed out extracting text from PDF.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error extracting text from PDF: {str(e)}")
+
+    structure = build_pdf_structure(raw_pages)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Extracted {pages_to_read}/{page_count} PDF pages in {elapsed_ms} ms")
+    return PDFExtraction(
+        text=structure["text"],
+        pages=structure["pages"],
+        sections=structure["sections"],
+        page_count=page_count,
+        truncated=pages_to_read < page_count,
+        elapsed_ms=elapsed_ms,
+    )
+
+
+def extract_text_from_pdf(pdf_content: bytes) -> str:
+    return extract_pdf(pdf_content)["text"]
+
+# Shared HTTP client for document downloads (keep-alive pool, bounded timeouts)
+DOCUMENT_FETCH_TIMEOUT = float(os.getenv("DOCUMENT_FETCH_TIMEOUT", "15"))
+DOCUMENT_FETCH_RETRIES = int(os.getenv("DOCUMENT_FETCH_RETRIES", "2"))
+http_client: Optional[httpx.AsyncClient] = None
+
+# Last downloaded bytes per URL with their ETag, for conditional re-fetches
+document_etag_cache = LRUCache(maxsize=int(os.getenv("DOCUMENT_ETAG_CACHE_SIZE", "16")))
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(DOCUMENT_FETCH_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            transport=httpx.AsyncHTTPTransport(retries=DOCUMENT_FETCH_RETRIES),
+        )
+    return http_client
+
+
+async def close_http_client():
+    if http_client is not None:
+        await http_client.aclose()
+
+
+async def fetch_document(url: str, label: str) -> bytes:
+    """
+    Download a document through the shared client. Unchanged files are
+    revalidated with If-None-Match and served from the local cache on 304;
+    timeouts and 5xx responses are retried with backoff.
+    """
+    cached = document_etag_cache.get(url)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    for attempt in range(DOCUMENT_FETCH_RETRIES + 1):
+        try:
+            response = await get_http_client().get(url, headers=headers)
+        except httpx.TransportError as e:
+            if attempt == DOCUMENT_FETCH_RETRIES:
+                raise HTTPException(status_code=504, detail=f"Timed out fetching {label}: {str(e)}")
+        else:
+            if response.status_code == 304 and cached:
+                return cached[1]
+            if response.status_code == 200:
+                etag = response.headers.get("ETag")
+                if etag:
+                    document_etag_cache.set(url, (etag, response.content))
+                return response.content
+            if response.status_code < 500 or attempt == DOCUMENT_FETCH_RETRIES:
+                raise HTTPException(status_code=500, detail=f"Failed to fetch {label} from the provided URL.")
+        await asyncio.sleep(0.25 * 2 ** attempt)
+
+
+def document_text_key(user_id, document_type: str, content_hash: str) -> str:
+    """
+    Sidecar object holding the extracted text of a content-addressed document.
+    """
+    return f"user-profiles/{user_id}/{document_type}/{content_hash}.json"
+
+
+def put_document_extraction(user_id, document_type: str, content_hash: str, extraction: Dict[str, Any]):
+    document_extraction_cache.set((str(user_id), document_type, content_hash), extraction)
+    try:
+        s3_client.put_object(
+            Bucket=AWS_S3_BUCKET_NAME,
+            Key=document_text_key(user_id, document_type, content_hash),
+            Body=json.dumps(extraction).encode("utf-8"),
+            ContentType="application/json",
+        )
+    except Exception as e:
+        # The sidecar is an optimization; it is rebuilt on the next cache miss
+        print(f"Error storing extracted text for {document_type}: {str(e)}")
+
+
+async def store_upload_text(user_id, document_type: str, content_hash: str, upload: UploadFile):
+    """
+    Extract text from a freshly uploaded document and store its sidecar.
+    """
+    def extract():
+        upload.file.seek(0)
+        content = upload.file.read()
+        upload.file.seek(0)
+        return extract_pdf(content)
+
+    try:
+        extraction = await run_in_threadpool(extract)
+    except HTTPException as e:
+        print(f"Skipping text extraction for {document_type}: {e.detail}")
+        return
+    await run_in_threadpool(put_document_extraction, user_id, document_type, content_hash, extraction)
+
+
+def store_s3_document_text(user_id, document_type: str, content_hash: str):
+    """
+    Queued task: extract text from a document uploaded directly to S3.
+    Errors propagate so the task queue can retry.
+    """
+    body = s3_client.get_object(
+        Bucket=AWS_S3_BUCKET_NAME, Key=document_key(user_id, document_type, content_hash)
+    )["Body"].read()
+    put_document_extraction(user_id, document_type, content_hash, extract_pdf(body))
+    return {"document_type": document_type, "content_hash": content_hash}
+
+
+def load_document_extraction_sidecar(user_id, document_type: str, content_hash: str) -> Optional[Dict[str, Any]]:
+    try:
+        sidecar = s3_client.get_object(
+            Bucket=AWS_S3_BUCKET_NAME, Key=document_text_key(user_id, document_type, content_hash)
+        )
+        return json.loads(sidecar["Body"].read())
+    except ClientError:
+        return None
+
+
+async def get_document_extraction(user: UserOut, document_type: str) -> Dict[str, Any]:
+    """
+    Resolve a document's extracted text and structure: in-process LRU, then
+    the S3 sidecar, and only then download and parse the PDF (writing the
+    sidecar for next time).
+    """
+    link = getattr(user, DOCUMENT_LINK_COLUMNS[document_type])
+    content_hash = getattr(user, DOCUMENT_HASH_COLUMNS[document_type])
+    label = document_type.replace("_", " ")
+    if not link:
+        raise HTTPException(status_code=400, detail=f"No {label} found.")
+
+    # Documents uploaded before content addressing are versioned by their link
+    cache_key = (str(user.id), document_type, content_hash or link)
+    extraction = document_extraction_cache.get(cache_key)
+    if extraction is not None:
+        return extraction
+
+    if content_hash:
+        extraction = await run_in_threadpool(load_document_extraction_sidecar, user.id, document_type, content_hash)
+        if extraction is not None:
+            document_extraction_cache.set(cache_key, extraction)
+            return extraction
+
+    content = await fetch_document(link, label)
+    extraction = await run_in_threadpool(extract_pdf, content)
+    if content_hash:
+        await run_in_threadpool(put_document_extraction, user.id, document_type, content_hash, extraction)
+    else:
+        document_extraction_cache.set(cache_key, extraction)
+    return extraction
+
+
+async def get_document_text(user: UserOut, document_type: str) -> str:
+    return (await get_document_extraction(user, document_type))["text"]
+
+
+# Token budgets for the prompt context. Documents and descriptions that fit are
+# sent whole; longer ones are cut into chunks and the chunks that best match the
+# job highlights (or the question) are kept, in their original order.
+FEEDBACK_RESUME_TOKENS = int(os.getenv("FEEDBACK_RESUME_TOKENS", "1200"))
+FEEDBACK_COVER_LETTER_TOKENS = int(os.getenv("FEEDBACK_COVER_LETTER_TOKENS", "600"))
+FEEDBACK_DESCRIPTION_TOKENS = int(os.getenv("FEEDBACK_DESCRIPTION_TOKENS", "800"))
+FEEDBACK_HIGHLIGHTS_TOKENS = int(os.getenv("FEEDBACK_HIGHLIGHTS_TOKENS", "400"))
+CHAT_DOCUMENT_TOKENS = int(os.getenv("CHAT_DOCUMENT_TOKENS", "1500"))
+CONTEXT_CHUNK_TOKENS = int(os.getenv("CONTEXT_CHUNK_TOKENS", "200"))
+
+CONTEXT_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+    "or", "our", "the", "to", "we", "will", "with", "you", "your", "this", "that", "have", "has",
+}
+
+
+@lru_cache(maxsize=1)
+def get_token_encoder():
+    """
+    tiktoken encoder for LLM_MODEL, or None when tiktoken or its encoding
+    files are unavailable (token counts are then estimated).
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(LLM_MODEL)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"Token encoder unavailable, estimating token counts: {str(e)}")
+            return None
+
+
+def count_tokens(text: str) -> int:
+    encoder = get_token_encoder()
+    if encoder is None:
+        return -(-len(text) // 4)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    encoder = get_token_encoder()
+    if encoder is None:
+        return text[: budget * 4]
+    tokens = encoder.encode(text, disallowed_special=())
+    return text if len(tokens) <= budget else encoder.decode(tokens[:budget])
+
+
+def context_terms(text: str) -> List[str]:
+    return [
+        term for term in re.findall(r"[a-z0-9][a-z0-9+#.\-]*", text.lower())
+        if len(term) > 1 and term not in CONTEXT_STOPWORDS
+    ]
+
+
+def token_windows(text: str, size: int) -> List[str]:
+    """Consecutive pieces of text of at most `size` tokens each"""
+    encoder = get_token_encoder()
+    if encoder is None:
+        return [text[i:i + size * 4] for i in range(0, len(text), size * 4)]
+    tokens = encoder.encode(text, disallowed_special=())
+    return [encoder.decode(tokens[i:i + size]) for i in range(0, len(tokens), size)]
+
+
+def chunk_pieces(line: str) -> List[str]:
+    """
+    A line as pieces of at most CONTEXT_CHUNK_TOKENS: whole when it fits,
+    else by sentence, and sentences still too long by token window.
+    """
+    if count_tokens(line) <= CONTEXT_CHUNK_TOKENS:
+        return [line]
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?;])\s+", line):
+        if count_tokens(sentence) <= CONTEXT_CHUNK_TOKENS:
+            pieces.append(sentence)
+        else:
+            pieces.extend(token_windows(sentence, CONTEXT_CHUNK_TOKENS))
+    return pieces
+
+
+def split_text_chunks(text: str, heading: Optional[str] = None) -> List[str]:
+    """
+    Split text into paragraph-aligned chunks of at most CONTEXT_CHUNK_TOKENS,
+    each prefixed with the section heading when there is one. Paragraphs
+    longer than that (SerpAPI descriptions are often one line) are split
+    by sentence.
+    """
+    prefix = f"{heading}\n" if heading else ""
+    chunks, current, current_tokens = [], "", 0
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        # Pieces of one paragraph are joined with spaces, paragraphs with newlines
+        for i, piece in enumerate(chunk_pieces(line)):
+            piece_tokens = count_tokens(piece)
+            if current and current_tokens + piece_tokens > CONTEXT_CHUNK_TOKENS:
+                chunks.append(prefix + current)
+                current, current_tokens = "", 0
+            if current:
+                current += " " if i else "\n"
+            current += piece
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(prefix + current)
+    return chunks
+
+
+def document_chunks(extraction: Dict[str, Any]) -> List[str]:
+    sections = extraction.get("sections") or []
+    if not sections:
+        return split_text_chunks(extraction.get("text", ""))
+    chunks = []
+    for section in sections:
+        chunks.extend(split_text_chunks(section["text"], section["heading"]) or [section["heading"] or ""])
+    return [chunk for chunk in chunks if chunk]
+
+
+def select_context(full_text: str, chunks: List[str], query: str, budget: int) -> str:
+    """
+    Fit `chunks` into `budget` tokens, preferring those sharing the most
+    (IDF-weighted) terms with `query`. Returns `full_text` when it already fits.
+    """
+    if count_tokens(full_text) <= budget:
+        return full_text
+
+    chunk_terms = [set(context_terms(chunk)) for chunk in chunks]
+    query_terms = set(context_terms(query))
+    document_frequency = {term: sum(term in terms for terms in chunk_terms) for term in query_terms}
+    n = len(chunks)
+
+    def score(i: int) -> float:
+        overlap = query_terms & chunk_terms[i]
+        weight = sum(math.log(1 + n / document_frequency[term]) for term in overlap)
+        return weight / math.sqrt(len(chunk_terms[i]) or 1)
+
+    # Rank by relevance; ties keep document order so leading sections win
+    ranked = sorted(range(n), key=lambda i: (-score(i), i))
+    selected, used = [], 0
+    for i in ranked:
+        tokens = count_tokens(chunks[i])
+        if used + tokens <= budget:
+            selected.append(i)
+            used += tokens
+    if not selected:
+        # Never drop the text altogether: keep as much of the best chunk as fits
+        return truncate_to_tokens(chunks[ranked[0]] if chunks else full_text, budget)
+    return "\n\n".join(chunks[i] for i in sorted(selected))
+
+
+def build_feedback_context(
+    resume: Dict[str, Any], cover_letter: Dict[str, Any], description: str, highlights: str
+) -> Dict[str, str]:
+    """
+    Prompt variables for FEEDBACK_PROMPT, each cut to its token budget.
+    """
+    description = description or ""
+    highlights = truncate_to_tokens(highlights or "", FEEDBACK_HIGHLIGHTS_TOKENS)
+    query = highlights or description
+    return {
+        "job_description": select_context(
+            description, split_text_chunks(description), highlights, FEEDBACK_DESCRIPTION_TOKENS
+        ),
+        "job_highlights": highlights,
+        "resume_text": select_context(resume["text"], document_chunks(resume), query, FEEDBACK_RESUME_TOKENS),
+        "cover_letter_text": select_context(
+            cover_letter["text"], document_chunks(cover_letter), query, FEEDBACK_COVER_LETTER_TOKENS
+        ),
+    }
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    """
+    Format a server-sent event. Data is JSON-encoded so newlines survive.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def stream_llm_events(chat_llm: ChatOpenAI, prompt: str, on_complete=None) -> AsyncIterator[str]:
+    """
+    Forward completion tokens as SSE `data` events, then a `done` event.
+    Errors after the stream has started are reported as an `error` event.
+    `on_complete` receives the full text once the stream finishes.
+    """
+    try:
+        chunks = []
+        async for chunk in chat_llm.astream(prompt):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield sse_event(chunk.content)
+        if on_complete is not None:
+            await on_complete("".join(chunks))
+        yield sse_event("", event="done")
+    except Exception as e:
+        yield sse_event(f"Unexpected error: {str(e)}", event="error")
+
+
+class LimitedStreamingResponse(StreamingResponse):
+    """
+    Stream holding an already-acquired limiter slot. The slot is released
+    exactly once when sending ends, however it ends: completed, failed, or
+    the client gone before the body (and so the generator) was started.
+    """
+
+    def __init__(self, content, limiter: ConcurrencyLimiter, **kwargs):
+        super().__init__(content, **kwargs)
+        self.limiter = limiter
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.limiter.release()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+def sse_response(events: AsyncIterator[str], limiter: Optional[ConcurrencyLimiter] = None) -> StreamingResponse:
+    """Server-sent events response; `limiter` is the slot the stream holds, if any"""
+    kwargs = {"media_type": "text/event-stream", "headers": {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}}
+    if limiter is None:
+        return StreamingResponse(events, **kwargs)
+    return LimitedStreamingResponse(events, limiter, **kwargs)
+
+
+# Prompt templates are built once and formatted per request
+FEEDBACK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert career advisor."),
+    ("user", """
+        Job Description:
+        {job_description}
+
+        Job Highlights:
+        {job_highlights}
+
+        Candidate's Resume:
+        {resume_text}
+
+        Candidate's Cover Letter:
+        {cover_letter_text}
+
+        Instructions:
+        - Validate the document type before providing feedback:
+            - If the content is not a resume or cover letter, respond with: "The provided content is not relevant for resume or cover letter feedback. Please provide relevant documents."
+        - Provide detailed feedback on the resume and cover letter separately if valid:
+            - For the resume:
+                - Assess how well it aligns with the job description and highlights.
+                Example: "The resume lists project management experience, which aligns well with the job requirement for managing cross-functional teams. However, it lacks specific details about the size or scope of projects managed. Include quantifiable metrics like team size or budget managed to strengthen alignment."
+                - Provide specific suggestions for improvement, such as tailoring skills, optimizing keywords, or restructuring sections for clarity.
+                Example: "The 'Skills' section could include keywords directly from the job description, such as 'Agile methodology' or 'data-driven decision making.'"
+                - Highlight any missing sections or areas for enhancement (e.g., education, work experience, or technical skills).
+                Example: "The resume does not include a 'Technical Skills' section, which is crucial for this role. Add a section highlighting your proficiency with tools like Jira, Tableau, or SQL."
+                - Provide a relevance score (0-100) indicating how well the resume matches the job requirements.
+                Example: "Relevance Score: 85/100. The resume aligns well overall but could benefit from more tailored keywords and quantifiable achievements."
+            - For the cover letter:
+                - Evaluate its tone, structure, and alignment with the job description and highlights.
+                Example: "The tone of the cover letter is professional but lacks enthusiasm for the specific role. Adding a sentence about why you are excited about this company's mission would improve it."
+                - Suggest ways to make the cover letter more compelling and tailored, such as emphasizing achievements or customizing the tone to the company culture.
+                Example: "Mention your success in reducing project timelines by 20% in your last role to demonstrate your ability to meet the job's emphasis on efficiency."
+                - Highlight areas where it lacks personalization or fails to address key job requirements.
+                Example: "The cover letter is generic and does not mention the company's recent product launch, which is a key highlight. Include a sentence demonstrating your knowledge of this and how your skills can contribute to its success."
+            - If either the resume or cover letter has insufficient content or is overly generic, provide constructive feedback to address this.
+                Example: "The resume provides only a list of job titles without describing responsibilities or achievements. Include bullet points that explain your impact in each role."
+
+        Focus on actionable feedback that helps the candidate improve alignment with the job.
+    """),
+])
+
+CHAT_FEEDBACK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a career coach specializing in job applications."),
+    ("user", """
+        Job Description:
+        {job_description}
+
+        Job Highlights:
+        {job_highlights}
+
+        Selected Document Content:
+        {document_text}
+
+        Question:
+        {question}
+
+        Instructions:
+        - If the document content is a resume:
+            - Provide detailed suggestions and improvements based on the alignment with the job description and highlights.
+            - Highlight specific areas that can be improved, such as tailoring skills, optimizing keywords, or structuring the resume for clarity and relevance.
+            - Provide a relevance score (0-100) indicating how well the resume matches the job requirements, based on factors like skills, experience, and alignment with job highlights.
+        - If the document content is a cover letter:
+            - Provide detailed suggestions and improvements based on how well it aligns with the job description and highlights.
+            - Suggest ways to make the cover letter more compelling and tailored, such as emphasizing achievements or aligning the tone with the company culture.
+        - If the document content is irrelevant (not a resume or cover letter):
+            - Respond with: "The provided content is not relevant for resume or cover letter feedback. Please provide relevant documents."
+        - If the user asks anything irrelevant (not related to job applications, resumes, or cover letters):
+            - Respond with: "The question is not related to job applications, resumes, or cover letters. I can only assist with these topics."
+        - Address edge cases such as:
+            - Missing key sections in the resume (e.g., education, work experience).
+            - Overly generic cover letters that lack customization.
+            - Documents with insufficient content for evaluation.
+        - Focus feedback specifically on how the document content can better align with the job requirements and make a stronger impact.
+
+        Provide your response accordingly.
+    """),
+])
+
+# Bump whenever the feedback prompt changes so cached feedback is not reused
+FEEDBACK_PROMPT_VERSION = "2"
+
+# Generated feedback keyed by feedback_cache_key()
+feedback_cache = LRUCache(
+    maxsize=int(os.getenv("FEEDBACK_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("FEEDBACK_CACHE_TTL_SECONDS", str(24 * 3600))),
+)
+
+
+def feedback_cache_key(context: Dict[str, str]) -> str:
+    """
+    Hash of everything that determines the feedback: the prompt context built
+    from both documents, the job description and highlights, and the prompt version.
+    """
+    digest = hashlib.sha256(FEEDBACK_PROMPT_VERSION.encode())
+    for part in ("resume_text", "cover_letter_text", "job_description", "job_highlights"):
+        digest.update(hashlib.sha256((context[part] or "").encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def load_persisted_feedback(user_id, job_id: str, cache_key: str) -> Optional[str]:
+    """
+    Feedback saved next to the job row, if it was generated from the same inputs.
+    """
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT feedback, feedback_key FROM SAVED_JOBS WHERE user_id = %(user_id)s AND job_id = %(job_id)s",
+            {"user_id": str(user_id), "job_id": job_id},
+        )
+        row = cur.fetchone()
+        if row and row[0] and row[1] == cache_key:
+            return row[0]
+        return None
+    except Exception as e:
+        print(f"Error loading persisted feedback: {str(e)}")
+        return None
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+def persist_feedback_batch(user_id, rows: List[tuple]):
+    """
+    Store generated feedback and its cache key on the saved job rows with a
+    single MERGE. `rows` holds (job_id, feedback, cache_key) tuples.
+    """
+    if not rows:
+        return
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        values, params = values_clause(rows)
+        params["user_id"] = str(user_id)
+        cur.execute(
+            f"""
+            MERGE INTO SAVED_JOBS AS target
+            USING (
+                SELECT column1 AS job_id, column2 AS feedback, column3 AS feedback_key
+                FROM {values}
+            ) AS source
+            ON target.user_id = %(user_id)s AND target.job_id = source.job_id
+            WHEN MATCHED THEN UPDATE SET
+                feedback = source.feedback,
+                feedback_key = source.feedback_key,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            params,
+        )
+        conn.commit()
+        refresh_saved_jobs_cache(cur, user_id, [row[0] for row in rows])
+    except Exception as e:
+        print(f"Error persisting feedback: {str(e)}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+def persist_feedback(user_id, job_id: str, cache_key: str, feedback: str):
+    """
+    Store generated feedback and its cache key on the saved job row.
+    """
+    persist_feedback_batch(user_id, [(job_id, feedback, cache_key)])
+
+
+async def cached_sse_events(feedback: str) -> AsyncIterator[str]:
+    yield sse_event(feedback)
+    yield sse_event("", event="done")
+
+
+def validate_feedback_documents(user: UserOut):
+    if not user.resume_link or not user.cover_letter_link:
+        raise HTTPException(status_code=400, detail="Resume or cover letter not found.")
+
+
+async def resolve_feedback(user: UserOut, job_id: str, description: str, highlights: str, regenerate: bool):
+    """
+    Return (cache_key, cached feedback or None, prompt) for one job.
+    """
+    # Text is extracted at upload time; this is normally a cache lookup
+    resume, cover_letter = await asyncio.gather(
+        get_document_extraction(user, "resume"),
+        get_document_extraction(user, "cover_letter"),
+    )
+
+    context = build_feedback_context(resume, cover_letter, description, highlights)
+    cache_key = feedback_cache_key(context)
+    if not regenerate:
+        feedback = feedback_cache.get(cache_key)
+        if feedback is None:
+            feedback = await run_in_threadpool(load_persisted_feedback, user.id, job_id, cache_key)
+            if feedback is not None:
+                feedback_cache.set(cache_key, feedback)
+        if feedback is not None:
+            return cache_key, feedback, None
+
+    return cache_key, None, FEEDBACK_PROMPT.format(**context)
+
+
+async def store_feedback(user_id, job_id: str, cache_key: str, feedback: str, persist: bool):
+    feedback_cache.set(cache_key, feedback)
+    if persist:
+        await run_in_threadpool(persist_feedback, user_id, job_id, cache_key, feedback)
+
+
+async def compute_feedback(
+    user: UserOut, job_id: str, description: str, highlights: str, regenerate: bool = False, persist: bool = False
+) -> Dict[str, Any]:
+    """
+    Queued task: feedback for one job, from cache when possible.
+    """
+    cache_key, feedback, prompt = await resolve_feedback(user, job_id, description, highlights, regenerate)
+    if feedback is not None:
+        return {"feedback": feedback, "cached": True}
+    response = await feedback_llm.ainvoke(prompt)
+    await store_feedback(user.id, job_id, cache_key, response.content, persist)
+    return {"feedback": response.content, "cached": False}
+
+
+@app.post("/feedback")
+async def generate_feedback(
+    job_id: str,
+    description: str,
+    highlights: str,
+    stream: bool = False,
+    regenerate: bool = False,
+    persist: bool = False,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Generate detailed feedback for the user's resume and cover letter based on the job description and highlights.
+    With `stream=true` the feedback is sent as server-sent events while it is generated.
+    Feedback is cached by the hashes of its inputs; `regenerate=true` bypasses the cache
+    and `persist=true` also stores the result on the saved job row.
+    """
+    try:
+        validate_feedback_documents(current_user)
+        cache_key, feedback, prompt = await resolve_feedback(current_user, job_id, description, highlights, regenerate)
+        if feedback is not None:
+            if stream:
+                return sse_response(cached_sse_events(feedback))
+            return {"feedback": feedback, "cached": True}
+
+        async def store(feedback: str):
+            await store_feedback(current_user.id, job_id, cache_key, feedback, persist)
+
+        if stream:
+            await feedback_limiter.acquire()
+            return sse_response(stream_llm_events(feedback_llm, prompt, on_complete=store), feedback_limiter)
+        async with feedback_limiter:
+            response = await feedback_llm.ainvoke(prompt)
+        await store(response.content)
+
+        return {"feedback": response.content, "cached": False}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+    
+
+def validate_chat_document(user: UserOut, document_type: str):
+    if document_type not in DOCUMENT_LINK_COLUMNS:
+        raise HTTPException(status_code=400, detail="Invalid document type.")
+
+    if not getattr(user, DOCUMENT_LINK_COLUMNS[document_type]):
+        raise HTTPException(status_code=400, detail="Selected document not found.")
+
+
+async def build_chat_feedback_prompt(
+    user: UserOut, document_type: str, question: str, description: str, highlights: str
+) -> str:
+    document = await get_document_extraction(user, document_type)
+    highlights = truncate_to_tokens(highlights or "", FEEDBACK_HIGHLIGHTS_TOKENS)
+
+    # Prepare context for the LLM, keeping the parts relevant to the question
+    context = {
+        "job_description": select_context(
+            description, split_text_chunks(description), f"{question} {highlights}", FEEDBACK_DESCRIPTION_TOKENS
+        ),
+        "job_highlights": highlights,
+        "document_text": select_context(
+            document["text"], document_chunks(document), f"{question} {highlights}", CHAT_DOCUMENT_TOKENS
+        ),
+        "question": question,
+    }
+    return CHAT_FEEDBACK_PROMPT.format(**context)
+
+
+async def compute_chat_feedback(
+    user: UserOut, document_type: str, question: str, description: str, highlights: str
+) -> Dict[str, Any]:
+    """
+    Queued task: answer one question about a document.
+    """
+    prompt = await build_chat_feedback_prompt(user, document_type, question, description, highlights)
+    response = await feedback_llm.ainvoke(prompt)
+    return {"response": response.content}
+
+
+@app.post("/chat-feedback")
+async def chat_feedback(
+    document_type: str = Form(..., description="Type of document (resume or cover letter)"),
+    question: str = Form(..., description="User's specific question"),
+    description: str = Form(..., description="Job description for context"),
+    highlights: str = Form(..., description="Job highlights for context"),
+    stream: bool = Form(False, description="Stream the answer as server-sent events"),
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Generate feedback for a specific question based on the user's selected document.
+    """
+    try:
+        validate_chat_document(current_user, document_type)
+        prompt = await build_chat_feedback_prompt(current_user, document_type, question, description, highlights)
+
+        # Generate response using the shared LLM client
+        if stream:
+            await chat_feedback_limiter.acquire()
+            return sse_response(stream_llm_events(feedback_llm, prompt), chat_feedback_limiter)
+        async with chat_feedback_limiter:
+            response = await feedback_llm.ainvoke(prompt)
+
+        return {"response": response.content}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def document_fingerprint(user: UserOut, document_type: str) -> str:
+    """
+    Content hash of a stored document, or its link for legacy uploads.
+    """
+    return getattr(user, DOCUMENT_HASH_COLUMNS[document_type]) or getattr(user, DOCUMENT_LINK_COLUMNS[document_type]) or ""
+
+
+def task_view(task: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in task.items() if key != "user_id"}
+
+
+def get_user_task(task_id: str, user: UserOut) -> Dict[str, Any]:
+    task = task_queue.tasks.get(task_id)
+    if task is None or task["user_id"] != str(user.id):
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return task
+
+
+@app.post("/tasks/feedback", status_code=202)
+async def submit_feedback_task(
+    job_id: str,
+    description: str,
+    highlights: str,
+    regenerate: bool = False,
+    persist: bool = False,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Queue feedback generation and return a task id to poll or stream.
+    Identical requests share one task.
+    """
+    validate_feedback_documents(current_user)
+    dedup_key = task_input_hash(
+        "feedback", current_user.id, job_id, description, highlights, persist,
+        document_fingerprint(current_user, "resume"), document_fingerprint(current_user, "cover_letter"),
+    )
+    task = task_queue.submit(
+        "feedback", current_user.id,
+        compute_feedback, current_user, job_id, description, highlights, regenerate, persist,
+        dedup_key=dedup_key, reuse_completed=not regenerate,
+    )
+    return task_view(task)
+
+
+@app.post("/tasks/chat-feedback", status_code=202)
+async def submit_chat_feedback_task(
+    document_type: str = Form(..., description="Type of document (resume or cover letter)"),
+    question: str = Form(..., description="User's specific question"),
+    description: str = Form(..., description="Job description for context"),
+    highlights: str = Form(..., description="Job highlights for context"),
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Queue a chat answer and return a task id to poll or stream.
+    """
+    validate_chat_document(current_user, document_type)
+    dedup_key = task_input_hash(
+        "chat_feedback", current_user.id, document_type, question, description, highlights,
+        document_fingerprint(current_user, document_type),
+    )
+    task = task_queue.submit(
+        "chat_feedback", current_user.id,
+        compute_chat_feedback, current_user, document_type, question, description, highlights,
+        dedup_key=dedup_key,
+    )
+    return task_view(task)
+
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str, current_user: UserOut = Depends(get_current_user)):
+    """
+    Status of a queued task, with its result once completed.
+    """
+    return task_view(get_user_task(task_id, current_user))
+
+
+@app.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str, current_user: UserOut = Depends(get_current_user)):
+    """
+    Server-sent `status` events whenever the task changes, then `done`.
+    """
+    task = get_user_task(task_id, current_user)
+
+    async def events() -> AsyncIterator[str]:
+        last_seen = None
+        while True:
+            finished = await task_queue.wait(task_id, timeout=1.0)
+            view = task_view(task)
+            if view != last_seen:
+                last_seen = view
+                yield f"event: status\ndata: {json.dumps(view)}\n\n"
+            if finished or task["status"] in ("completed", "failed"):
+                yield sse_event("", event="done")
+                return
+
+    return sse_response(events())
+
+
+CHAT_SESSION_DOCUMENT_TOKENS = int(os.getenv("CHAT_SESSION_DOCUMENT_TOKENS", "800"))
+CHAT_SESSION_DESCRIPTION_TOKENS = int(os.getenv("CHAT_SESSION_DESCRIPTION_TOKENS", "400"))
+CHAT_SESSION_EXCERPT_TOKENS = int(os.getenv("CHAT_SESSION_EXCERPT_TOKENS", "300"))
+CHAT_SESSION_RECENT_TURNS = int(os.getenv("CHAT_SESSION_RECENT_TURNS", "2"))
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+
+# Chat sessions keyed by session id; each question refreshes the TTL
+chat_sessions = LRUCache(
+    maxsize=int(os.getenv("CHAT_SESSION_CACHE_SIZE", "1000")),
+    ttl=CHAT_SESSION_TTL_SECONDS,
+)
+
+CHAT_SESSION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a career coach specializing in job applications.
+
+Job Description:
+{job_description}
+
+Job Highlights:
+{job_highlights}
+
+Selected Document ({document_type}):
+{document_text}
+
+Answer the user's questions about how this document can better align with the job.
+If the document is not a resume or cover letter, or the question is unrelated to job
+applications, resumes or cover letters, say so briefly instead of answering."""),
+    ("user", """Conversation summary:
+{summary}
+
+Recent exchanges:
+{recent}
+
+Additional document excerpts:
+{excerpts}
+
+Question:
+{question}"""),
+])
+
+CHAT_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You maintain a running summary of a career coaching conversation. "
+               "Keep the advice already given and any open questions, in under 150 words."),
+    ("user", "Current summary:\n{summary}\n\nNew exchanges:\n{exchanges}"),
+])
+
+
+class ChatSessionRequest(BaseModel):
+    document_type: str
+    description: str
+    highlights: str
+
+
+class ChatMessageRequest(BaseModel):
+    question: str
+    stream: bool = False
+
+
+def format_turns(turns: List[Dict[str, str]]) -> str:
+    return "\n\n".join(f"Q: {turn['question']}\nA: {turn['answer']}" for turn in turns) or "None"
+
+
+def get_user_chat_session(session_id: str, user: UserOut) -> Dict[str, Any]:
+    session = chat_sessions.get(session_id)
+    if session is None or session["user_id"] != str(user.id):
+        raise HTTPException(status_code=404, detail="Chat session not found or expired.")
+    return session
+
+
+def chat_session_view(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "session_id": session["session_id"],
+        "document_type": session["document_type"],
+        "turns": session["turns"],
+        "summary": session["summary"],
+        "created_at": session["created_at"],
+        "expires_in": CHAT_SESSION_TTL_SECONDS,
+    }
+
+
+def chat_session_prompt(session: Dict[str, Any], question: str) -> str:
+    """
+    The cached session context plus the rolling summary, the latest turns and
+    excerpts relevant to this question that the condensed document left out.
+    """
+    context = session["context"]
+    remaining = [chunk for chunk in session["chunks"] if chunk not in context["document_text"]]
+    excerpts = select_context("\n\n".join(remaining), remaining, question, CHAT_SESSION_EXCERPT_TOKENS) if remaining else ""
+    return CHAT_SESSION_PROMPT.format(
+        **context,
+        summary=session["summary"] or "None",
+        recent=format_turns(session["recent"]),
+        excerpts=excerpts or "None",
+        question=question,
+    )
+
+
+async def summarize_chat_session(session: Dict[str, Any]):
+    """
+    Queued task: fold turns older than CHAT_SESSION_RECENT_TURNS into the
+    rolling summary. Turns stay in `recent` until the summary includes them.
+    """
+    folded = session["recent"][:-CHAT_SESSION_RECENT_TURNS]
+    if not folded:
+        return
+    response = await llm.ainvoke(CHAT_SUMMARY_PROMPT.format(
+        summary=session["summary"] or "None", exchanges=format_turns(folded)
+    ))
+    session["summary"] = response.content
+    del session["recent"][:len(folded)]
+
+
+async def update_chat_session(session: Dict[str, Any], question: str, answer: str):
+    """
+    Record a turn and, off the request path, summarize older turns.
+    """
+    session["recent"].append({"question": question, "answer": answer})
+    session["turns"] += 1
+    chat_sessions.set(session["session_id"], session)
+    if len(session["recent"]) > CHAT_SESSION_RECENT_TURNS:
+        task_queue.submit(
+            "chat_summary", session["user_id"], summarize_chat_session, session,
+            dedup_key=task_input_hash("chat_summary", session["session_id"]), reuse_completed=False,
+        )
+
+
+@app.post("/chat/sessions", status_code=201)
+async def create_chat_session(
+    session_request: ChatSessionRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Start a chat about one document and job. The condensed document and job
+    context is built once here and reused for every question in the session.
+    """
+    try:
+        validate_chat_document(current_user, session_request.document_type)
+        document = await get_document_extraction(current_user, session_request.document_type)
+        highlights = truncate_to_tokens(session_request.highlights or "", FEEDBACK_HIGHLIGHTS_TOKENS)
+        query = highlights or session_request.description
+        chunks = document_chunks(document)
+
+        session_id = str(uuid4())
+        session = {
+            "session_id": session_id,
+            "user_id": str(current_user.id),
+            "document_type": session_request.document_type,
+            "context": {
+                "job_description": select_context(
+                    session_request.description, split_text_chunks(session_request.description),
+                    query, CHAT_SESSION_DESCRIPTION_TOKENS,
+                ),
+                "job_highlights": highlights,
+                "document_type": session_request.document_type.replace("_", " "),
+                "document_text": select_context(document["text"], chunks, query, CHAT_SESSION_DOCUMENT_TOKENS),
+            },
+            "chunks": chunks,
+            "summary": "",
+            "recent": [],
+            "turns": 0,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        chat_sessions.set(session_id, session)
+        return chat_session_view(session)
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@app.get("/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str, current_user: UserOut = Depends(get_current_user)):
+    return chat_session_view(get_user_chat_session(session_id, current_user))
+
+
+@app.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str, current_user: UserOut = Depends(get_current_user)):
+    get_user_chat_session(session_id, current_user)
+    chat_sessions.pop(session_id)
+    return {"message": "Chat session deleted."}
+
+
+@app.post("/chat/sessions/{session_id}/messages")
+async def ask_chat_session(
+    session_id: str,
+    message: ChatMessageRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Ask a follow-up question. Only the question is sent; the session supplies
+    the cached context and the conversation so far.
+    """
+    try:
+        session = get_user_chat_session(session_id, current_user)
+        if not message.question.strip():
+            raise HTTPException(status_code=400, detail="Question must not be empty.")
+        prompt = chat_session_prompt(session, message.question)
+
+        async def record(answer: str):
+            await update_chat_session(session, message.question, answer)
+
+        if message.stream:
+            await chat_feedback_limiter.acquire()
+            return sse_response(stream_llm_events(feedback_llm, prompt, on_complete=record), chat_feedback_limiter)
+        async with chat_feedback_limiter:
+            response = await feedback_llm.ainvoke(prompt)
+        await record(response.content)
+
+        return {"response": response.content, "turns": session["turns"]}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+class SaveFeedbackRequest(BaseModel):
+    job_id: str
+    feedback: str
+
+@app.post("/jobs/save-feedback")
+async def save_feedback(
+    feedback_request: SaveFeedbackRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Save feedback to the logged-in user's saved jobs table.
+    """
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+
+        # Update the feedback for the specific job. The text may have been
+        # edited, so it no longer counts as the generated feedback for any inputs.
+        update_query = """
+        UPDATE SAVED_JOBS
+        SET feedback = %(feedback)s, feedback_key = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = %(user_id)s AND job_id = %(job_id)s
+        """
         params = {
+            "user_id": str(current_user.id),
             "job_id": feedback_request.job_id,
             "feedback": feedback_request.feedback,
         }
         cur.execute(update_query, params)
         conn.commit()
+        refresh_saved_jobs_cache(cur, current_user.id, [feedback_request.job_id])
 
         return {"message": "Feedback saved successfully."}
 
@@ -1180,6 +3459,174 @@ async def save_feedback(
         if "conn" in locals() and conn:
             conn.close()
 
+BULK_FEEDBACK_CONCURRENCY = int(os.getenv("BULK_FEEDBACK_CONCURRENCY", "4"))
+
+# Progress of bulk feedback runs, keyed by run id
+bulk_feedback_runs = LRUCache(
+    maxsize=int(os.getenv("BULK_FEEDBACK_RUNS_SIZE", "256")),
+    ttl=float(os.getenv("BULK_FEEDBACK_RUNS_TTL_SECONDS", "3600")),
+)
+
+
+class BulkFeedbackRequest(BaseModel):
+    job_ids: Optional[List[str]] = None  # All saved jobs when omitted
+
+
+def load_saved_jobs_for_feedback(user_id, job_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Saved jobs with the fields feedback is generated from, plus any persisted
+    feedback and the key it was generated with.
+    """
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        query = (
+            f"SELECT s.job_id, {listing_column('description')}, {listing_column('job_highlights')}, "
+            f"s.feedback, s.feedback_key FROM {SAVED_JOBS_SOURCE} WHERE s.user_id = %(user_id)s"
+        )
+        params = {"user_id": str(user_id)}
+        if job_ids:
+            placeholders = ", ".join(f"%(job_id_{i})s" for i in range(len(job_ids)))
+            query += f" AND s.job_id IN ({placeholders})"
+            params.update({f"job_id_{i}": job_id for i, job_id in enumerate(job_ids)})
+        cur.execute(query, params)
+        columns = [col[0].lower() for col in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+async def run_bulk_feedback(
+    run: Dict[str, Any],
+    user_id,
+    jobs: List[Dict[str, Any]],
+    resume: Dict[str, Any],
+    cover_letter: Dict[str, Any],
+):
+    """
+    Generate feedback for every job with at most BULK_FEEDBACK_CONCURRENCY LLM
+    calls in flight, then write all new feedback back in one batch.
+    """
+    semaphore = asyncio.Semaphore(BULK_FEEDBACK_CONCURRENCY)
+    generated = []
+    run.update({"status": "running", "completed": 0, "failed": 0, "cached": 0, "results": {}})
+
+    async def generate(job: Dict[str, Any]):
+        description = job.get("description") or ""
+        highlights = job.get("job_highlights") or ""
+        context = build_feedback_context(resume, cover_letter, description, highlights)
+        cache_key = feedback_cache_key(context)
+        try:
+            feedback = feedback_cache.get(cache_key)
+            if feedback is None and job.get("feedback") and job.get("feedback_key") == cache_key:
+                feedback = job["feedback"]
+                feedback_cache.set(cache_key, feedback)
+            if feedback is not None:
+                run["cached"] += 1
+            else:
+                async with semaphore:
+                    response = await feedback_llm.ainvoke(FEEDBACK_PROMPT.format(**context))
+                feedback = response.content
+                feedback_cache.set(cache_key, feedback)
+                generated.append((job["job_id"], feedback, cache_key))
+            run["results"][job["job_id"]] = {"status": "completed", "feedback": feedback}
+            run["completed"] += 1
+        except Exception as e:
+            run["results"][job["job_id"]] = {"status": "failed", "error": str(e)}
+            run["failed"] += 1
+
+    await asyncio.gather(*(generate(job) for job in jobs))
+    await run_in_threadpool(persist_feedback_batch, user_id, generated)
+    run["status"] = "completed"
+    run["finished_at"] = datetime.utcnow()
+    return {key: run[key] for key in ("total", "completed", "failed", "cached")}
+
+
+@app.post("/feedback/bulk", status_code=202)
+async def generate_bulk_feedback(
+    bulk_request: BulkFeedbackRequest,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Start generating feedback for all saved jobs, or the given subset.
+    Poll GET /feedback/bulk/{run_id} for progress and results.
+    """
+    try:
+        if not current_user.resume_link or not current_user.cover_letter_link:
+            raise HTTPException(status_code=400, detail="Resume or cover letter not found.")
+
+        jobs = await run_in_threadpool(load_saved_jobs_for_feedback, current_user.id, bulk_request.job_ids)
+        if not jobs:
+            raise HTTPException(status_code=404, detail="No saved jobs found.")
+
+        # Documents are resolved once and shared by every job in the run
+        resume, cover_letter = await asyncio.gather(
+            get_document_extraction(current_user, "resume"),
+            get_document_extraction(current_user, "cover_letter"),
+        )
+
+        run_id = str(uuid4())
+        run = {
+            "run_id": run_id,
+            "user_id": str(current_user.id),
+            "status": "queued",
+            "total": len(jobs),
+            "completed": 0,
+            "failed": 0,
+            "cached": 0,
+            "results": {},
+            "started_at": datetime.utcnow(),
+            "finished_at": None,
+        }
+        # A run already in flight for the same documents and jobs is reused
+        task = task_queue.submit(
+            "bulk_feedback", current_user.id,
+            run_bulk_feedback, run, current_user.id, jobs, resume, cover_letter,
+            dedup_key=task_input_hash(
+                "bulk_feedback", current_user.id,
+                document_fingerprint(current_user, "resume"), document_fingerprint(current_user, "cover_letter"),
+                *sorted(job["job_id"] for job in jobs),
+            ),
+            reuse_completed=False,
+            task_id=run_id,
+        )
+        if task["task_id"] == run_id:
+            bulk_feedback_runs.set(run_id, run)
+        else:
+            run = bulk_feedback_runs.get(task["task_id"]) or run
+
+        return {"run_id": task["task_id"], "task_id": task["task_id"], "status": run["status"], "total": run["total"]}
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@app.get("/feedback/bulk/{run_id}")
+async def get_bulk_feedback_progress(
+    run_id: str,
+    include_results: bool = True,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Progress of a bulk feedback run, with per-job results.
+    """
+    run = bulk_feedback_runs.get(run_id)
+    if run is None or run["user_id"] != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Bulk feedback run not found.")
+    progress = {key: value for key, value in run.items() if key not in ("user_id", "results")}
+    task = task_queue.tasks.get(run_id)
+    if task is not None and task["status"] == "failed":
+        progress.update({"status": "failed", "error": task["error"]})
+    if include_results:
+        progress["results"] = dict(run["results"])
+    return progress
+
+
 # Snowflake connection function
 def get_snowflake_joblistings_connection():
     try:
@@ -1194,26 +3641,125 @@ def get_snowflake_joblistings_connection():
     except ProgrammingError as e:
         raise HTTPException(status_code=500, detail=f"Snowflake connection error: {e}")
  
+# Sort orders for /jobs/listings. Each expression is never NULL so it can seed a keyset cursor.
+LISTING_SORT_KEYS = {
+    "posted_date": "COALESCE(TRY_TO_DATE(POSTED_DATE), '1970-01-01'::DATE)",
+    "salary": "COALESCE((SALARY_MIN + SALARY_MAX) / 2, 0)",
+    "company": "COALESCE(COMPANY, '')",
+    "title": "COALESCE(TITLE, '')",
+}
+# Tie-breakers that make the sort total; the Airflow load keeps one row per
+# (JOB_ID, SEARCH_QUERY), so keyset pages never skip or repeat a row
+LISTING_KEY_COLUMNS = ("JOB_ID", "COALESCE(SEARCH_QUERY, '')")
+MAX_LISTINGS_PAGE_SIZE = int(os.getenv("MAX_LISTINGS_PAGE_SIZE", "500"))
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+def keyset_condition(columns: List[str], descending: bool) -> str:
+    """
+    Rows strictly after the %(cursor_i)s values in the order of `columns`,
+    i.e. (c0, c1, ...) > (cursor_0, cursor_1, ...) spelled out for Snowflake.
+    """
+    op = "<" if descending else ">"
+    last = len(columns) - 1
+    condition = f"{columns[last]} {op} %(cursor_{last})s"
+    for i in range(last - 1, -1, -1):
+        condition = f"{columns[i]} {op} %(cursor_{i})s OR ({columns[i]} = %(cursor_{i})s AND ({condition}))"
+    return f"({condition})"
+
+
 @app.get("/jobs/listings", response_model=list)
-async def get_job_listings(current_user: UserOut = Depends(get_current_user)):
+async def get_job_listings(
+    skills: Optional[List[str]] = Query(None, description="Only listings requiring all of these skills"),
+    company: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    search_query: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    keyword: Optional[str] = Query(None, description="Case-insensitive match on title or description"),
+    min_salary: Optional[int] = Query(None, ge=0, description="Only listings paying at least this much a year"),
+    sort: str = "posted_date",
+    descending: bool = True,
+    limit: int = Query(100, ge=1, le=MAX_LISTINGS_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    current_user: UserOut = Depends(get_current_user),
+):
     """
-    Fetch all job listings for authenticated users.
+    One page of job listings matching the filters, in `sort` order. The
+    X-Next-Cursor response header continues from the last row; it is absent
+    on the last page.
     """
     try:
+        if sort not in LISTING_SORT_KEYS:
+            raise HTTPException(
+                status_code=400, detail=f"sort must be one of: {', '.join(LISTING_SORT_KEYS)}."
+            )
+        key_columns = [LISTING_SORT_KEYS[sort], *LISTING_KEY_COLUMNS]
+
+        conditions, params = listing_conditions(company, location, search_query, posted_from, posted_to)
+        if keyword:
+            conditions.append("(TITLE ILIKE %(keyword)s ESCAPE '!' OR DESCRIPTION ILIKE %(keyword)s ESCAPE '!')")
+            params["keyword"] = like_pattern(keyword)
+        if min_salary is not None:
+            conditions.append("SALARY_MAX >= %(min_salary)s")
+            params["min_salary"] = min_salary
+        # Filtered through the skill index when requested
+        if skills:
+            skills = sorted({skill.strip().lower() for skill in skills if skill.strip()})
+            params.update({f"skill_{i}": skill for i, skill in enumerate(skills)})
+            params["skill_count"] = len(skills)
+            conditions.append(f"""JOB_ID IN (
+                SELECT JOB_ID FROM JOB_SKILLS
+                WHERE SKILL IN ({", ".join(f"%(skill_{i})s" for i in range(len(skills)))})
+                GROUP BY JOB_ID
+                HAVING COUNT(DISTINCT SKILL) = %(skill_count)s
+            )""")
+        if cursor:
+            conditions.append(keyset_condition(key_columns, descending))
+            params.update({f"cursor_{i}": value for i, value in enumerate(decode_cursor(cursor, len(key_columns)))})
+        params["limit"] = limit + 1
+
+        direction = "DESC" if descending else "ASC"
+        fetch_listings_query = f"""
+        SELECT *, {", ".join(f"{column} AS SORT_KEY_{i}" for i, column in enumerate(key_columns))}
+        FROM JOBLISTINGS
+        WHERE {" AND ".join(conditions) or "TRUE"}
+        ORDER BY {", ".join(f"SORT_KEY_{i} {direction}" for i in range(len(key_columns)))}
+        LIMIT %(limit)s
+        """
+
         # Establish Snowflake connection
         conn = get_snowflake_joblistings_connection()
         cur = conn.cursor()
-
-        # Query to fetch all job listings
-        fetch_listings_query = "SELECT * FROM JOBLISTINGS;"
-        cur.execute(fetch_listings_query)
+        cur.execute(fetch_listings_query, params)
         columns = [col[0] for col in cur.description]  # Get column names
         rows = cur.fetchall()
 
-        # Format results as a list of dictionaries
-        job_listings = [dict(zip(columns, row)) for row in rows]
+        # The extra row only tells whether another page follows
+        sort_keys = len(key_columns)
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(list(rows[-1][-sort_keys:]))
 
-        return job_listings
+        # Format results as a list of dictionaries
+        job_listings = [dict(zip(columns[:-sort_keys], row[:-sort_keys])) for row in rows]
+        return FastJSONResponse(content=job_listings, headers=headers)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching job listings: {e}")
     finally:
@@ -1222,33 +3768,812 @@ async def get_job_listings(current_user: UserOut = Depends(get_current_user)):
         if "conn" in locals() and conn:
             conn.close()
 
-@app.get("/users/jobs", response_model=list)
-async def get_user_jobs(current_user: UserOut = Depends(get_current_user)):
+@app.get("/jobs/skills", response_model=list)
+async def get_skill_facets(
+    search_query: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: UserOut = Depends(get_current_user),
+):
     """
-    Fetch the entire table of saved jobs for the logged-in user.
+    Skill facet counts over the listings, optionally for one search query.
     """
     try:
-        conn = get_user_results_db_connection()
+        conn = get_snowflake_joblistings_connection()
+        cur = conn.cursor()
+
+        query = "SELECT s.SKILL, COUNT(DISTINCT s.JOB_ID) AS JOB_COUNT FROM JOB_SKILLS s"
+        params = {"limit": limit}
+        if search_query:
+            query += " JOIN JOBLISTINGS j ON j.JOB_ID = s.JOB_ID WHERE j.SEARCH_QUERY = %(search_query)s"
+            params["search_query"] = search_query
+        query += " GROUP BY s.SKILL ORDER BY JOB_COUNT DESC, s.SKILL LIMIT %(limit)s"
+        cur.execute(query, params)
+
+        return [{"skill": skill, "count": count} for skill, count in cur.fetchall()]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching skill facets: {e}")
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+# Dimensions of JOBLISTINGS_ROLLUP, in GROUPING_ID bit order (most significant first)
+ROLLUP_DIMENSIONS = ("company", "location", "search_query", "posted_date")
+LISTING_ROLLUP_REVALIDATE_SECONDS = float(os.getenv("LISTING_ROLLUP_REVALIDATE_SECONDS", "300"))
+
+# The rollup table indexed by grouping set, refreshed when the DAG rebuilds it
+listing_rollup_cache = LRUCache(maxsize=1)
+
+
+def rollup_dimensions(grouping_id: int) -> frozenset:
+    """The dimensions a rollup row is grouped by; a set GROUPING_ID bit means rolled up"""
+    last = len(ROLLUP_DIMENSIONS) - 1
+    return frozenset(
+        dimension for i, dimension in enumerate(ROLLUP_DIMENSIONS) if not (grouping_id >> (last - i)) & 1
+    )
+
+
+def load_listing_rollups() -> Dict[str, Any]:
+    """
+    JOBLISTINGS_ROLLUP grouped by grouping set. Reloaded only when its
+    REFRESHED_AT changed, checked at most every LISTING_ROLLUP_REVALIDATE_SECONDS.
+    """
+    cached = listing_rollup_cache.get("rollup")
+    if cached and time.monotonic() - cached["validated_at"] < LISTING_ROLLUP_REVALIDATE_SECONDS:
+        return cached
+    try:
+        conn = get_snowflake_joblistings_connection()
         cur = conn.cursor()
 
-        # Dynamically create the user-specific table name
-        table_name = f"user_{str(current_user.id).replace('-', '_')}"
+        cur.execute("SELECT MAX(REFRESHED_AT) FROM JOBLISTINGS_ROLLUP")
+        refreshed_at = cur.fetchone()[0]
+        if cached and cached["refreshed_at"] == refreshed_at:
+            sets = cached["sets"]
+        else:
+            cur.execute(
+                f"SELECT GROUPING_ID, {', '.join(ROLLUP_DIMENSIONS)}, JOB_COUNT FROM JOBLISTINGS_ROLLUP"
+            )
+            sets = {}
+            for grouping_id, *values, count in cur.fetchall():
+                row = dict(zip(ROLLUP_DIMENSIONS, values))
+                row["count"] = count
+                sets.setdefault(rollup_dimensions(grouping_id), []).append(row)
+        rollups = {"sets": sets, "refreshed_at": refreshed_at, "validated_at": time.monotonic()}
+        listing_rollup_cache.set("rollup", rollups)
+        return rollups
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+def rollup_counts(sets: Dict[frozenset, list], facet: Optional[str], filters: Dict[str, Any]) -> Dict[Any, int]:
+    """
+    Listing counts by `facet` (or one total for None) among listings matching
+    `filters`, read from the one grouping set that covers both.
+    """
+    dimensions = frozenset(filters) | ({facet} if facet else set())
+    counts = {}
+    for row in sets.get(dimensions, []):
+        if all(matches(row[dimension]) for dimension, matches in filters.items()):
+            key = row[facet] if facet else None
+            counts[key] = counts.get(key, 0) + row["count"]
+    return counts
+
+
+def top_counts(counts: Dict[Any, int], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    ranked = sorted(
+        ((value, count) for value, count in counts.items() if value is not None),
+        key=lambda item: (-item[1], str(item[0])),
+    )
+    return [{"value": value, "count": count} for value, count in ranked[:limit]]
+
+
+@app.get("/jobs/listings/analytics")
+async def get_job_listings_analytics(
+    company: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    search_query: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Listing counts by company, location, search query and posted date, served
+    from the in-memory rollups so the cost does not grow with the listings.
+    """
+    try:
+        rollups = await run_in_threadpool(load_listing_rollups)
+        sets = rollups["sets"]
+
+        filters = {}
+        for dimension, values in (("company", company), ("location", location), ("search_query", search_query)):
+            if values:
+                filters[dimension] = lambda value, selected=set(values): value in selected
+        if posted_from or posted_to:
+            filters["posted_date"] = lambda value: value is not None and (
+                (not posted_from or value >= posted_from) and (not posted_to or value <= posted_to)
+            )
+
+        def options(dimension):
+            return sorted(value for value in rollup_counts(sets, dimension, {}) if value is not None)
+
+        dates = options("posted_date")
+        return {
+            "total": rollup_counts(sets, None, filters).get(None, 0),
+            "listings": rollup_counts(sets, None, {}).get(None, 0),
+            "company": top_counts(rollup_counts(sets, "company", filters), limit),
+            "location": top_counts(rollup_counts(sets, "location", filters), limit),
+            "search_query": top_counts(rollup_counts(sets, "search_query", filters)),
+            "posted_date": sorted(top_counts(rollup_counts(sets, "posted_date", filters)), key=lambda item: item["value"]),
+            "options": {
+                "company": options("company"),
+                "location": options("location"),
+                "search_query": options("search_query"),
+                "posted_date_min": dates[0] if dates else None,
+                "posted_date_max": dates[-1] if dates else None,
+            },
+            "refreshed_at": rollups["refreshed_at"],
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching listing analytics: {str(e)}")
+
 
-        # Query all rows from the user's table
-        fetch_query = f"SELECT * FROM {table_name};"
-        cur.execute(fetch_query)
+def load_job_skill_aliases(job_id: str) -> Dict[str, List[str]]:
+    """
+    The indexed skills of one listing with the aliases they are matched by.
+    JOB_SKILLS only covers the listings of the latest load, so saved listings
+    that have since dropped out fall back to the skills kept in the archive.
+    """
+    try:
+        conn = get_snowflake_joblistings_connection()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT s.SKILL, a.ALIAS
+            FROM JOB_SKILLS s
+            LEFT JOIN SKILL_ALIASES a ON a.SKILL = s.SKILL
+            WHERE s.JOB_ID = %(job_id)s
+            """,
+            {"job_id": job_id},
+        )
         rows = cur.fetchall()
-        columns = [col[0] for col in cur.description]
+        if not rows:
+            cur.execute(
+                f"""
+                SELECT s.SKILL, a.ALIAS
+                FROM (
+                    SELECT TRIM(f.VALUE) AS SKILL
+                    FROM {JOB_ARCHIVE_TABLE} archive, TABLE(SPLIT_TO_TABLE(archive.SKILLS, ',')) f
+                    WHERE archive.JOB_ID = %(job_id)s
+                ) s
+                LEFT JOIN SKILL_ALIASES a ON a.SKILL = s.SKILL
+                WHERE s.SKILL <> ''
+                """,
+                {"job_id": job_id},
+            )
+            rows = cur.fetchall()
+        aliases = {}
+        for skill, alias in rows:
+            aliases.setdefault(skill, [skill])
+            if alias and alias not in aliases[skill]:
+                aliases[skill].append(alias)
+        return aliases
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+def mentions_alias(text: str, alias: str) -> bool:
+    return re.search(rf"(?<![\w+#]){re.escape(alias.lower())}(?![\w+#])", text) is not None
+
+
+@app.get("/jobs/{job_id}/skill-gap")
+async def get_skill_gap(
+    job_id: str,
+    document_type: str = "resume",
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Compare a listing's indexed skills against the user's resume (or cover
+    letter) without an LLM call.
+    """
+    try:
+        validate_chat_document(current_user, document_type)
+        skill_aliases, document_text = await asyncio.gather(
+            run_in_threadpool(load_job_skill_aliases, job_id),
+            get_document_text(current_user, document_type),
+        )
+        if not skill_aliases:
+            raise HTTPException(status_code=404, detail="No indexed skills found for this job.")
+
+        document_text = document_text.lower()
+        matched = sorted(
+            skill for skill, aliases in skill_aliases.items()
+            if any(mentions_alias(document_text, alias) for alias in aliases)
+        )
+        missing = sorted(set(skill_aliases) - set(matched))
+        return {
+            "job_id": job_id,
+            "skills": sorted(skill_aliases),
+            "matched": matched,
+            "missing": missing,
+            "coverage": round(len(matched) / len(skill_aliases), 2),
+        }
 
-        # Convert rows to a list of dictionaries
-        jobs = [dict(zip(columns, row)) for row in rows]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing skill gap: {str(e)}")
 
-        return jobs
 
+@app.get("/users/jobs", response_model=list)
+async def get_user_jobs(
+    request: Request,
+    updated_since: Optional[datetime] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Fetch the entire table of saved jobs for the logged-in user. Supports
+    If-None-Match and `updated_since` like /jobs/saved.
+    """
+    try:
+        return await run_in_threadpool(fetch_saved_jobs_response, request, str(current_user.id), updated_since)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user jobs: {str(e)}")
+
+
+# Width of the annual salary bands that salaries are counted in
+SALARY_BUCKET_WIDTH = int(os.getenv("SALARY_BUCKET_WIDTH", "10000"))
+
+# Facets returned by /users/jobs/analytics, with the expression each groups by
+USER_JOB_FACETS = {
+    "status": "status",
+    "location": "location",
+    "company": "company",
+    "title": "title",
+    "posted_date": "posted_date",
+    "salary": "salary",
+}
+
+
+def like_pattern(keyword: str) -> str:
+    """Case-insensitive substring pattern with LIKE wildcards escaped by '!'"""
+    escaped = keyword.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
+
+# The user's saved jobs with listing fields resolved, as the analytics queries see them
+USER_JOBS_CTE = f"""
+    jobs AS (
+        SELECT
+            s.job_id AS job_id,
+            s.status AS status,
+            COALESCE(a.location, s.location) AS location,
+            COALESCE(a.company, s.company) AS company,
+            COALESCE(a.title, s.title) AS title,
+            TRY_TO_DATE(COALESCE(a.posted_date, s.posted_date)) AS posted_date,
+            FLOOR((a.salary_min + a.salary_max) / 2 / %(salary_bucket)s) * %(salary_bucket)s AS salary,
+            COALESCE(a.description, s.description) AS description
+        FROM {SAVED_JOBS_SOURCE}
+        WHERE s.user_id = %(user_id)s
+    )
+"""
+
+
+def user_job_conditions(
+    user_id: str,
+    locations: Optional[List[str]],
+    companies: Optional[List[str]],
+    statuses: Optional[List[str]],
+    posted_from: Optional[date],
+    posted_to: Optional[date],
+    keyword: Optional[str],
+) -> tuple:
+    """SQL conditions over USER_JOBS_CTE for the analytics filters, with their parameters"""
+    conditions = []
+    params = {"user_id": user_id, "salary_bucket": SALARY_BUCKET_WIDTH}
+    for column, values in (("location", locations), ("company", companies), ("status", statuses)):
+        if values:
+            placeholders = ", ".join(f"%({column}_{i})s" for i in range(len(values)))
+            conditions.append(f"{column} IN ({placeholders})")
+            params.update({f"{column}_{i}": value for i, value in enumerate(values)})
+    if posted_from:
+        conditions.append("posted_date >= %(posted_from)s")
+        params["posted_from"] = posted_from
+    if posted_to:
+        conditions.append("posted_date <= %(posted_to)s")
+        params["posted_to"] = posted_to
+    if keyword:
+        conditions.append("(title ILIKE %(keyword)s ESCAPE '!' OR description ILIKE %(keyword)s ESCAPE '!')")
+        params["keyword"] = like_pattern(keyword)
+    return conditions, params
+
+
+def compute_user_job_analytics(
+    user_id: str,
+    locations: Optional[List[str]],
+    companies: Optional[List[str]],
+    statuses: Optional[List[str]],
+    posted_from: Optional[date],
+    posted_to: Optional[date],
+    keyword: Optional[str],
+    limit: int,
+) -> Dict[str, Any]:
+    """
+    Facet counts over the user's saved jobs from one GROUPING SETS query.
+    Each group carries both its unfiltered count (for the filter options) and
+    the count of rows matching the filters.
+    """
+    conditions, params = user_job_conditions(
+        user_id, locations, companies, statuses, posted_from, posted_to, keyword
+    )
+
+    facet_case = " ".join(f"WHEN GROUPING({column}) = 0 THEN '{facet}'" for facet, column in USER_JOB_FACETS.items())
+    query = f"""
+    WITH {USER_JOBS_CTE}, flagged AS (
+        SELECT *, ({" AND ".join(conditions) or "TRUE"}) AS matched FROM jobs
+    )
+    SELECT
+        CASE {facet_case} ELSE 'total' END AS facet,
+        {", ".join(USER_JOB_FACETS.values())},
+        COUNT(*) AS total,
+        COUNT_IF(matched) AS matched
+    FROM flagged
+    GROUP BY GROUPING SETS ({", ".join(f"({column})" for column in USER_JOB_FACETS.values())}, ())
+    """
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+    facet_index = {facet: i + 1 for i, facet in enumerate(USER_JOB_FACETS)}
+    groups = {facet: [] for facet in USER_JOB_FACETS}
+    analytics = {"total": 0, "saved": 0}
+    for row in rows:
+        facet, total, matched = row[0], row[-2], row[-1]
+        if facet == "total":
+            analytics.update({"total": matched, "saved": total})
+        else:
+            groups[facet].append((row[facet_index[facet]], total, matched))
+
+    def counts(facet, top=None):
+        ranked = sorted(
+            ((value, matched) for value, _, matched in groups[facet] if value is not None and matched),
+            key=lambda item: (-item[1], str(item[0])),
+        )
+        return [{"value": value, "count": count} for value, count in ranked[:top]]
+
+    def options(facet):
+        return sorted(value for value, total, _ in groups[facet] if value is not None and total)
+
+    dates = options("posted_date")
+    analytics.update({
+        "status": counts("status"),
+        "location": counts("location", limit),
+        "company": counts("company", limit),
+        "title": counts("title", limit),
+        "salary": counts("salary", limit),
+        "posted_date": sorted(counts("posted_date"), key=lambda item: item["value"]),
+        "options": {
+            "location": options("location"),
+            "company": options("company"),
+            "status": options("status"),
+            "posted_date_min": dates[0] if dates else None,
+            "posted_date_max": dates[-1] if dates else None,
+        },
+    })
+    return analytics
+
+
+@app.get("/users/jobs/analytics")
+async def get_user_job_analytics(
+    location: Optional[List[str]] = Query(None),
+    company: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    keyword: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Aggregates of the logged-in user's saved jobs for the analytics page:
+    counts by status, location, company, title, posted date and annual
+    salary band, plus the values available to filter on.
+    """
+    try:
+        return await run_in_threadpool(
+            compute_user_job_analytics,
+            str(current_user.id), location, company, status, posted_from, posted_to, keyword, limit,
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing user job analytics: {str(e)}")
+
+
+WORDCLOUD_MAX_TERMS = int(os.getenv("WORDCLOUD_MAX_TERMS", "200"))
+
+# Summed term frequencies and rendered PNGs, keyed by a hash of the scope,
+# the filters and the version of the underlying data
+term_frequency_cache = LRUCache(
+    maxsize=int(os.getenv("TERM_FREQUENCY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("WORDCLOUD_CACHE_TTL_SECONDS", "3600")),
+)
+wordcloud_cache = LRUCache(
+    maxsize=int(os.getenv("WORDCLOUD_CACHE_SIZE", "128")),
+    ttl=float(os.getenv("WORDCLOUD_CACHE_TTL_SECONDS", "3600")),
+    max_weight=int(os.getenv("WORDCLOUD_CACHE_BYTES", str(32 * 1024 * 1024))),
+    weigh=len,
+)
+
+
+def filter_hash(scope: str, version, filters: Dict[str, Any]) -> str:
+    payload = json.dumps([scope, version, filters], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def term_rows(cur) -> Dict[str, int]:
+    return {term: int(frequency) for term, frequency in cur.fetchall()}
+
+
+def listing_conditions(
+    company: Optional[List[str]],
+    location: Optional[List[str]],
+    search_query: Optional[List[str]],
+    posted_from: Optional[date],
+    posted_to: Optional[date],
+) -> tuple:
+    """SQL conditions over JOBLISTINGS for the listing filters, with their parameters"""
+    conditions = []
+    params = {}
+    for column, values in (("COMPANY", company), ("LOCATION", location), ("SEARCH_QUERY", search_query)):
+        if values:
+            placeholders = ", ".join(f"%({column.lower()}_{i})s" for i in range(len(values)))
+            conditions.append(f"{column} IN ({placeholders})")
+            params.update({f"{column.lower()}_{i}": value for i, value in enumerate(values)})
+    if posted_from:
+        conditions.append("TRY_TO_DATE(POSTED_DATE) >= %(posted_from)s")
+        params["posted_from"] = posted_from
+    if posted_to:
+        conditions.append("TRY_TO_DATE(POSTED_DATE) <= %(posted_to)s")
+        params["posted_to"] = posted_to
+    return conditions, params
+
+
+def load_listing_terms(*filters) -> Dict[str, int]:
+    """Highlight term frequencies summed over the listings matching the filters"""
+    conditions, params = listing_conditions(*filters)
+    params["limit"] = WORDCLOUD_MAX_TERMS
+    try:
+        conn = get_snowflake_joblistings_connection()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            SELECT t.TERM, SUM(t.FREQUENCY) AS FREQUENCY
+            FROM JOB_TERMS t
+            JOIN (SELECT DISTINCT JOB_ID FROM JOBLISTINGS WHERE {" AND ".join(conditions) or "TRUE"}) j
+                ON j.JOB_ID = t.JOB_ID
+            GROUP BY t.TERM
+            ORDER BY FREQUENCY DESC
+            LIMIT %(limit)s
+            """,
+            params,
+        )
+        return term_rows(cur)
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+def load_user_job_terms(user_id: str, *filters) -> Dict[str, int]:
+    """Highlight term frequencies summed over the user's saved jobs matching the filters"""
+    conditions, params = user_job_conditions(user_id, *filters)
+    params["limit"] = WORDCLOUD_MAX_TERMS
+    try:
+        conn = get_user_results_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            WITH {USER_JOBS_CTE}
+            SELECT t.TERM, SUM(t.FREQUENCY) AS FREQUENCY
+            FROM jobs
+            JOIN {JOB_TERMS_TABLE} t ON t.JOB_ID = jobs.job_id
+            WHERE {" AND ".join(conditions) or "TRUE"}
+            GROUP BY t.TERM
+            ORDER BY FREQUENCY DESC
+            LIMIT %(limit)s
+            """,
+            params,
+        )
+        return term_rows(cur)
+    finally:
+        if "cur" in locals() and cur:
+            cur.close()
+        if "conn" in locals() and conn:
+            conn.close()
+
+
+async def cached_term_frequencies(key: str, load, *args) -> Dict[str, int]:
+    frequencies = term_frequency_cache.get(key)
+    if frequencies is None:
+        frequencies = await run_in_threadpool(load, *args)
+        term_frequency_cache.set(key, frequencies)
+    return frequencies
+
+
+def render_wordcloud_png(frequencies: Dict[str, int]) -> bytes:
+    image = WordCloud(width=800, height=400, background_color="white").generate_from_frequencies(frequencies)
+    buffer = BytesIO()
+    image.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def wordcloud_response(request: Request, key: str, load, *args) -> Response:
+    """
+    The rendered word cloud for a filter hash, from cache when possible.
+    The hash doubles as the ETag.
+    """
+    if WordCloud is None:
+        raise HTTPException(status_code=501, detail="Word cloud rendering is not available on this server.")
+    etag = f'"{key[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    image = wordcloud_cache.get(key)
+    if image is None:
+        frequencies = await cached_term_frequencies(key, load, *args)
+        if not frequencies:
+            raise HTTPException(status_code=404, detail="No highlight terms found for these filters.")
+        image = await run_in_threadpool(render_wordcloud_png, frequencies)
+        wordcloud_cache.set(key, image)
+    return Response(content=image, media_type="image/png", headers=headers)
+
+
+async def listing_terms_key(*filters, scope: str = "listings") -> str:
+    # The DAG reloads listings, terms and rollups together, so the rollup refresh versions all of them
+    rollups = await run_in_threadpool(load_listing_rollups)
+    return filter_hash(scope, rollups["refreshed_at"], list(filters))
+
+
+async def user_terms_key(user_id: str, *filters) -> str:
+    saved = await run_in_threadpool(load_saved_jobs, user_id)
+    return filter_hash(f"user:{user_id}", [saved["count"], saved["last_modified"]], list(filters))
+
+
+@app.get("/jobs/listings/terms")
+async def get_listing_terms(
+    company: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    search_query: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Most frequent highlight terms over the filtered listings, for
+    WordCloud.generate_from_frequencies.
+    """
+    try:
+        filters = (company, location, search_query, posted_from, posted_to)
+        key = await listing_terms_key(*filters)
+        return await cached_term_frequencies(key, load_listing_terms, *filters)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching listing terms: {str(e)}")
+
+
+@app.get("/jobs/listings/wordcloud")
+async def get_listing_wordcloud(
+    request: Request,
+    company: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    search_query: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Word cloud PNG of the filtered listings' highlights.
+    """
+    try:
+        filters = (company, location, search_query, posted_from, posted_to)
+        key = await listing_terms_key(*filters)
+        return await wordcloud_response(request, key, load_listing_terms, *filters)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering listing word cloud: {str(e)}")
+
+
+@app.get("/users/jobs/terms")
+async def get_user_job_terms(
+    location: Optional[List[str]] = Query(None),
+    company: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    keyword: Optional[str] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Most frequent highlight terms over the user's filtered saved jobs.
+    """
+    try:
+        user_id = str(current_user.id)
+        filters = (location, company, status, posted_from, posted_to, keyword)
+        key = await user_terms_key(user_id, *filters)
+        return await cached_term_frequencies(key, load_user_job_terms, user_id, *filters)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching saved job terms: {str(e)}")
+
+
+@app.get("/users/jobs/wordcloud")
+async def get_user_job_wordcloud(
+    request: Request,
+    location: Optional[List[str]] = Query(None),
+    company: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    keyword: Optional[str] = None,
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Word cloud PNG of the user's filtered saved jobs' highlights.
+    """
+    try:
+        user_id = str(current_user.id)
+        filters = (location, company, status, posted_from, posted_to, keyword)
+        key = await user_terms_key(user_id, *filters)
+        return await wordcloud_response(request, key, load_user_job_terms, user_id, *filters)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering saved job word cloud: {str(e)}")
+
+
+# Statistics of the annual salary midpoint reported per group, with their SQL
+SALARY_STATISTICS = {
+    "min": "MIN(salary)",
+    "p25": "PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY salary)",
+    "median": "MEDIAN(salary)",
+    "p75": "PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY salary)",
+    "p90": "PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY salary)",
+    "max": "MAX(salary)",
+}
+
+# Salary statistics keyed by a hash of the filters and the listings version
+listing_salary_cache = LRUCache(
+    maxsize=int(os.getenv("LISTING_SALARY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("WORDCLOUD_CACHE_TTL_SECONDS", "3600")),
+)
+
+
+def load_listing_salaries(
+    company: Optional[List[str]],
+    location: Optional[List[str]],
+    search_query: Optional[List[str]],
+    posted_from: Optional[date],
+    posted_to: Optional[date],
+    min_salary: Optional[int],
+    max_salary: Optional[int],
+    currency: str,
+    bucket: int,
+) -> Dict[str, Any]:
+    """
+    Percentiles, a histogram and per-query medians of the annual salary
+    midpoint over the filtered listings, from the SALARY_* columns parsed at
+    ingest. A listing found by several search queries counts once overall.
+    """
+    conditions, params = listing_conditions(company, location, search_query, posted_from, posted_to)
+    conditions += ["SALARY_MIN IS NOT NULL", "SALARY_CURRENCY = %(currency)s"]
+    params.update({"currency": currency, "bucket": bucket})
+    if min_salary is not None:
+        conditions.append("SALARY_MAX >= %(min_salary)s")
+        params["min_salary"] = min_salary
+    if max_salary is not None:
+        conditions.append("SALARY_MIN <= %(max_salary)s")
+        params["max_salary"] = max_salary
+
+    statistics = ", ".join(SALARY_STATISTICS.values())
+    query = f"""
+    WITH salaries AS (
+        SELECT JOB_ID AS job_id, SEARCH_QUERY AS search_query, (SALARY_MIN + SALARY_MAX) / 2 AS salary
+        FROM JOBLISTINGS
+        WHERE {" AND ".join(conditions)}
+    ), jobs AS (
+        SELECT job_id, ANY_VALUE(salary) AS salary,
+               FLOOR(ANY_VALUE(salary) / %(bucket)s) * %(bucket)s AS band
+        FROM salaries
+        GROUP BY job_id
+    )
+    SELECT CASE WHEN GROUPING(band) = 0 THEN 'band' ELSE 'total' END AS facet,
+           NULL AS search_query, band, COUNT(*) AS job_count, {statistics}
+    FROM jobs
+    GROUP BY GROUPING SETS ((), (band))
+    UNION ALL
+    SELECT 'search_query' AS facet, search_query, NULL AS band, COUNT(DISTINCT job_id) AS job_count, {statistics}
+    FROM salaries
+    GROUP BY search_query
+    """
+    try:
+        conn = get_snowflake_joblistings_connection()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        rows = cur.fetchall()
     finally:
         if "cur" in locals() and cur:
             cur.close()
         if "conn" in locals() and conn:
             conn.close()
+
+    def amounts(values):
+        return {name: None if value is None else round(float(value)) for name, value in zip(SALARY_STATISTICS, values)}
+
+    salaries = {"count": 0, "currency": currency, "statistics": amounts([None] * len(SALARY_STATISTICS))}
+    histogram, by_query = [], []
+    for facet, query_value, band, count, *values in rows:
+        if facet == "total":
+            salaries.update({"count": count, "statistics": amounts(values)})
+        elif facet == "band" and band is not None:
+            histogram.append({"min": int(band), "max": int(band) + bucket, "count": count})
+        elif facet == "search_query":
+            by_query.append({"value": query_value, "count": count, "median": amounts(values)["median"]})
+    salaries["histogram"] = sorted(histogram, key=lambda item: item["min"])
+    salaries["search_query"] = sorted(by_query, key=lambda item: (-item["median"], item["value"]))
+    return salaries
+
+
+@app.get("/jobs/listings/salaries")
+async def get_listing_salaries(
+    company: Optional[List[str]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    search_query: Optional[List[str]] = Query(None),
+    posted_from: Optional[date] = None,
+    posted_to: Optional[date] = None,
+    min_salary: Optional[int] = Query(None, ge=0, description="Only listings paying at least this much a year"),
+    max_salary: Optional[int] = Query(None, ge=0, description="Only listings paying at most this much a year"),
+    currency: str = "USD",
+    bucket: int = Query(SALARY_BUCKET_WIDTH, ge=1000, description="Width of the histogram bands"),
+    current_user: UserOut = Depends(get_current_user),
+):
+    """
+    Annual salary percentiles, histogram and per-query medians over the
+    filtered listings that state a salary.
+    """
+    try:
+        filters = (company, location, search_query, posted_from, posted_to, min_salary, max_salary, currency, bucket)
+        key = await listing_terms_key(*filters, scope="listing-salaries")
+        salaries = listing_salary_cache.get(key)
+        if salaries is None:
+            salaries = await run_in_threadpool(load_listing_salaries, *filters)
+            listing_salary_cache.set(key, salaries)
+        return salaries
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching listing salaries: {str(e)}")
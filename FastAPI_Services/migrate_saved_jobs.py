@@ -0,0 +1,168 @@
+"""
+Copy saved jobs from the per-user user_<uuid> tables in USER_RESULTS_DB into
+the shared SAVED_JOBS table.
+
+The copy is idempotent: rows already present in SAVED_JOBS are left untouched,
+so the script can be re-run while the API is serving traffic. Old tables are
+only dropped with --drop, after every row has been verified as copied.
+
+Saved jobs reference JOBLISTINGS_ARCHIVE, which the Airflow load fills. The
+script first seeds the archive from the listings currently in JOBLISTINGS, so
+listings loaded before the upgrade (with their old random JOB_IDs) can still
+be saved until the next DAG run replaces them.
+
+Deploy order: start the upgraded API (it creates SAVED_JOBS and an empty
+JOBLISTINGS_ARCHIVE), then run this script, then let the DAG run as usual.
+
+Usage (from the FastAPI_Services directory, with the API's environment):
+    python migrate_saved_jobs.py [--dry-run] [--drop]
+"""
+import argparse
+import re
+from uuid import UUID
+
+from main import (
+    CREATE_JOB_ARCHIVE_TABLE_QUERY,
+    CREATE_SAVED_JOBS_TABLE_QUERY,
+    JOB_ARCHIVE_TABLE,
+    get_snowflake_joblistings_connection,
+    get_user_results_db_connection,
+)
+
+USER_TABLE_PATTERN = re.compile(r"^USER_([0-9A-F]{8}_[0-9A-F]{4}_[0-9A-F]{4}_[0-9A-F]{4}_[0-9A-F]{12})$")
+
+COPIED_COLUMNS = [
+    "job_id", "title", "company", "location", "description", "job_highlights",
+    "apply_links", "posted_date", "status", "feedback", "created_at", "updated_at",
+]
+
+
+# multijob_transformed.listing_content_hash in SQL: whitespace-collapsed, lowercased
+# fields joined with the unit separator. Rows loaded before CONTENT_HASH existed
+# have none, so it is always recomputed here.
+LISTING_CONTENT_HASH = "SHA2(" + " || CHR(31) || ".join(
+    rf"LOWER(TRIM(REGEXP_REPLACE(COALESCE({column}, ''), '\\s+', ' ')))"
+    for column in ("TITLE", "COMPANY", "LOCATION", "DESCRIPTION", "JOB_HIGHLIGHTS")
+) + ", 256)"
+
+
+def seed_listing_archive(cur):
+    """Archive the listings in JOBLISTINGS that are not archived yet; returns the number inserted"""
+    cur.execute(CREATE_JOB_ARCHIVE_TABLE_QUERY)
+    cur.execute(
+        f"""
+        MERGE INTO {JOB_ARCHIVE_TABLE} AS archive
+        USING (
+            SELECT JOB_ID, {LISTING_CONTENT_HASH} AS CONTENT_HASH, TITLE, COMPANY, LOCATION,
+                   DESCRIPTION, JOB_HIGHLIGHTS, APPLY_LINKS, POSTED_DATE
+            FROM JOBLISTINGS
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY JOB_ID ORDER BY SEARCH_QUERY) = 1
+        ) AS listing
+        ON archive.JOB_ID = listing.JOB_ID
+        WHEN NOT MATCHED THEN INSERT (
+            JOB_ID, CONTENT_HASH, TITLE, COMPANY, LOCATION, DESCRIPTION,
+            JOB_HIGHLIGHTS, APPLY_LINKS, POSTED_DATE
+        ) VALUES (
+            listing.JOB_ID, listing.CONTENT_HASH, listing.TITLE, listing.COMPANY, listing.LOCATION,
+            listing.DESCRIPTION, listing.JOB_HIGHLIGHTS, listing.APPLY_LINKS, listing.POSTED_DATE
+        )
+        """
+    )
+    return cur.rowcount
+
+
+def list_user_tables(cur):
+    """Per-user results tables with the user id encoded in their name"""
+    cur.execute(
+        "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES "
+        "WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME LIKE 'USER%'"
+    )
+    tables = []
+    for (table_name,) in cur.fetchall():
+        match = USER_TABLE_PATTERN.match(table_name.upper())
+        if match:
+            tables.append((table_name, str(UUID(match.group(1).replace("_", "-")))))
+    return tables
+
+
+def table_columns(cur, table_name):
+    cur.execute(
+        "SELECT LOWER(COLUMN_NAME) FROM INFORMATION_SCHEMA.COLUMNS "
+        "WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME = %(table_name)s",
+        {"table_name": table_name},
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def copy_user_table(cur, table_name, user_id):
+    """Insert the table's rows that are not yet in SAVED_JOBS; returns the number inserted"""
+    # feedback_key only exists on tables that had feedback generated after it was added
+    columns = COPIED_COLUMNS + (["feedback_key"] if "feedback_key" in table_columns(cur, table_name) else [])
+    cur.execute(
+        f"""
+        MERGE INTO SAVED_JOBS AS target
+        USING (SELECT %(user_id)s AS user_id, {", ".join(columns)} FROM {table_name}) AS source
+        ON target.user_id = source.user_id AND target.job_id = source.job_id
+        WHEN NOT MATCHED THEN INSERT (user_id, {", ".join(columns)})
+        VALUES (source.user_id, {", ".join(f"source.{column}" for column in columns)})
+        """,
+        {"user_id": user_id},
+    )
+    return cur.rowcount
+
+
+def verify_user_table(cur, table_name, user_id):
+    """True when every job in the old table is present in SAVED_JOBS"""
+    cur.execute(
+        f"""
+        SELECT COUNT(*) FROM {table_name} old
+        LEFT JOIN SAVED_JOBS new ON new.user_id = %(user_id)s AND new.job_id = old.job_id
+        WHERE new.job_id IS NULL
+        """,
+        {"user_id": user_id},
+    )
+    return cur.fetchone()[0] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="List the tables that would be migrated")
+    parser.add_argument("--drop", action="store_true", help="Drop each old table once its rows are verified")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        jobs_conn = get_snowflake_joblistings_connection()
+        jobs_cur = jobs_conn.cursor()
+        try:
+            print(f"Seeded JOBLISTINGS_ARCHIVE with {seed_listing_archive(jobs_cur)} listings")
+            jobs_conn.commit()
+        finally:
+            jobs_cur.close()
+            jobs_conn.close()
+
+    conn = get_user_results_db_connection()
+    cur = conn.cursor()
+    try:
+        tables = list_user_tables(cur)
+        print(f"Found {len(tables)} per-user tables")
+        if args.dry_run:
+            for table_name, user_id in tables:
+                print(f"- {table_name} -> user {user_id}")
+            return
+
+        cur.execute(CREATE_SAVED_JOBS_TABLE_QUERY)
+        for table_name, user_id in tables:
+            inserted = copy_user_table(cur, table_name, user_id)
+            conn.commit()
+            verified = verify_user_table(cur, table_name, user_id)
+            print(f"{table_name}: copied {inserted} rows, verified={verified}")
+            if args.drop and verified:
+                cur.execute(f"DROP TABLE {table_name}")
+                print(f"{table_name}: dropped")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
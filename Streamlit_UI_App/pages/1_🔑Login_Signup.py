@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import register_user, login_user
+from utils import register_user, login_user, get_error_detail
 
 st.set_page_config(page_title="Login / Signup", layout="centered")
 
@@ -167,7 +167,7 @@ with tab2:
                 if response.status_code == 200:
                     st.success("Signup successful! You can now log in.")
                 else:
-                    error_detail = response.json().get('detail', 'Signup failed.')
+                    error_detail = get_error_detail(response, 'Signup failed.')
                     st.error(f"Signup failed: {error_detail}")
 
 
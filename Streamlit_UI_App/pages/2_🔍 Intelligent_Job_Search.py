@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import search_jobs, save_job
+from utils import search_jobs, save_job, save_jobs_bulk
 
 st.set_page_config(page_title="Job Search", layout="centered")
 
@@ -198,6 +198,16 @@ def show_job_list(jobs):
         st.markdown(job_card_html, unsafe_allow_html=True)
         st.button("View Details", key=f"view_details_{i}", on_click=select_job, args=(i,))
 
+    # Save every result on the page in one request
+    st.markdown("---")
+    if st.button("Save All Results", key="save_all_results"):
+        response = save_jobs_bulk([job.get('JOB_ID') for job in jobs], st.session_state['access_token'])
+        if response.status_code == 200:
+            result = response.json()
+            st.success(f"Saved {result['count']} of {len(jobs)} job(s).")
+        else:
+            st.error(f"Failed to save jobs: {response.json().get('detail', 'Unknown error')}")
+
 def show_job_details(job):
     st.markdown("---")
     st.markdown(f"<h2>{job.get('TITLE', 'No Title')}</h2>", unsafe_allow_html=True)
@@ -229,15 +239,9 @@ def show_job_details(job):
 
     # Save Job Button
     if st.button("Save Job"):
+        # The listing details are kept in the archive; only a reference is saved
         job_details = {
             "job_id": job.get('JOB_ID', 'Unknown'),
-            "title": job.get('TITLE', 'No Title'),
-            "company": job.get('COMPANY', 'Unknown'),
-            "location": job.get('LOCATION', 'Unknown'),
-            "description": job.get('DESCRIPTION', 'No Description'),
-            "job_highlights": job.get('JOB_HIGHLIGHTS', 'Unknown'),
-            "apply_links": job.get('APPLY_LINKS', 'Unknown'),
-            "posted_date": job.get('POSTED_DATE', 'Unknown'),
             "status": "Not Applied"
         }
         response = save_job(job_details, st.session_state['access_token'])
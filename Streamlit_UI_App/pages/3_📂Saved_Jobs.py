@@ -1,5 +1,10 @@
+import time
 import streamlit as st
-from utils import get_saved_jobs, update_job_status, delete_saved_job, generate_feedback, save_feedback, chat_feedback
+from utils import (
+    sync_saved_jobs, update_job_status, delete_saved_job, generate_feedback, save_feedback,
+    start_bulk_feedback, get_bulk_feedback_progress, create_chat_session, ask_chat_session, get_skill_gap,
+    update_job_statuses, delete_saved_jobs,
+)
 
 st.set_page_config(page_title="Saved Jobs", layout="centered")
 
@@ -144,6 +149,8 @@ if 'selected_saved_job_index' not in st.session_state:
     st.session_state['selected_saved_job_index'] = None
 if 'feedback' not in st.session_state:
     st.session_state['feedback'] = ""
+if 'chat_sessions' not in st.session_state:
+    st.session_state['chat_sessions'] = {}
 
 # Logout function
 def logout():
@@ -154,12 +161,9 @@ def logout():
 # Fetch saved jobs
 def fetch_saved_jobs():
     try:
-        response = get_saved_jobs(st.session_state['access_token'])
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Failed to fetch saved jobs: {response.json().get('detail', 'Unknown error')}")
-            return []
+        # The local copy survives reruns; only changes since it was taken are downloaded
+        cache = st.session_state.setdefault('saved_jobs_sync', {})
+        return sync_saved_jobs(st.session_state['access_token'], cache)
     except Exception as e:
         st.error(f"Error fetching saved jobs: {str(e)}")
         return []
@@ -195,6 +199,67 @@ if st.session_state['selected_saved_job_index'] is None:
             """
             st.markdown(job_card_html, unsafe_allow_html=True)
             st.button("View Details", key=f"view_details_{i}", on_click=select_job, args=(i,))
+
+        # Change the status of, or delete, many saved jobs in one request
+        st.markdown("---")
+        st.subheader("Bulk Actions")
+        bulk_selection = st.multiselect(
+            "Select jobs",
+            options=range(len(saved_jobs)),
+            format_func=lambda i: f"{saved_jobs[i].get('TITLE', 'No Title')} - {saved_jobs[i].get('COMPANY', 'Unknown')}",
+            key="bulk_action_jobs",
+        )
+        bulk_job_ids = [saved_jobs[i].get('JOB_ID') for i in bulk_selection]
+        bulk_status = st.selectbox(
+            "New status",
+            ["Not Applied", "Applied", "Interview Scheduled", "Offer Received", "Rejected"],
+            key="bulk_status",
+        )
+        status_col, delete_col = st.columns(2)
+        with status_col:
+            if st.button("Update Selected", disabled=not bulk_job_ids):
+                response = update_job_statuses(bulk_job_ids, bulk_status, st.session_state['access_token'])
+                if response.status_code == 200:
+                    st.success(f"Updated {response.json()['count']} job(s) to '{bulk_status}'.")
+                    saved_jobs = fetch_saved_jobs()
+                else:
+                    st.error(f"Failed to update jobs: {response.json().get('detail', 'Unknown error')}")
+        with delete_col:
+            if st.button("Delete Selected", disabled=not bulk_job_ids):
+                response = delete_saved_jobs(bulk_job_ids, st.session_state['access_token'])
+                if response.status_code == 200:
+                    st.success(f"Deleted {response.json()['count']} job(s).")
+                    saved_jobs = fetch_saved_jobs()
+                else:
+                    st.error(f"Failed to delete jobs: {response.json().get('detail', 'Unknown error')}")
+
+        # Generate feedback for every saved job in one run
+        st.markdown("---")
+        st.subheader("Bulk Feedback")
+        selected_jobs = st.multiselect(
+            "Jobs to include (leave empty for all saved jobs)",
+            options=range(len(saved_jobs)),
+            format_func=lambda i: f"{saved_jobs[i].get('TITLE', 'No Title')} - {saved_jobs[i].get('COMPANY', 'Unknown')}",
+        )
+        if st.button("Generate Feedback for Saved Jobs"):
+            job_ids = [saved_jobs[i].get('JOB_ID') for i in selected_jobs] or None
+            response = start_bulk_feedback(st.session_state['access_token'], job_ids=job_ids)
+            if response.status_code == 202:
+                run_id = response.json()["run_id"]
+                progress_bar = st.progress(0.0, text="Generating feedback...")
+                while True:
+                    progress = get_bulk_feedback_progress(run_id, st.session_state['access_token']).json()
+                    done = progress.get("completed", 0) + progress.get("failed", 0)
+                    total = max(progress.get("total", 1), 1)
+                    progress_bar.progress(done / total, text=f"Generated feedback for {done} of {total} job(s)")
+                    if progress.get("status") in ("completed", "failed"):
+                        break
+                    time.sleep(2)
+                if progress.get("failed"):
+                    st.warning(f"Feedback failed for {progress['failed']} job(s).")
+                st.success("Feedback saved. Open a job to view it.")
+            else:
+                st.error(f"Failed to start bulk feedback: {response.json().get('detail', 'Unknown error')}")
     else:
         st.info("No saved jobs found.")
 
@@ -226,6 +291,17 @@ else:
             st.write(f"**Created At:** {selected_job.get('CREATED_AT', 'Unknown')}")
             st.write(f"**Updated At:** {selected_job.get('UPDATED_AT', 'Unknown')}")
 
+            # Skill gap from the skill index; no LLM call involved
+            if st.button("Check Skill Gap"):
+                gap_response = get_skill_gap(selected_job.get('JOB_ID', 'Unknown'), st.session_state['access_token'])
+                if gap_response.status_code == 200:
+                    gap = gap_response.json()
+                    st.write(f"**Skill Coverage:** {int(gap['coverage'] * 100)}%")
+                    st.write(f"**Skills on your resume:** {', '.join(gap['matched']) or 'None'}")
+                    st.write(f"**Missing skills:** {', '.join(gap['missing']) or 'None'}")
+                else:
+                    st.error(f"Failed to check skill gap: {gap_response.json().get('detail', 'Unknown error')}")
+
         with tab2:
             st.subheader("Detailed Feedback For the Job")
 
@@ -239,21 +315,23 @@ else:
                 """
             )
 
-            # Generate general feedback
+            # Generate general feedback (repeat requests are served from the feedback cache)
+            regenerate = st.checkbox("Regenerate instead of reusing previous feedback", value=False)
             feedback_button = st.button("Generate Feedback")
             if feedback_button:
-                with st.spinner("Generating feedback..."):
-                    response = generate_feedback(
+                try:
+                    # Render tokens as they arrive instead of waiting for the full completion
+                    st.session_state['feedback'] = st.write_stream(generate_feedback(
                         job_id=selected_job.get('JOB_ID', 'Unknown'),
                         description=selected_job.get('DESCRIPTION', ''),
                         highlights=selected_job.get('JOB_HIGHLIGHTS', ''),
-                        token=st.session_state['access_token']
-                    )
-                    if response.status_code == 200:
-                        st.session_state['feedback'] = response.json().get('feedback', 'No feedback available.')
-                        st.write(st.session_state['feedback'])
-                    else:
-                        st.error(f"Failed to generate feedback: {response.json().get('detail', 'Unknown error')}")
+                        token=st.session_state['access_token'],
+                        stream=True,
+                        regenerate=regenerate,
+                        persist=False
+                    ))
+                except Exception as e:
+                    st.error(f"Failed to generate feedback: {str(e)}")
 
             if st.session_state['feedback']:
                 if st.button("Save Feedback"):
@@ -291,19 +369,35 @@ else:
                 if not question.strip():
                     st.error("Please enter a question.")
                 else:
-                    with st.spinner("Getting specific feedback..."):
-                        chat_response = chat_feedback(
-                            document_type=document_type.lower(),
-                            question=question,
-                            description=selected_job.get('DESCRIPTION', ''),
-                            highlights=selected_job.get('JOB_HIGHLIGHTS', ''),
-                            token=st.session_state['access_token']
-                        )
-                        if chat_response.status_code == 200:
-                            response_text = chat_response.json().get("response", "No response available.")
-                            st.write(response_text)
-                        else:
-                            st.error(f"Failed to get feedback: {chat_response.json().get('detail', 'Unknown error')}")
+                    # Reuse one chat session per job and document so follow-ups only send the question
+                    session_key = (selected_job.get('JOB_ID', 'Unknown'), document_type.lower())
+                    try:
+                        for attempt in range(2):
+                            session_id = st.session_state['chat_sessions'].get(session_key)
+                            if session_id is None:
+                                session_response = create_chat_session(
+                                    document_type=document_type.lower(),
+                                    description=selected_job.get('DESCRIPTION', ''),
+                                    highlights=selected_job.get('JOB_HIGHLIGHTS', ''),
+                                    token=st.session_state['access_token'],
+                                )
+                                if session_response.status_code != 201:
+                                    raise Exception(session_response.json().get('detail', 'Unknown error'))
+                                session_id = session_response.json()['session_id']
+                                st.session_state['chat_sessions'][session_key] = session_id
+                            try:
+                                st.write_stream(ask_chat_session(
+                                    session_id, question, st.session_state['access_token'], stream=True
+                                ))
+                                break
+                            except Exception as e:
+                                # Sessions expire after inactivity; start a new one once
+                                if attempt == 0 and "not found" in str(e).lower():
+                                    st.session_state['chat_sessions'].pop(session_key, None)
+                                    continue
+                                raise
+                    except Exception as e:
+                        st.error(f"Failed to get feedback: {str(e)}")
 
 
             with tab3:
@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from utils import fetch_user_jobs
+from utils import (
+    fetch_user_jobs, get_user_job_analytics, user_job_filter_params, get_wordcloud, show_wordcloud,
+)
 
 st.set_page_config(page_title="User Analytics", layout="wide")
 
@@ -31,72 +31,65 @@ if 'access_token' not in st.session_state or st.session_state['access_token'] is
 # Fetch user jobs
 def fetch_user_jobs_data():
     try:
-        return fetch_user_jobs(st.session_state['access_token'])
+        # Kept across reruns so unchanged data costs a 304
+        cache = st.session_state.setdefault('user_jobs_sync', {})
+        return fetch_user_jobs(st.session_state['access_token'], cache)
     except Exception as e:
         st.error(f"Error fetching user analytics data: {e}")
         return []
 
-user_jobs = fetch_user_jobs_data()
+# The filters currently selected; widget values persist in session state
+def selected_filters():
+    dates = st.session_state.get("analytics_dates") or ()
+    return dict(
+        locations=st.session_state.get("analytics_locations"),
+        companies=st.session_state.get("analytics_companies"),
+        statuses=st.session_state.get("analytics_statuses"),
+        posted_from=dates[0] if len(dates) > 0 else None,
+        posted_to=dates[1] if len(dates) > 1 else None,
+        keyword=st.session_state.get("analytics_keyword"),
+    )
+
+# Fetch aggregates for the selected filters
+def fetch_user_job_analytics():
+    try:
+        return get_user_job_analytics(st.session_state['access_token'], **selected_filters())
+    except Exception as e:
+        st.error(f"Error fetching user analytics data: {e}")
+        return None
+
+def counts_series(counts):
+    return pd.Series({item["value"]: item["count"] for item in counts}, name="count", dtype="int64")
+
+analytics = fetch_user_job_analytics()
 
 st.title("📊 User Analytics")
 st.markdown("---")
 
-if user_jobs:
-    st.write(f"Found {len(user_jobs)} saved job(s).")
-
-    # Convert data into a Pandas DataFrame
-    df = pd.DataFrame(user_jobs)
+if analytics and analytics["saved"]:
+    st.write(f"Found {analytics['saved']} saved job(s).")
+    options = analytics["options"]
 
     # Add filters
     st.header("Filters")
     col1, col2, col3, col4, col5 = st.columns(5)
 
-    # Filter by Location
-    if "LOCATION" in df.columns:
-        with col1:
-            unique_locations = ["All"] + sorted(df["LOCATION"].dropna().unique())
-            selected_locations = st.multiselect("Filter by Location", unique_locations, default=["All"])
-            if "All" not in selected_locations:
-                df = df[df["LOCATION"].isin(selected_locations)]
-
-    # Filter by Company
-    if "COMPANY" in df.columns:
-        with col2:
-            unique_companies = ["All"] + sorted(df["COMPANY"].dropna().unique())
-            selected_companies = st.multiselect("Filter by Company", unique_companies, default=["All"])
-            if "All" not in selected_companies:
-                df = df[df["COMPANY"].isin(selected_companies)]
-
-    # Filter by Status
-    if "STATUS" in df.columns:
-        with col3:
-            unique_status = ["All"] + sorted(df["STATUS"].dropna().unique())
-            selected_status = st.multiselect("Filter by Status", unique_status, default=["All"])
-            if "All" not in selected_status:
-                df = df[df["STATUS"].isin(selected_status)]
-
-    # Filter by Posted Date
-    if "POSTED_DATE" in df.columns:
-        with col4:
-            df["POSTED_DATE"] = pd.to_datetime(df["POSTED_DATE"], errors="coerce")
-            unique_dates = ["All"] + sorted(df["POSTED_DATE"].dropna().astype(str).unique())
-            selected_dates = st.multiselect("Filter by Posted Dates", unique_dates, default=["All"])
-            if "All" not in selected_dates:
-                selected_dates = pd.to_datetime(selected_dates)
-                df = df[df["POSTED_DATE"].isin(selected_dates)]
-
-    # Keyword Search
+    with col1:
+        st.multiselect("Filter by Location", options["location"], key="analytics_locations")
+    with col2:
+        st.multiselect("Filter by Company", options["company"], key="analytics_companies")
+    with col3:
+        st.multiselect("Filter by Status", options["status"], key="analytics_statuses")
+    with col4:
+        if options["posted_date_min"]:
+            first_date = pd.to_datetime(options["posted_date_min"]).date()
+            last_date = pd.to_datetime(options["posted_date_max"]).date()
+            st.date_input(
+                "Filter by Posted Dates", value=(first_date, last_date),
+                min_value=first_date, max_value=last_date, key="analytics_dates",
+            )
     with col5:
-        search_query = st.text_input("Search by Keyword", "")
-        if search_query:
-            df = df[
-                df["TITLE"].str.contains(search_query, case=False, na=False)
-                | df["DESCRIPTION"].str.contains(search_query, case=False, na=False)
-            ]
-
-    # Display filtered DataFrame
-    st.subheader("Filtered User Saved Jobs")
-    st.dataframe(df)
+        st.text_input("Search by Keyword", "", key="analytics_keyword")
 
     # ----- Analytics Section -----
     st.markdown("---")
@@ -104,70 +97,74 @@ if user_jobs:
 
     # Total Jobs Saved
     st.subheader("📋 Total Jobs Saved")
-    st.write(f"Total jobs saved after filtering: **{len(df)}**")
+    st.write(f"Total jobs saved after filtering: **{analytics['total']}**")
 
     # Jobs by Status
-    if "STATUS" in df.columns:
-        st.subheader("🟢 Jobs by Status")
-        status_counts = df["STATUS"].value_counts()
-        st.bar_chart(status_counts)
-        st.write(status_counts)
+    st.subheader("🟢 Jobs by Status")
+    status_counts = counts_series(analytics["status"])
+    st.bar_chart(status_counts)
+    st.write(status_counts)
 
     # Jobs by Location
-    if "LOCATION" in df.columns:
-        st.subheader("📍 Jobs by Location")
-        location_counts = df["LOCATION"].value_counts().head(10)
-        st.bar_chart(location_counts)
-        st.write(location_counts)
+    st.subheader("📍 Jobs by Location")
+    location_counts = counts_series(analytics["location"])
+    st.bar_chart(location_counts)
+    st.write(location_counts)
 
     # Jobs Posted Over Time
-    if "POSTED_DATE" in df.columns:
-        st.subheader("🕒 Jobs Saved Over Time")
-        jobs_over_time = df["POSTED_DATE"].value_counts().sort_index()
-        st.line_chart(jobs_over_time)
-        st.write(jobs_over_time)
+    st.subheader("🕒 Jobs Saved Over Time")
+    jobs_over_time = counts_series(analytics["posted_date"])
+    st.line_chart(jobs_over_time)
+    st.write(jobs_over_time)
 
     # Top Job Titles
-    if "TITLE" in df.columns:
-        st.subheader("💼 Top Job Titles")
-        title_counts = df["TITLE"].value_counts().head(10)
-        st.bar_chart(title_counts)
-        st.write(title_counts)
+    st.subheader("💼 Top Job Titles")
+    title_counts = counts_series(analytics["title"])
+    st.bar_chart(title_counts)
+    st.write(title_counts)
 
     # Top Companies
-    if "COMPANY" in df.columns:
-        st.subheader("🏢 Top Companies")
-        company_counts = df["COMPANY"].value_counts().head(10)
-        st.bar_chart(company_counts)
-        st.write(company_counts)
-
-    # Word Cloud for Job Highlights
-    if "JOB_HIGHLIGHTS" in df.columns:
-        st.subheader("📖 Key Skills and Highlights (Word Cloud)")
-        highlights_text = " ".join(df["JOB_HIGHLIGHTS"].dropna())
-        wordcloud = WordCloud(width=800, height=400, background_color="white").generate(highlights_text)
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation="bilinear")
-        plt.axis("off")
-        st.pyplot(plt)
+    st.subheader("🏢 Top Companies")
+    company_counts = counts_series(analytics["company"])
+    st.bar_chart(company_counts)
+    st.write(company_counts)
+
+    # Word Cloud for Job Highlights, rendered from ingest-time term frequencies
+    st.subheader("📖 Key Skills and Highlights (Word Cloud)")
+    try:
+        show_wordcloud(get_wordcloud(
+            st.session_state['access_token'], "users/jobs", user_job_filter_params(**selected_filters())
+        ))
+    except Exception as e:
+        st.error(f"Error loading word cloud: {e}")
 
     # Salary Range (if available)
-    if "DESCRIPTION" in df.columns:
-        st.subheader("💵 Salary Mentions")
-        salary_keywords = df["DESCRIPTION"].str.extract(r"(\$[\d,]+)").dropna()
-        if not salary_keywords.empty:
-            st.write(f"Found {len(salary_keywords)} salary mentions in job descriptions.")
-            st.write(salary_keywords[0].value_counts().head(10))
-        else:
-            st.write("No salary information found.")
-
-    # Download Analytics Data
-    st.subheader("📥 Download Filtered Data")
-    st.download_button(
-        label="Download Filtered User Data as CSV",
-        data=df.to_csv(index=False),
-        file_name="user_analytics.csv",
-        mime="text/csv"
-    )
-else:
+    st.subheader("💵 Salary Ranges")
+    if analytics["salary"]:
+        # Annual salary midpoints counted in bands, keyed by the band's lower bound
+        salary_counts = counts_series(sorted(analytics["salary"], key=lambda item: item["value"]))
+        salary_counts.index = [f"${int(band) // 1000}K+" for band in salary_counts.index]
+        st.write(f"{int(salary_counts.sum())} saved job(s) state a salary.")
+        st.bar_chart(salary_counts)
+        st.write(salary_counts)
+    else:
+        st.write("No salary information found.")
+
+    # Full rows are only downloaded when asked for
+    st.markdown("---")
+    if st.checkbox("Show saved jobs and CSV download"):
+        df = pd.DataFrame(fetch_user_jobs_data())
+
+        st.subheader("User Saved Jobs")
+        st.dataframe(df)
+
+        # Download Analytics Data
+        st.subheader("📥 Download Saved Jobs")
+        st.download_button(
+            label="Download User Data as CSV",
+            data=df.to_csv(index=False),
+            file_name="user_analytics.csv",
+            mime="text/csv"
+        )
+elif analytics is not None:
     st.info("No saved jobs found for the user.")
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from utils import get_job_listings
+from utils import (
+    get_job_listings, get_job_listings_analytics, get_skill_facets, listing_filter_params,
+    get_wordcloud, show_wordcloud, get_listing_salaries,
+)
 
 st.set_page_config(page_title="Job Listings Analytics", layout="wide")
 
@@ -28,81 +29,68 @@ if 'access_token' not in st.session_state or st.session_state['access_token'] is
     st.warning("You need to log in to view job listings.")
     st.stop()
 
-# Fetch job listings
-def fetch_job_listings():
+# Fetch one page of job listings; returns the rows and the cursor of the next page
+def fetch_job_listings(cursor=None, **query):
     try:
-        response = get_job_listings(st.session_state['access_token'])
+        response = get_job_listings(st.session_state['access_token'], cursor=cursor, **query)
         if response.status_code == 200:
-            return response.json()
+            return response.json(), response.headers.get("X-Next-Cursor")
         else:
             st.error(f"Failed to fetch job listings: {response.json().get('detail', 'Unknown error')}")
-            return []
+            return [], None
     except Exception as e:
         st.error(f"Error fetching job listings: {str(e)}")
-        return []
+        return [], None
+
+# The filters currently selected; widget values persist in session state
+def selected_filters():
+    dates = st.session_state.get("listing_dates") or ()
+    return dict(
+        companies=st.session_state.get("listing_companies"),
+        locations=st.session_state.get("listing_locations"),
+        search_queries=st.session_state.get("listing_queries"),
+        posted_from=dates[0] if len(dates) > 0 else None,
+        posted_to=dates[1] if len(dates) > 1 else None,
+    )
+
+# Fetch rollup counts for the selected filters
+def fetch_listing_analytics():
+    try:
+        return get_job_listings_analytics(st.session_state['access_token'], **selected_filters())
+    except Exception as e:
+        st.error(f"Error fetching job listings analytics: {str(e)}")
+        return None
+
+def counts_series(counts):
+    return pd.Series({item["value"]: item["count"] for item in counts}, name="count", dtype="int64")
 
-# Fetch the job listings
-job_listings = fetch_job_listings()
+analytics = fetch_listing_analytics()
 
 st.title("📋 Job Listings Analytics")
 st.markdown("---")
 
-if job_listings:
-    st.write(f"Found {len(job_listings)} job listing(s).")
-
-    # Convert data into a Pandas DataFrame
-    df = pd.DataFrame(job_listings)
+if analytics and analytics["listings"]:
+    st.write(f"Found {analytics['listings']} job listing(s).")
+    options = analytics["options"]
 
     # Add filters
     st.header("Filters")
-    col1, col2, col3, col4, col5 = st.columns(5)
-
-    # Filter by Location (Multi-select with "All" option)
-    if "LOCATION" in df.columns:
-        with col1:
-            unique_locations = ["All"] + sorted(df["LOCATION"].dropna().unique())
-            selected_locations = st.multiselect("Filter by Location", unique_locations, default=["All"])
-            if "All" not in selected_locations:
-                df = df[df["LOCATION"].isin(selected_locations)]
-
-    # Filter by Company (Multi-select with "All" option)
-    if "COMPANY" in df.columns:
-        with col2:
-            unique_companies = ["All"] + sorted(df["COMPANY"].dropna().unique())
-            selected_companies = st.multiselect("Filter by Company", unique_companies, default=["All"])
-            if "All" not in selected_companies:
-                df = df[df["COMPANY"].isin(selected_companies)]
-
-    # Filter by Search Query (Multi-select with "All" option)
-    if "SEARCH_QUERY" in df.columns:
-        with col3:
-            unique_queries = ["All"] + sorted(df["SEARCH_QUERY"].dropna().unique())
-            selected_queries = st.multiselect("Filter by Search Query", unique_queries, default=["All"])
-            if "All" not in selected_queries:
-                df = df[df["SEARCH_QUERY"].isin(selected_queries)]
-
-    # Filter by Date Range (Multi-select for individual dates with "All" option)
-    if "POSTED_DATE" in df.columns:
-        with col4:
-            df["POSTED_DATE"] = pd.to_datetime(df["POSTED_DATE"], errors="coerce")
-            unique_dates = ["All"] + sorted(df["POSTED_DATE"].dropna().astype(str).unique())
-            selected_dates = st.multiselect("Filter by Posted Dates", unique_dates, default=["All"])
-            if "All" not in selected_dates:
-                selected_dates = pd.to_datetime(selected_dates)
-                df = df[df["POSTED_DATE"].isin(selected_dates)]
-
-    # Keyword Search
-    with col5:
-        search_query = st.text_input("Search by Keyword", "")
-        if search_query:
-            df = df[
-                df["TITLE"].str.contains(search_query, case=False, na=False)
-                | df["DESCRIPTION"].str.contains(search_query, case=False, na=False)
-            ]
-
-    # Display filtered DataFrame
-    st.subheader("Filtered Job Listings Data")
-    st.dataframe(df)
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.multiselect("Filter by Location", options["location"], key="listing_locations")
+    with col2:
+        st.multiselect("Filter by Company", options["company"], key="listing_companies")
+    with col3:
+        st.multiselect("Filter by Search Query", options["search_query"], key="listing_queries")
+    with col4:
+        if options["posted_date_min"]:
+            first_date = pd.to_datetime(options["posted_date_min"]).date()
+            last_date = pd.to_datetime(options["posted_date_max"]).date()
+            st.date_input(
+                "Filter by Posted Dates", value=(first_date, last_date),
+                min_value=first_date, max_value=last_date, key="listing_dates",
+            )
 
     # ----- Analytics Section -----
     st.markdown("---")
@@ -110,69 +98,155 @@ if job_listings:
 
     # Total Job Listings
     st.subheader("📊 Total Job Listings")
-    st.write(f"Total job listings after filtering: **{len(df)}**")
+    st.write(f"Total job listings after filtering: **{analytics['total']}**")
 
     # Jobs by Location
-    if "LOCATION" in df.columns:
-        st.subheader("📍 Jobs by Location")
-        location_counts = df["LOCATION"].value_counts().head(10)
-        st.bar_chart(location_counts)
-        st.write(location_counts)
+    st.subheader("📍 Jobs by Location")
+    location_counts = counts_series(analytics["location"])
+    st.bar_chart(location_counts)
+    st.write(location_counts)
 
     # Jobs by Company
-    if "COMPANY" in df.columns:
-        st.subheader("🏢 Jobs by Company")
-        company_counts = df["COMPANY"].value_counts().head(10)
-        st.bar_chart(company_counts)
-        st.write(company_counts)
+    st.subheader("🏢 Jobs by Company")
+    company_counts = counts_series(analytics["company"])
+    st.bar_chart(company_counts)
+    st.write(company_counts)
+
+    # Jobs by Search Query
+    st.subheader("🔎 Jobs by Search Query")
+    query_counts = counts_series(analytics["search_query"])
+    st.bar_chart(query_counts)
+    st.write(query_counts)
 
     # Posted Date Analysis
-    if "POSTED_DATE" in df.columns:
-        st.subheader("🕒 Jobs Posted Over Time")
-        posted_date_counts = df["POSTED_DATE"].value_counts().sort_index()
-        st.line_chart(posted_date_counts)
-        st.write(posted_date_counts)
-
-    # Top Job Titles
-    if "TITLE" in df.columns:
-        st.subheader("💼 Most Common Job Titles")
-        title_counts = df["TITLE"].value_counts().head(10)
-        st.bar_chart(title_counts)
-        st.write(title_counts)
-
-    # Skills and Highlights Analysis
-    if "JOB_HIGHLIGHTS" in df.columns:
-        st.subheader("📖 Key Skills and Highlights (Word Cloud)")
-        highlights_text = " ".join(df["JOB_HIGHLIGHTS"].dropna())
-        wordcloud = WordCloud(width=800, height=400, background_color="white").generate(highlights_text)
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation="bilinear")
-        plt.axis("off")
-        st.pyplot(plt)
-
-    # Salary Range (if available)
-    if "DESCRIPTION" in df.columns:
-        st.subheader("💵 Salary Insights")
-        salary_keywords = df["DESCRIPTION"].str.extract(r"(\$[\d,]+)").dropna()
-        if not salary_keywords.empty:
-            st.write(f"Found {len(salary_keywords)} salary mentions in job descriptions.")
-            salary_table = pd.DataFrame({
-                "Job Title": df.loc[salary_keywords.index, "TITLE"],
-                "Company": df.loc[salary_keywords.index, "COMPANY"],
-                "Location": df.loc[salary_keywords.index, "LOCATION"],
-                "Salary": salary_keywords[0]
-            })
-            st.write(salary_table)
-        else:
-            st.write("No salary information found.")
-
-    # Download Analytics Data
-    st.subheader("📥 Download Filtered Data")
-    st.download_button(
-        label="Download Filtered Job Listings as CSV",
-        data=df.to_csv(index=False),
-        file_name="filtered_job_listings.csv",
-        mime="text/csv"
+    st.subheader("🕒 Jobs Posted Over Time")
+    posted_date_counts = counts_series(analytics["posted_date"])
+    st.line_chart(posted_date_counts)
+    st.write(posted_date_counts)
+
+    # Salary statistics from the annual ranges parsed at ingestion
+    st.subheader("💵 Salary Insights")
+    min_salary = st.number_input("Minimum Annual Salary ($)", min_value=0, step=10000, key="listing_min_salary")
+    try:
+        salaries = get_listing_salaries(
+            st.session_state['access_token'], min_salary=min_salary, **selected_filters()
+        )
+    except Exception as e:
+        st.error(f"Error fetching salary insights: {e}")
+        salaries = None
+    if salaries and salaries["count"]:
+        statistics = salaries["statistics"]
+        st.write(f"{salaries['count']} listing(s) state a salary.")
+        metric_columns = st.columns(4)
+        for column, (label, name) in zip(metric_columns, (("25th Percentile", "p25"), ("Median", "median"), ("75th Percentile", "p75"), ("90th Percentile", "p90"))):
+            column.metric(label, f"${statistics[name]:,}")
+        salary_histogram = pd.Series(
+            {f"${band['min'] // 1000}K": band["count"] for band in salaries["histogram"]}, name="count", dtype="int64"
+        )
+        st.bar_chart(salary_histogram)
+        st.write(pd.DataFrame(salaries["search_query"]).rename(
+            columns={"value": "Search Query", "count": "Listings", "median": "Median Salary"}
+        ))
+    elif salaries is not None:
+        st.write("No salary information found.")
+
+    # Most requested skills from the skill index
+    selected_queries = st.session_state.get("listing_queries") or []
+    skill_response = get_skill_facets(
+        st.session_state['access_token'],
+        search_query=selected_queries[0] if len(selected_queries) == 1 else None,
+        limit=20,
     )
-else:
+    if skill_response.status_code == 200 and skill_response.json():
+        st.subheader("🛠️ Most Requested Skills")
+        skill_counts = counts_series(
+            [{"value": item["skill"], "count": item["count"]} for item in skill_response.json()]
+        )
+        st.bar_chart(skill_counts)
+        st.write(skill_counts)
+
+    # Skills and Highlights Analysis, rendered from ingest-time term frequencies
+    st.subheader("📖 Key Skills and Highlights (Word Cloud)")
+    try:
+        show_wordcloud(get_wordcloud(
+            st.session_state['access_token'], "jobs/listings", listing_filter_params(**selected_filters())
+        ))
+    except Exception as e:
+        st.error(f"Error loading word cloud: {e}")
+
+    # Listing-level analysis needs the full listings, so they are only downloaded on request
+    st.markdown("---")
+    if st.checkbox("Show listings, titles and salary insights"):
+        # Keyword Search and skill filter, applied on the server with the filters above
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            keyword = st.text_input("Search by Keyword", "")
+        with col2:
+            skill_options = get_skill_facets(st.session_state['access_token'], limit=500)
+            selected_skills = st.multiselect(
+                "Filter by Skills",
+                [item["skill"] for item in skill_options.json()] if skill_options.status_code == 200 else [],
+            )
+        with col3:
+            sort_labels = {"Newest": ("posted_date", True), "Highest Salary": ("salary", True), "Company": ("company", False), "Title": ("title", False)}
+            sort, descending = sort_labels[st.selectbox("Sort by", list(sort_labels))]
+
+        query = dict(
+            skills=selected_skills, keyword=keyword, min_salary=min_salary,
+            sort=sort, descending=descending, **selected_filters(),
+        )
+        # Pages already loaded are kept until the filters change
+        if st.session_state.get("listing_query") != query:
+            rows, cursor = fetch_job_listings(**query)
+            st.session_state["listing_query"] = query
+            st.session_state["listing_rows"] = rows
+            st.session_state["listing_cursor"] = cursor
+
+        df = pd.DataFrame(st.session_state["listing_rows"])
+        if df.empty:
+            st.info("No job listings found.")
+            st.stop()
+
+        # Display filtered DataFrame
+        st.subheader("Filtered Job Listings Data")
+        st.dataframe(df)
+        if st.session_state["listing_cursor"]:
+            if st.button("Load More Listings"):
+                rows, cursor = fetch_job_listings(cursor=st.session_state["listing_cursor"], **query)
+                st.session_state["listing_rows"] = st.session_state["listing_rows"] + rows
+                st.session_state["listing_cursor"] = cursor
+                st.rerun()
+            st.caption(f"Showing the first {len(df)} listings.")
+
+        # Top Job Titles
+        if "TITLE" in df.columns:
+            st.subheader("💼 Most Common Job Titles")
+            title_counts = df["TITLE"].value_counts().head(10)
+            st.bar_chart(title_counts)
+            st.write(title_counts)
+
+        # Salaries of the individual listings, as parsed at ingestion
+        if "SALARY_MIN" in df.columns:
+            st.subheader("💵 Listing Salaries")
+            salaried = df[df["SALARY_MIN"].notna()]
+            if not salaried.empty:
+                st.write(salaried[["TITLE", "COMPANY", "LOCATION", "SALARY_MIN", "SALARY_MAX", "SALARY_CURRENCY", "SALARY_PERIOD"]].rename(
+                    columns={
+                        "TITLE": "Job Title", "COMPANY": "Company", "LOCATION": "Location",
+                        "SALARY_MIN": "Annual Min", "SALARY_MAX": "Annual Max",
+                        "SALARY_CURRENCY": "Currency", "SALARY_PERIOD": "Quoted Per",
+                    }
+                ))
+            else:
+                st.write("No salary information found.")
+
+        # Download Analytics Data
+        st.subheader("📥 Download Filtered Data")
+        st.download_button(
+            label="Download Filtered Job Listings as CSV",
+            data=df.to_csv(index=False),
+            file_name="filtered_job_listings.csv",
+            mime="text/csv"
+        )
+elif analytics is not None:
     st.info("No job listings found.")
@@ -1,22 +1,87 @@
 import streamlit as st
 import requests
 import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.util.request import ACCEPT_ENCODING
 
 API_BASE_URL = os.getenv("API_URL", "http://localhost:8000")
 
-def register_user(username, email, password, resume_file, cover_letter_file):
-    url = f"{API_BASE_URL}/register"
-    files = {
-        'resume': resume_file,
-        'cover_letter': cover_letter_file
+# Every encoding urllib3 can decode in this environment (zstd and br when their
+# packages are installed); sent on the calls with large JSON responses
+LARGE_RESPONSE_HEADERS = {"Accept-Encoding": ACCEPT_ENCODING}
+
+def get_error_detail(response, default="Unknown error"):
+    """
+    Extract an error message from an API (JSON) or S3 (XML) error response.
+    """
+    try:
+        return response.json().get('detail', default)
+    except ValueError:
+        return response.text or default
+
+def file_sha256(file):
+    """
+    SHA-256 of an uploaded file; the API stores documents under this hash.
+    """
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def upload_to_presigned_post(presigned, file):
+    """
+    Upload a file directly to S3 using a presigned POST issued by the API.
+    """
+    file.seek(0)
+    files = {'file': (getattr(file, 'name', 'document.pdf'), file, 'application/pdf')}
+    return requests.post(presigned['url'], data=presigned['fields'], files=files)
+
+def upload_documents_direct(uploads, documents, token):
+    """
+    Upload documents to S3 in parallel and finalize them with the API.
+    `uploads` are the presigned POSTs, `documents` maps document type to file.
+    Documents the API already has (`exists`) are not uploaded again.
+    """
+    with ThreadPoolExecutor(max_workers=len(documents)) as executor:
+        futures = {
+            document_type: executor.submit(upload_to_presigned_post, uploads[document_type], file)
+            for document_type, file in documents.items()
+            if not uploads[document_type].get('exists')
+        }
+        for future in futures.values():
+            response = future.result()
+            if not response.ok:
+                return response
+
+    url = f"{API_BASE_URL}/users/me/files/finalize"
+    headers = {'Authorization': f'Bearer {token}'}
+    payload = {
+        f"{document_type}_key": uploads[document_type]['key']
+        for document_type in documents
     }
+    response = requests.post(url, headers=headers, json=payload)
+    return response
+
+def register_user(username, email, password, resume_file, cover_letter_file):
+    url = f"{API_BASE_URL}/register/presigned"
     data = {
         'username': username,
         'email': email,
-        'password': password
+        'password': password,
+        'resume_sha256': file_sha256(resume_file),
+        'cover_letter_sha256': file_sha256(cover_letter_file)
     }
-    response = requests.post(url, data=data, files=files)
-    return response
+    response = requests.post(url, data=data)
+    if response.status_code != 200:
+        return response
+
+    registration = response.json()
+    documents = {'resume': resume_file, 'cover_letter': cover_letter_file}
+    return upload_documents_direct(registration['uploads'], documents, registration['access_token'])
 
 def login_user(username, password):
     url = f"{API_BASE_URL}/login"
@@ -37,21 +102,26 @@ def get_current_user(token):
 
 def search_jobs(query, token):
     url = f"{API_BASE_URL}/search/jobs"
-    headers = {'Authorization': f'Bearer {token}'}
+    headers = {'Authorization': f'Bearer {token}', **LARGE_RESPONSE_HEADERS}
     params = {'query': query}
     response = requests.get(url, headers=headers, params=params)
     return response
 
 def update_files(resume_file, cover_letter_file, token):
-    url = f"{API_BASE_URL}/users/me/files"
-    headers = {'Authorization': f'Bearer {token}'}
-    files = {}
+    documents = {}
     if resume_file is not None:
-        files['resume'] = resume_file
+        documents['resume'] = resume_file
     if cover_letter_file is not None:
-        files['cover_letter'] = cover_letter_file
-    response = requests.put(url, headers=headers, files=files)
-    return response
+        documents['cover_letter'] = cover_letter_file
+
+    url = f"{API_BASE_URL}/users/me/files/presign"
+    headers = {'Authorization': f'Bearer {token}'}
+    hashes = {document_type: file_sha256(file) for document_type, file in documents.items()}
+    response = requests.post(url, headers=headers, json={'documents': hashes})
+    if response.status_code != 200:
+        return response
+
+    return upload_documents_direct(response.json()['uploads'], documents, token)
 
 def save_job(job, token):
     url = f"{API_BASE_URL}/jobs/save"
@@ -59,12 +129,50 @@ def save_job(job, token):
     response = requests.post(url, data=job, headers=headers)
     return response
 
-def get_saved_jobs(token):
-    url = f"{API_BASE_URL}/jobs/saved"
-    headers = {'Authorization': f'Bearer {token}'}
-    response = requests.get(url, headers=headers)
+def get_saved_jobs(token, etag=None, updated_since=None, path="/jobs/saved"):
+    url = f"{API_BASE_URL}{path}"
+    headers = {'Authorization': f'Bearer {token}', **LARGE_RESPONSE_HEADERS}
+    params = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if updated_since:
+        params['updated_since'] = updated_since
+    response = requests.get(url, headers=headers, params=params)
     return response
 
+def sync_saved_jobs(token, cache, path="/jobs/saved"):
+    """
+    Bring a local copy of the saved jobs up to date and return it as a list.
+    `cache` (e.g. a session_state dict) keeps the jobs with the ETag and
+    last-modified time of the version they reflect, so an unchanged list costs
+    a 304 and a changed one only transfers the changed rows.
+    """
+    if cache.get('token') != token:
+        cache.clear()
+        cache['token'] = token
+
+    response = get_saved_jobs(token, cache.get('etag'), cache.get('last_modified'), path)
+    if response.status_code == 304:
+        return list(cache['jobs'].values())
+    if response.status_code != 200:
+        raise Exception(get_error_detail(response))
+
+    jobs = dict(cache.get('jobs', {})) if cache.get('last_modified') else {}
+    for job in response.json():
+        jobs[job['JOB_ID']] = job
+
+    # More local rows than the server holds means some were deleted: reload in full
+    if len(jobs) > int(response.headers.get('X-Total-Count', len(jobs))):
+        cache.clear()
+        return sync_saved_jobs(token, cache, path)
+
+    cache.update({
+        'jobs': jobs,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('X-Last-Modified') or None,
+    })
+    return list(jobs.values())
+
 def update_job_status(job_id, new_status, token):
     url = f"{API_BASE_URL}/jobs/update-status"
     headers = {'Authorization': f'Bearer {token}'}
@@ -78,17 +186,73 @@ def delete_saved_job(job_id, token):
     response = requests.delete(url, headers=headers)
     return response
 
-def generate_feedback(job_id, description, highlights, token):
+def save_jobs_bulk(job_ids, token, status="Not Applied"):
+    url = f"{API_BASE_URL}/jobs/save/bulk"
+    headers = {'Authorization': f'Bearer {token}'}
+    payload = {'jobs': [{'job_id': job_id, 'status': status} for job_id in job_ids]}
+    response = requests.post(url, headers=headers, json=payload)
+    return response
+
+def update_job_statuses(job_ids, new_status, token):
+    url = f"{API_BASE_URL}/jobs/update-status/bulk"
+    headers = {'Authorization': f'Bearer {token}'}
+    payload = {'updates': [{'job_id': job_id, 'new_status': new_status} for job_id in job_ids]}
+    response = requests.put(url, headers=headers, json=payload)
+    return response
+
+def delete_saved_jobs(job_ids, token):
+    url = f"{API_BASE_URL}/jobs/delete/bulk"
+    headers = {'Authorization': f'Bearer {token}'}
+    response = requests.post(url, headers=headers, json={'job_ids': list(job_ids)})
+    return response
+
+def iter_sse(response):
+    """
+    Yield text chunks from a server-sent event stream until the `done` event.
+    """
+    if response.status_code != 200:
+        raise Exception(get_error_detail(response))
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            event = None
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[len("data:"):].strip())
+            if event == "done":
+                return
+            if event == "error":
+                raise Exception(data)
+            yield data
+
+def generate_feedback(job_id, description, highlights, token, stream=False, regenerate=False, persist=False):
     """
     Call the /feedback endpoint to generate feedback.
+    With stream=True, returns a generator of text chunks for st.write_stream.
+    Cached feedback is returned unless regenerate=True; persist=True saves it on the job.
     """
     url = f"{API_BASE_URL}/feedback"
     headers = {"Authorization": f"Bearer {token}"}
-    params = {"job_id": job_id, "description": description, "highlights": highlights}
+    params = {
+        "job_id": job_id,
+        "description": description,
+        "highlights": highlights,
+        "regenerate": str(regenerate).lower(),
+        "persist": str(persist).lower(),
+    }
+    if stream:
+        params["stream"] = "true"
+        response = requests.post(url, headers=headers, params=params, stream=True)
+        return iter_sse(response)
     response = requests.post(url, headers=headers, params=params)
     return response
 
-def chat_feedback(document_type, question, description, highlights, token):
+def chat_feedback(document_type, question, description, highlights, token, stream=False):
+    """
+    Ask a question about one document. With stream=True, returns a generator
+    of text chunks for st.write_stream.
+    """
     url = f"{API_BASE_URL}/chat-feedback"
     headers = {"Authorization": f"Bearer {token}"}
     data = {
@@ -97,9 +261,38 @@ def chat_feedback(document_type, question, description, highlights, token):
         "description": description,
         "highlights": highlights,
     }
+    if stream:
+        data["stream"] = "true"
+        response = requests.post(url, headers=headers, data=data, stream=True)
+        return iter_sse(response)
     response = requests.post(url, headers=headers, data=data)
     return response
 
+def create_chat_session(document_type, description, highlights, token):
+    """
+    Start a chat session about one document and job. Follow-up questions only
+    send the question; the server keeps the document context and history.
+    """
+    url = f"{API_BASE_URL}/chat/sessions"
+    headers = {"Authorization": f"Bearer {token}"}
+    data = {"document_type": document_type, "description": description, "highlights": highlights}
+    response = requests.post(url, headers=headers, json=data)
+    return response
+
+def ask_chat_session(session_id, question, token, stream=False):
+    """
+    Ask a question in a chat session. With stream=True, returns a generator
+    of text chunks for st.write_stream.
+    """
+    url = f"{API_BASE_URL}/chat/sessions/{session_id}/messages"
+    headers = {"Authorization": f"Bearer {token}"}
+    data = {"question": question, "stream": stream}
+    if stream:
+        response = requests.post(url, headers=headers, json=data, stream=True)
+        return iter_sse(response)
+    response = requests.post(url, headers=headers, json=data)
+    return response
+
 def save_feedback(job_id, feedback, token):
     url = f"{API_BASE_URL}/jobs/save-feedback"
     headers = {"Authorization": f"Bearer {token}"}
@@ -107,21 +300,163 @@ def save_feedback(job_id, feedback, token):
     response = requests.post(url, headers=headers, json=data)
     return response
 
-def get_job_listings(token):
+def start_bulk_feedback(token, job_ids=None):
+    """
+    Start generating feedback for all saved jobs (or the given job ids).
+    Returns the response; its JSON holds the run_id to poll.
+    """
+    url = f"{API_BASE_URL}/feedback/bulk"
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.post(url, headers=headers, json={"job_ids": job_ids})
+    return response
+
+def get_bulk_feedback_progress(run_id, token, include_results=False):
+    url = f"{API_BASE_URL}/feedback/bulk/{run_id}"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"include_results": str(include_results).lower()}
+    response = requests.get(url, headers=headers, params=params)
+    return response
+
+def get_job_listings(token, skills=None, keyword=None, min_salary=None, sort="posted_date",
+                     descending=True, limit=100, cursor=None, **filters):
+    """
+    One page of listings filtered on the server. Pass the response's
+    X-Next-Cursor header as `cursor` to fetch the next page.
+    """
     url = f"{API_BASE_URL}/jobs/listings"
+    headers = {"Authorization": f"Bearer {token}", **LARGE_RESPONSE_HEADERS}
+    params = {
+        **listing_filter_params(**filters), "skills": skills or [],
+        "sort": sort, "descending": str(descending).lower(), "limit": limit,
+    }
+    if keyword:
+        params["keyword"] = keyword
+    if min_salary:
+        params["min_salary"] = min_salary
+    if cursor:
+        params["cursor"] = cursor
+    response = requests.get(url, headers=headers, params=params)
+    return response
+
+def show_wordcloud(wordcloud):
+    """
+    Display the result of get_wordcloud: a PNG as is, or a small frequency
+    dict rendered locally.
+    """
+    if isinstance(wordcloud, bytes):
+        st.image(wordcloud, use_container_width=True)
+    elif wordcloud:
+        from wordcloud import WordCloud
+        image = WordCloud(width=800, height=400, background_color="white").generate_from_frequencies(wordcloud)
+        st.image(image.to_array(), use_container_width=True)
+    else:
+        st.write("No highlights found.")
+
+def listing_filter_params(companies=None, locations=None, search_queries=None,
+                          posted_from=None, posted_to=None):
+    params = {
+        "company": companies or [],
+        "location": locations or [],
+        "search_query": search_queries or [],
+    }
+    if posted_from:
+        params["posted_from"] = str(posted_from)
+    if posted_to:
+        params["posted_to"] = str(posted_to)
+    return params
+
+def get_job_listings_analytics(token, limit=10, **filters):
+    """
+    Listing counts from the ingest-time rollups, filtered on the server.
+    """
+    url = f"{API_BASE_URL}/jobs/listings/analytics"
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
+    params = {**listing_filter_params(**filters), "limit": limit}
+    response = requests.get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        raise Exception(get_error_detail(response))
+    return response.json()
+
+def get_listing_salaries(token, min_salary=None, currency="USD", **filters):
+    """
+    Annual salary percentiles, histogram and per-query medians of the
+    filtered listings, computed on the server from the parsed salary columns.
+    """
+    url = f"{API_BASE_URL}/jobs/listings/salaries"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {**listing_filter_params(**filters), "currency": currency}
+    if min_salary:
+        params["min_salary"] = min_salary
+    response = requests.get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        raise Exception(get_error_detail(response))
+    return response.json()
+
+def get_skill_facets(token, search_query=None, limit=50):
+    url = f"{API_BASE_URL}/jobs/skills"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"limit": limit}
+    if search_query:
+        params["search_query"] = search_query
+    response = requests.get(url, headers=headers, params=params)
     return response
 
-def fetch_user_jobs(token):
-    url = f"{API_BASE_URL}/users/jobs"
+def get_skill_gap(job_id, token, document_type="resume"):
+    """
+    Compare a job's indexed skills with the user's resume or cover letter.
+    """
+    url = f"{API_BASE_URL}/jobs/{job_id}/skill-gap"
     headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(url, headers=headers, params={"document_type": document_type})
+    return response
 
-    try:
-        response = requests.get(url, headers=headers)
+def user_job_filter_params(locations=None, companies=None, statuses=None,
+                           posted_from=None, posted_to=None, keyword=None):
+    params = {
+        "location": locations or [],
+        "company": companies or [],
+        "status": statuses or [],
+    }
+    if posted_from:
+        params["posted_from"] = str(posted_from)
+    if posted_to:
+        params["posted_to"] = str(posted_to)
+    if keyword:
+        params["keyword"] = keyword
+    return params
+
+def get_user_job_analytics(token, limit=10, **filters):
+    """
+    Aggregated counts of the user's saved jobs, filtered on the server.
+    """
+    url = f"{API_BASE_URL}/users/jobs/analytics"
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {**user_job_filter_params(**filters), "limit": limit}
+    response = requests.get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        raise Exception(get_error_detail(response))
+    return response.json()
+
+def get_wordcloud(token, scope, params):
+    """
+    Word cloud of `scope` ("users/jobs" or "jobs/listings") for the given
+    filter parameters: PNG bytes rendered by the server, or the term
+    frequencies to render locally when the server cannot.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    response = requests.get(f"{API_BASE_URL}/{scope}/wordcloud", headers=headers, params=params)
+    if response.status_code == 200:
+        return response.content
+    if response.status_code == 404:
+        return None
+    if response.status_code == 501:
+        response = requests.get(f"{API_BASE_URL}/{scope}/terms", headers=headers, params=params)
         if response.status_code == 200:
             return response.json()
-        else:
-            raise Exception(f"Failed to fetch jobs: {response.json().get('detail', 'Unknown error')}")
+    raise Exception(get_error_detail(response))
+
+def fetch_user_jobs(token, cache=None):
+    try:
+        return sync_saved_jobs(token, {} if cache is None else cache, path="/users/jobs")
     except Exception as e:
         raise Exception(f"Error fetching jobs: {str(e)}")
\ No newline at end of file
@@ -1,12 +1,15 @@
+import hashlib
+import json
+import time
 import pytest
 from fastapi.testclient import TestClient
 from fastapi.security import OAuth2PasswordRequestForm
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from io import BytesIO
 from datetime import datetime
 from uuid import uuid4
 
-from FastAPI_Services.main import app
+from FastAPI_Services.main import app, create_access_token, PRESIGNED_URL_EXPIRATION
 
 client = TestClient(app)
 
@@ -34,7 +37,9 @@ def mock_dependencies(mock_env):
     
     with patch("FastAPI_Services.main.get_snowflake_connection", return_value=mock_conn), \
          patch("FastAPI_Services.main.s3_client", mock_s3), \
-         patch("FastAPI_Services.main.initialize_user_profiles_table"):
+         patch("FastAPI_Services.main.initialize_user_profiles_table"), \
+         patch("FastAPI_Services.main.initialize_saved_jobs_table"), \
+         patch("FastAPI_Services.main.initialize_job_archive_table"):
         yield mock_cursor, mock_s3, mock_conn
 
 def test_register_user_success(mock_dependencies):
@@ -104,4 +109,697 @@ def test_register_missing_files(mock_dependencies):
     }
     
     response = client.post("/register", data=form_data)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_register_rejects_oversized_upload(mock_dependencies):
+    mock_cursor, mock_s3, _ = mock_dependencies
+    mock_cursor.fetchone.return_value = None
+
+    files = {
+        "resume": ("resume.pdf", BytesIO(b"x" * 64), "application/pdf"),
+        "cover_letter": ("cover.pdf", BytesIO(b"cover letter content"), "application/pdf")
+    }
+    form_data = {
+        "email": "test@example.com",
+        "username": "testuser",
+        "password": "securepass123"
+    }
+
+    with patch("FastAPI_Services.main.MAX_UPLOAD_SIZE", 32):
+        response = client.post("/register", files=files, data=form_data)
+    assert response.status_code == 413
+
+def test_presigned_register_creates_reclaimable_pending_account(mock_dependencies):
+    mock_cursor, _, _ = mock_dependencies
+    mock_cursor.fetchone.side_effect = [
+        None,  # No live user with this email or username
+        (datetime.now(),)  # created_at timestamp
+    ]
+    form_data = {
+        "email": "test@example.com",
+        "username": "testuser",
+        "password": "securepass123",
+        "resume_sha256": "a" * 64,
+        "cover_letter_sha256": "b" * 64,
+    }
+
+    with patch("FastAPI_Services.main.create_presigned_upload", return_value={}):
+        response = client.post("/register/presigned", data=form_data)
+    assert response.status_code == 200
+
+    queries = [" ".join(c.args[0].split()) for c in mock_cursor.execute.call_args_list]
+    # Abandoned signups for the same email/username are cleared before the availability check
+    assert queries[0].startswith("DELETE FROM user_profiles")
+    assert "pending_until < current_timestamp()" in queries[0]
+    insert = next(c for c in mock_cursor.execute.call_args_list if "INSERT INTO user_profiles" in c.args[0])
+    assert insert.args[1]["pending_seconds"] == PRESIGNED_URL_EXPIRATION
+
+def test_token_of_reclaimed_username_is_refused(mock_dependencies):
+    mock_cursor, _, _ = mock_dependencies
+    abandoned_id, new_id = str(uuid4()), str(uuid4())
+    old_token = create_access_token(data={"sub": "testuser", "uid": abandoned_id})
+    new_token = create_access_token(data={"sub": "testuser", "uid": new_id})
+
+    # user_profiles after the abandoned signup was replaced by a new account
+    def lookup():
+        params = mock_cursor.execute.call_args.args[1]
+        if params["username"] == "testuser" and params["id"] == new_id:
+            return (new_id, "new@example.com", None, None, datetime.now(), None, None, None)
+        return None
+    mock_cursor.fetchone.side_effect = lookup
+
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {old_token}"})
+    assert response.status_code == 401
+
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "new@example.com"
+
+
+@pytest.fixture
+def moto_s3(mock_dependencies):
+    import boto3
+    import requests
+    mock_aws = pytest.importorskip("moto").mock_aws
+    from FastAPI_Services.main import app as main_app, get_current_user, UserOut
+
+    mock_cursor, _, _ = mock_dependencies
+    user = UserOut(
+        id=uuid4(), username="testuser", email="test@example.com",
+        resume_link=None, cover_letter_link=None,
+        created_at=datetime.now(), updated_at=None,
+    )
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="test-bucket")
+        main_app.dependency_overrides[get_current_user] = lambda: user
+        with patch("FastAPI_Services.main.s3_client", s3), \
+             patch("FastAPI_Services.main.AWS_S3_BUCKET_NAME", "test-bucket"):
+            yield s3, user, mock_cursor, requests
+        main_app.dependency_overrides.clear()
+
+def test_presigned_upload_and_finalize(moto_s3):
+    s3, user, mock_cursor, requests = moto_s3
+    content = b"%PDF-1.4 resume"
+    content_hash = hashlib.sha256(content).hexdigest()
+    key = f"user-profiles/{user.id}/resume/{content_hash}.pdf"
+    mock_cursor.fetchone.return_value = (
+        str(user.id), user.username, user.email,
+        f"https://test-bucket.s3.us-east-1.amazonaws.com/{key}", None,
+        datetime.now(), datetime.now(), content_hash, None,
+    )
+
+    response = client.post("/users/me/files/presign", json={"documents": {"resume": content_hash}})
+    assert response.status_code == 200
+    presigned = response.json()["uploads"]["resume"]
+    assert presigned["key"] == key
+    assert not presigned["exists"]
+
+    upload = requests.post(
+        presigned["url"],
+        data=presigned["fields"],
+        files={"file": ("resume.pdf", BytesIO(content), "application/pdf")},
+    )
+    assert upload.ok
+
+    response = client.post("/users/me/files/finalize", json={"resume_key": presigned["key"]})
+    assert response.status_code == 200
+    assert response.json()["resume_hash"] == content_hash
+
+    # Re-uploading identical content is reported as already stored
+    response = client.post("/users/me/files/presign", json={"documents": {"resume": content_hash}})
+    assert response.json()["uploads"]["resume"]["exists"]
+
+def test_finalize_rejects_mismatched_content(moto_s3):
+    s3, user, _, _ = moto_s3
+    key = f"user-profiles/{user.id}/resume/{hashlib.sha256(b'expected').hexdigest()}.pdf"
+    s3.put_object(Bucket="test-bucket", Key=key, Body=b"tampered", ContentType="application/pdf")
+
+    response = client.post("/users/me/files/finalize", json={"resume_key": key})
+    assert response.status_code == 400
+
+def test_finalize_rejects_missing_upload(moto_s3):
+    _, user, _, _ = moto_s3
+    response = client.post(
+        "/users/me/files/finalize",
+        json={"resume_key": f"user-profiles/{user.id}/resume/{'0' * 64}.pdf"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def feedback_user(mock_dependencies):
+    from FastAPI_Services.main import app as main_app, get_current_user, UserOut, document_extraction_cache
+
+    user = UserOut(
+        id=uuid4(), username="testuser", email="test@example.com",
+        resume_link="https://test-bucket/resume.pdf",
+        cover_letter_link="https://test-bucket/cover.pdf",
+        created_at=datetime.now(), updated_at=None,
+        resume_hash="a" * 64, cover_letter_hash="b" * 64,
+    )
+    document_extraction_cache.set((str(user.id), "resume", "a" * 64), {"text": "Python, SQL", "sections": []})
+    document_extraction_cache.set((str(user.id), "cover_letter", "b" * 64), {"text": "Dear team", "sections": []})
+    main_app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    main_app.dependency_overrides.clear()
+
+def test_chat_feedback_streams_tokens(feedback_user):
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    with patch("FastAPI_Services.main.feedback_llm", FakeListChatModel(responses=["Add SQL."])):
+        response = client.post("/chat-feedback", data={
+            "document_type": "resume",
+            "question": "What is missing?",
+            "description": "Data engineer",
+            "highlights": "SQL",
+            "stream": "true",
+        })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    chunks = [line[len("data: "):] for line in response.text.splitlines() if line.startswith("data: ")]
+    assert "".join(json.loads(chunk) for chunk in chunks) == "Add SQL."
+    assert "event: done" in response.text
+
+def test_feedback_is_served_from_cache(feedback_user):
+    from FastAPI_Services.main import feedback_cache
+
+    params = {"job_id": "job-1", "description": "Data engineer", "highlights": "SQL"}
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="Mention SQL."))
+    with patch("FastAPI_Services.main.feedback_llm", llm), \
+         patch("FastAPI_Services.main.get_user_results_db_connection", side_effect=Exception("offline")):
+        first = client.post("/feedback", params=params)
+        second = client.post("/feedback", params=params)
+        regenerated = client.post("/feedback", params={**params, "regenerate": "true"})
+    feedback_cache.clear()
+
+    assert first.json() == {"feedback": "Mention SQL.", "cached": False}
+    assert second.json() == {"feedback": "Mention SQL.", "cached": True}
+    assert regenerated.json()["cached"] is False
+    assert llm.ainvoke.await_count == 2
+
+def test_saved_feedback_is_not_served_as_generated(feedback_user):
+    from FastAPI_Services.main import feedback_cache, feedback_cache_key, build_feedback_context
+
+    resume = {"text": "Python, SQL", "sections": []}
+    cover_letter = {"text": "Dear team", "sections": []}
+    key = feedback_cache_key(build_feedback_context(resume, cover_letter, "Data engineer", "SQL"))
+    # The saved job row, holding feedback generated from the current inputs
+    row = {"feedback": "Mention SQL.", "feedback_key": key}
+    statements = []
+
+    def execute(sql, params=None):
+        statements.append(sql)
+        if sql.strip().startswith("UPDATE SAVED_JOBS"):
+            row["feedback"] = params["feedback"]
+            if "feedback_key = NULL" in sql:
+                row["feedback_key"] = None
+
+    def fetchone():
+        if "feedback_key FROM SAVED_JOBS" in statements[-1]:
+            return row["feedback"], row["feedback_key"]
+        return 0, None, 0
+
+    cursor = MagicMock()
+    cursor.execute.side_effect = execute
+    cursor.fetchone.side_effect = fetchone
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="Quantify impact."))
+
+    feedback_cache.clear()
+    with patch("FastAPI_Services.main.feedback_llm", llm), \
+         patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        saved = client.post("/jobs/save-feedback", json={"job_id": "job-1", "feedback": "My own notes."})
+        response = client.post(
+            "/feedback", params={"job_id": "job-1", "description": "Data engineer", "highlights": "SQL"}
+        )
+    feedback_cache.clear()
+
+    assert saved.status_code == 200
+    assert response.json() == {"feedback": "Quantify impact.", "cached": False}
+    assert llm.ainvoke.await_count == 1
+
+def wait_for_task(task_client, url, attempts=50):
+    for _ in range(attempts):
+        response = task_client.get(url)
+        if response.json()["status"] in ("completed", "failed"):
+            return response
+        time.sleep(0.05)
+    return response
+
+def test_bulk_feedback_generates_and_persists_in_one_batch(feedback_user):
+    from FastAPI_Services.main import feedback_cache
+
+    cursor = MagicMock()
+    cursor.description = [("JOB_ID",), ("DESCRIPTION",), ("JOB_HIGHLIGHTS",), ("FEEDBACK",), ("FEEDBACK_KEY",)]
+    cursor.fetchall.return_value = [
+        (f"job-{i}", f"Role {i}", "SQL", None, None) for i in range(5)
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="Tailor the summary."))
+
+    with patch("FastAPI_Services.main.feedback_llm", llm), \
+         patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn), \
+         TestClient(app) as task_client:
+        started = task_client.post("/feedback/bulk", json={})
+        progress = wait_for_task(task_client, f"/feedback/bulk/{started.json()['run_id']}")
+    feedback_cache.clear()
+
+    assert started.status_code == 202
+    assert progress.json()["status"] == "completed"
+    assert progress.json()["completed"] == 5
+    assert llm.ainvoke.await_count == 5
+    merges = [c for c in cursor.execute.call_args_list if "MERGE INTO" in c.args[0]]
+    assert len(merges) == 1
+    assert len(merges[0].args[1]) == 16
+
+def test_feedback_task_is_queued_and_deduplicated(feedback_user):
+    from FastAPI_Services.main import feedback_cache
+
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="Quantify impact."))
+    params = {"job_id": "job-9", "description": "Analyst", "highlights": "Excel"}
+    with patch("FastAPI_Services.main.feedback_llm", llm), \
+         patch("FastAPI_Services.main.get_user_results_db_connection", side_effect=Exception("offline")), \
+         TestClient(app) as task_client:
+        first = task_client.post("/tasks/feedback", params=params)
+        duplicate = task_client.post("/tasks/feedback", params=params)
+        task = wait_for_task(task_client, f"/tasks/{first.json()['task_id']}")
+    feedback_cache.clear()
+
+    assert first.status_code == 202
+    assert duplicate.json()["task_id"] == first.json()["task_id"]
+    assert task.json()["result"] == {"feedback": "Quantify impact.", "cached": False}
+    assert llm.ainvoke.await_count == 1
+
+def test_chat_session_sends_only_deltas(feedback_user):
+    answers = iter(["Add metrics.", "Mention Airflow.", "Shorten it."])
+    prompts = []
+
+    async def answer(prompt):
+        prompts.append(prompt)
+        return MagicMock(content=next(answers))
+
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(side_effect=answer)
+    summarizer = MagicMock()
+    summarizer.ainvoke = AsyncMock(return_value=MagicMock(content="Discussed metrics."))
+    with patch("FastAPI_Services.main.feedback_llm", llm), \
+         patch("FastAPI_Services.main.llm", summarizer), \
+         TestClient(app) as task_client:
+        session = task_client.post("/chat/sessions", json={
+            "document_type": "resume", "description": "Data engineer", "highlights": "SQL",
+        })
+        assert session.status_code == 201
+        session_id = session.json()["session_id"]
+        for question in ("What is missing?", "Which tools?", "Anything else?"):
+            response = task_client.post(f"/chat/sessions/{session_id}/messages", json={"question": question})
+            assert response.status_code == 200
+        state = task_client.get(f"/chat/sessions/{session_id}")
+        for _ in range(50):
+            if state.json()["summary"]:
+                break
+            time.sleep(0.05)
+            state = task_client.get(f"/chat/sessions/{session_id}")
+
+    assert "Q: What is missing?\nA: Add metrics." in prompts[1]
+    assert state.json()["turns"] == 3
+    assert state.json()["summary"] == "Discussed metrics."
+
+def test_skill_gap_uses_skill_index(feedback_user):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("python", "python"), ("sql", "pl/sql"), ("sql", "sql"), ("kafka", "kafka")]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn):
+        response = client.get("/jobs/job-1/skill-gap")
+
+    assert response.status_code == 200
+    assert response.json()["matched"] == ["python", "sql"]
+    assert response.json()["missing"] == ["kafka"]
+    assert response.json()["coverage"] == 0.67
+
+def test_skill_gap_falls_back_to_archived_listing(feedback_user):
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [
+        [],  # the saved listing is no longer in the latest load's JOB_SKILLS
+        [("python", "python"), ("kafka", "kafka"), ("kafka", "apache kafka")],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn):
+        response = client.get("/jobs/archived-job/skill-gap")
+
+    assert response.status_code == 200
+    assert response.json()["skills"] == ["kafka", "python"]
+    assert response.json()["matched"] == ["python"]
+    assert "JOBLISTINGS_ARCHIVE" in cursor.execute.call_args_list[-1].args[0]
+    assert cursor.execute.call_args_list[-1].args[1] == {"job_id": "archived-job"}
+
+def test_saved_jobs_are_scoped_to_the_user(feedback_user):
+    cursor = MagicMock()
+    cursor.rowcount = 1
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        saved = client.post("/jobs/save", data={"job_id": "job-1"})
+        deleted = client.delete("/jobs/job-1")
+
+    assert saved.status_code == 200
+    assert deleted.status_code == 200
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert not any("CREATE TABLE" in sql or "INFORMATION_SCHEMA" in sql for sql in statements)
+    assert all("SAVED_JOBS" in sql for sql in statements)
+    assert cursor.execute.call_args_list[0].args[1]["user_id"] == str(feedback_user.id)
+
+def test_saved_jobs_reference_the_listing_archive(feedback_user):
+    cursor = MagicMock()
+    cursor.rowcount = 0
+    cursor.description = [("JOB_ID",), ("TITLE",), ("STATUS",)]
+    cursor.fetchall.return_value = [("job-1", "Data Engineer", "Applied")]
+    cursor.fetchone.return_value = (1, None)
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        missing = client.post("/jobs/save", data={"job_id": "unknown"})
+        saved = client.get("/jobs/saved")
+
+    assert missing.status_code == 404
+    save_sql, save_params = cursor.execute.call_args_list[0].args
+    assert "JOBLISTINGS_ARCHIVE" in save_sql
+    assert "description" not in save_sql and set(save_params) == {"user_id", "job_id", "status"}
+    assert "JOBLISTINGS_ARCHIVE" in cursor.execute.call_args_list[-1].args[0]
+    assert saved.json() == [{"JOB_ID": "job-1", "TITLE": "Data Engineer", "STATUS": "Applied"}]
+
+def test_bulk_job_actions_use_one_statement_each(feedback_user):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("job-1",), ("job-2",)]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        saved = client.post("/jobs/save/bulk", json={"jobs": [{"job_id": j} for j in ("job-1", "job-2", "job-3")]})
+        updated = client.put(
+            "/jobs/update-status/bulk",
+            json={"updates": [{"job_id": "job-1", "new_status": "Applied"}, {"job_id": "job-2", "new_status": "Rejected"}]},
+        )
+        deleted = client.post("/jobs/delete/bulk", json={"job_ids": ["job-1", "job-2", "job-1"]})
+
+    assert saved.json()["count"] == 2
+    assert saved.json()["results"][2] == {"job_id": "job-3", "status": "not_found"}
+    assert updated.json()["count"] == 2
+    assert [r["status"] for r in deleted.json()["results"]] == ["deleted", "deleted"]
+    writes = [c for c in cursor.execute.call_args_list if not c.args[0].lstrip().startswith("SELECT")]
+    assert [c.args[0].split()[0] for c in writes] == ["MERGE", "UPDATE", "DELETE"]
+    assert writes[0].args[1]["v_1_0"] == "job-2" and "v_2_0" not in writes[0].args[1]
+    assert all(c.args[1]["user_id"] == str(feedback_user.id) for c in writes)
+    assert conn.commit.call_count == 3
+
+def test_saved_jobs_support_etags_and_deltas(feedback_user):
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (2, datetime(2024, 12, 1, 10, 30))
+    cursor.description = [("JOB_ID",), ("STATUS",), ("CREATED_AT",), ("UPDATED_AT",)]
+    cursor.fetchall.return_value = [
+        ("job-1", "Not Applied", datetime(2024, 11, 1), None),
+        ("job-2", "Applied", datetime(2024, 11, 2), datetime(2024, 12, 1, 10, 30)),
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        full = client.get("/users/jobs")
+        etag = full.headers["ETag"]
+        unchanged = client.get("/jobs/saved", headers={"If-None-Match": etag})
+        delta = client.get("/jobs/saved", params={"updated_since": "2024-12-01T10:00:00"})
+
+    assert full.headers["X-Total-Count"] == "2"
+    assert full.headers["X-Last-Modified"] == "2024-12-01T10:30:00"
+    assert len(full.json()) == 2
+    assert unchanged.status_code == 304 and unchanged.headers["ETag"] == etag
+    assert [job["JOB_ID"] for job in delta.json()] == ["job-2"]
+
+def test_saved_jobs_cache_is_written_through(feedback_user):
+    from FastAPI_Services.main import saved_jobs_cache
+
+    cursor = MagicMock()
+    cursor.description = [("JOB_ID",), ("STATUS",)]
+    cursor.fetchone.side_effect = [(2, datetime(2024, 12, 1)), (2, datetime(2024, 12, 2), 0)]
+    cursor.fetchall.side_effect = [
+        [("job-1", "Not Applied"), ("job-2", "Not Applied")],
+        [("job-2", "Applied")],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn) as connect:
+        first = client.get("/jobs/saved")
+        client.put("/jobs/update-status", data={"job_id": "job-2", "new_status": "Applied"})
+        second = client.get("/users/jobs")
+
+    # One connection for the first read and one for the update; the second read is served from memory
+    assert connect.call_count == 2
+    assert first.json()[1]["STATUS"] == "Not Applied"
+    assert {job["JOB_ID"]: job["STATUS"] for job in second.json()} == {"job-1": "Not Applied", "job-2": "Applied"}
+    assert second.headers["X-Last-Modified"] == "2024-12-02T00:00:00"
+    assert saved_jobs_cache.get(str(feedback_user.id))["size"] > 0
+
+def test_saved_jobs_cache_is_dropped_when_another_worker_wrote(feedback_user):
+    from FastAPI_Services.main import saved_jobs_cache
+
+    user_id = str(feedback_user.id)
+    # This worker cached job-1 before another worker set it to Applied
+    saved_jobs_cache.set(user_id, {
+        "jobs": {"job-1": {"JOB_ID": "job-1", "STATUS": "Not Applied"}, "job-2": {"JOB_ID": "job-2", "STATUS": "Not Applied"}},
+        "count": 2, "last_modified": datetime(2024, 12, 1), "validated_at": time.monotonic(), "size": 0,
+    })
+    cursor = MagicMock()
+    cursor.description = [("JOB_ID",), ("STATUS",)]
+    cursor.fetchone.side_effect = [(2, datetime(2024, 12, 3), 1), (2, datetime(2024, 12, 3))]
+    cursor.fetchall.side_effect = [
+        [("job-2", "Rejected")],
+        [("job-1", "Applied"), ("job-2", "Rejected")],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        client.put("/jobs/update-status", data={"job_id": "job-2", "new_status": "Rejected"})
+        assert saved_jobs_cache.get(user_id) is None
+        saved = client.get("/jobs/saved")
+
+    changed_params = next(
+        call.args[1] for call in cursor.execute.call_args_list if "COUNT_IF(job_id NOT IN" in call.args[0]
+    )
+    assert changed_params["cached_at"] == datetime(2024, 12, 1) and changed_params["id_0"] == "job-2"
+    assert {job["JOB_ID"]: job["STATUS"] for job in saved.json()} == {"job-1": "Applied", "job-2": "Rejected"}
+
+def test_user_job_analytics_are_aggregated_in_sql(feedback_user):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [
+        ("total", None, None, None, None, None, None, 3, 2),
+        ("status", "Applied", None, None, None, None, None, 2, 2),
+        ("status", "Rejected", None, None, None, None, None, 1, 0),
+        ("location", None, "Boston, MA", None, None, None, None, 3, 2),
+        ("posted_date", None, None, None, None, "2024-12-02", None, 1, 1),
+        ("posted_date", None, None, None, None, "2024-12-01", None, 2, 1),
+        ("salary", None, None, None, None, None, None, 3, 2),
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn):
+        response = client.get(
+            "/users/jobs/analytics",
+            params={"status": ["Applied"], "keyword": "50%_off", "posted_from": "2024-12-01"},
+        )
+
+    assert response.status_code == 200
+    analytics = response.json()
+    assert (analytics["total"], analytics["saved"]) == (2, 3)
+    assert analytics["status"] == [{"value": "Applied", "count": 2}]
+    assert analytics["options"]["status"] == ["Applied", "Rejected"]
+    assert [item["value"] for item in analytics["posted_date"]] == ["2024-12-01", "2024-12-02"]
+    assert analytics["salary"] == []
+    sql, params = cursor.execute.call_args.args
+    assert cursor.execute.call_count == 1 and "GROUPING SETS" in sql
+    assert params["keyword"] == "%50!%!_off%" and params["status_0"] == "Applied"
+
+def test_listing_analytics_served_from_rollups(feedback_user):
+    from FastAPI_Services.main import listing_rollup_cache
+
+    listing_rollup_cache.clear()
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (datetime(2024, 12, 1),)
+    cursor.fetchall.return_value = [
+        (15, None, None, None, None, 3),
+        (7, "Acme", None, None, None, 2),
+        (7, "Beta", None, None, None, 1),
+        (13, None, None, "data engineer", None, 2),
+        (13, None, None, "analyst", None, 1),
+        (5, "Acme", None, "data engineer", None, 2),
+        (5, "Beta", None, "analyst", None, 1),
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn) as connect:
+        unfiltered = client.get("/jobs/listings/analytics")
+        filtered = client.get("/jobs/listings/analytics", params={"search_query": ["data engineer"]})
+
+    assert connect.call_count == 1
+    assert unfiltered.json()["total"] == 3
+    assert unfiltered.json()["company"] == [{"value": "Acme", "count": 2}, {"value": "Beta", "count": 1}]
+    assert filtered.json()["total"] == 2 and filtered.json()["listings"] == 3
+    assert filtered.json()["company"] == [{"value": "Acme", "count": 2}]
+    assert filtered.json()["options"]["search_query"] == ["analyst", "data engineer"]
+
+def test_wordcloud_terms_are_cached_by_filter_hash(feedback_user):
+    from FastAPI_Services.main import saved_jobs_cache
+
+    saved_jobs_cache.set(str(feedback_user.id), {
+        "jobs": {}, "count": 2, "last_modified": datetime(2024, 12, 1),
+        "validated_at": time.monotonic(), "size": 0,
+    })
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("python", 5), ("sql", 3)]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_user_results_db_connection", return_value=conn) as connect, \
+         patch("FastAPI_Services.main.WordCloud", None):
+        first = client.get("/users/jobs/terms", params={"status": ["Applied"]})
+        second = client.get("/users/jobs/terms", params={"status": ["Applied"]})
+        image = client.get("/users/jobs/wordcloud", params={"status": ["Applied"]})
+
+    assert first.json() == {"python": 5, "sql": 3} == second.json()
+    assert connect.call_count == 1
+    assert "JOB_TERMS" in cursor.execute.call_args.args[0]
+    assert image.status_code == 501
+
+def test_wordcloud_png_is_rendered_once(feedback_user):
+    from FastAPI_Services.main import saved_jobs_cache
+
+    saved_jobs_cache.set(str(feedback_user.id), {
+        "jobs": {}, "count": 1, "last_modified": None, "validated_at": time.monotonic(), "size": 0,
+    })
+    with patch("FastAPI_Services.main.WordCloud", MagicMock()), \
+         patch("FastAPI_Services.main.load_user_job_terms", return_value={"python": 2}), \
+         patch("FastAPI_Services.main.render_wordcloud_png", return_value=b"png") as render:
+        first = client.get("/users/jobs/wordcloud")
+        second = client.get("/users/jobs/wordcloud")
+        revalidated = client.get("/users/jobs/wordcloud", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.content == b"png" == second.content
+    assert first.headers["content-type"] == "image/png"
+    assert render.call_count == 1
+    assert revalidated.status_code == 304
+
+def test_listing_salaries_are_computed_in_sql(feedback_user):
+    from FastAPI_Services.main import listing_salary_cache
+
+    listing_salary_cache.clear()
+    rollups = {"sets": {}, "refreshed_at": datetime(2024, 12, 1), "validated_at": time.monotonic()}
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [
+        ("total", None, None, 3, 90000, 105000, 120000, 135000, 144000, 150000),
+        ("band", None, 90000, 1, 90000, 90000, 90000, 90000, 90000, 90000),
+        ("band", None, 120000, 1, 120000, 120000, 120000, 120000, 120000, 120000),
+        ("band", None, 150000, 1, 150000, 150000, 150000, 150000, 150000, 150000),
+        ("search_query", "analyst", None, 1, 90000, 90000, 90000, 90000, 90000, 90000),
+        ("search_query", "data engineer", None, 2, 120000, 127500, 135000, 142500, 147000, 150000),
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.load_listing_rollups", return_value=rollups), \
+         patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn) as connect:
+        first = client.get("/jobs/listings/salaries", params={"min_salary": 80000, "company": ["Acme"]})
+        second = client.get("/jobs/listings/salaries", params={"min_salary": 80000, "company": ["Acme"]})
+
+    assert first.status_code == 200 and first.json() == second.json()
+    assert connect.call_count == 1
+    salaries = first.json()
+    assert salaries["count"] == 3 and salaries["statistics"]["median"] == 120000
+    assert salaries["histogram"][0] == {"min": 90000, "max": 100000, "count": 1}
+    assert [item["value"] for item in salaries["search_query"]] == ["data engineer", "analyst"]
+    sql, params = cursor.execute.call_args.args
+    assert "SALARY_MAX >= %(min_salary)s" in sql and "DESCRIPTION" not in sql
+    assert (params["min_salary"], params["currency"], params["company_0"]) == (80000, "USD", "Acme")
+
+def test_job_listings_are_filtered_and_paginated_in_sql(feedback_user):
+    cursor = MagicMock()
+    cursor.description = [("JOB_ID",), ("TITLE",), ("SORT_KEY_0",), ("SORT_KEY_1",), ("SORT_KEY_2",)]
+    cursor.fetchall.side_effect = [
+        [
+            ("job-1", "Data Engineer", datetime(2024, 12, 2).date(), "job-1", "data engineer"),
+            ("job-2", "Analytics Engineer", datetime(2024, 12, 1).date(), "job-2", "data engineer"),
+        ],
+        [("job-3", "Data Analyst", datetime(2024, 11, 30).date(), "job-3", "analyst")],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn):
+        first = client.get("/jobs/listings", params={"limit": 1, "company": ["Acme"], "keyword": "data"})
+        second = client.get(
+            "/jobs/listings",
+            params={"limit": 1, "company": ["Acme"], "keyword": "data", "cursor": first.headers["X-Next-Cursor"]},
+        )
+        bad_sort = client.get("/jobs/listings", params={"sort": "description"})
+        bad_cursor = client.get("/jobs/listings", params={"cursor": "not-a-cursor"})
+
+    assert first.json() == [{"JOB_ID": "job-1", "TITLE": "Data Engineer"}]
+    assert second.json() == [{"JOB_ID": "job-3", "TITLE": "Data Analyst"}]
+    assert "X-Next-Cursor" not in second.headers
+    sql, params = cursor.execute.call_args.args
+    assert "LIMIT %(limit)s" in sql and "SORT_KEY_0 DESC" in sql
+    assert (params["limit"], params["company_0"], params["keyword"]) == (2, "Acme", "%data%")
+    assert [params[f"cursor_{i}"] for i in range(3)] == ["2024-12-02", "job-1", "data engineer"]
+    assert bad_sort.status_code == 400 and bad_cursor.status_code == 400
+
+def test_large_responses_are_compressed(feedback_user):
+    from decimal import Decimal
+
+    cursor = MagicMock()
+    cursor.description = [("JOB_ID",), ("DESCRIPTION",), ("SALARY_MIN",), ("SORT_KEY_0",), ("SORT_KEY_1",), ("SORT_KEY_2",)]
+    cursor.fetchall.return_value = [
+        (f"job-{i}", "Build data pipelines in Python and SQL. " * 20, Decimal("120000"), datetime(2024, 12, 1).date(), f"job-{i}", "q")
+        for i in range(20)
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    with patch("FastAPI_Services.main.get_snowflake_joblistings_connection", return_value=conn):
+        compressed = client.get("/jobs/listings", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/jobs/listings", headers={"Accept-Encoding": "identity"})
+    small = client.get("/users/me", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert int(compressed.headers["content-length"]) < len(identity.content) / 5
+    assert compressed.json() == identity.json()
+    assert compressed.json()[0]["SALARY_MIN"] == 120000
+    assert "content-encoding" not in identity.headers and "content-encoding" not in small.headers
+
+def test_startup_creates_listing_archive(mock_env):
+    jobs_cursor = MagicMock()
+    with patch("FastAPI_Services.main.initialize_user_profiles_table"), \
+         patch("FastAPI_Services.main.initialize_saved_jobs_table"), \
+         patch("FastAPI_Services.main.get_token_encoder"), \
+         patch("FastAPI_Services.main.get_snowflake_joblistings_connection") as jobs_connection:
+        jobs_connection.return_value.cursor.return_value = jobs_cursor
+        with TestClient(app):
+            pass
+
+    # Saves and saved-job reads join the archive before the first DAG run creates it
+    create_sql = jobs_cursor.execute.call_args.args[0]
+    assert "CREATE TABLE IF NOT EXISTS" in create_sql
+    assert "JOBLISTINGS_ARCHIVE" in create_sql
@@ -26,3 +26,294 @@ def test_create_access_token_expiry():
     # Attempt to decode the token and expect an ExpiredSignatureError
     with pytest.raises(ExpiredSignatureError):
         jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+def test_document_text_served_from_cache():
+    from unittest.mock import patch
+    from uuid import uuid4
+    from datetime import datetime
+    import asyncio
+    from FastAPI_Services.main import UserOut, document_extraction_cache, get_document_text
+
+    user = UserOut(
+        id=uuid4(), username="testuser", email="test@example.com",
+        resume_link="https://bucket/resume.pdf", cover_letter_link=None,
+        created_at=datetime.now(), updated_at=None, resume_hash="a" * 64,
+    )
+    document_extraction_cache.set((str(user.id), "resume", "a" * 64), {"text": "cached resume text"})
+
+    with patch("FastAPI_Services.main.fetch_document") as mock_fetch, \
+         patch("FastAPI_Services.main.s3_client") as mock_s3:
+        assert asyncio.run(get_document_text(user, "resume")) == "cached resume text"
+        mock_fetch.assert_not_called()
+        mock_s3.get_object.assert_not_called()
+
+def test_fetch_document_revalidates_with_etag():
+    import asyncio
+    import httpx
+    from unittest.mock import patch
+    from FastAPI_Services.main import fetch_document
+
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"%PDF-1.4", headers={"ETag": '"v1"'})
+
+    async def fetch_twice():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch("FastAPI_Services.main.get_http_client", return_value=client):
+            first = await fetch_document("https://bucket/doc.pdf", "resume")
+            second = await fetch_document("https://bucket/doc.pdf", "resume")
+        await client.aclose()
+        return first, second
+
+    assert asyncio.run(fetch_twice()) == (b"%PDF-1.4", b"%PDF-1.4")
+    assert seen_headers == [None, '"v1"']
+
+def test_extract_pdf_returns_sections():
+    import fitz
+    from FastAPI_Services.main import extract_pdf
+
+    doc = fitz.open()
+    for page_number in range(12):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"EXPERIENCE {page_number}", fontsize=16)
+        page.insert_text((72, 100), f"Built data pipelines on page {page_number}.", fontsize=10)
+    pdf_content = doc.tobytes()
+
+    extraction = extract_pdf(pdf_content)
+    assert extraction["page_count"] == 12
+    assert len(extraction["pages"]) == 12
+    assert extraction["sections"][0]["heading"] == "EXPERIENCE 0"
+    assert "page 11" in extraction["sections"][-1]["text"]
+
+def test_extract_pdf_timeout_covers_whole_document():
+    import fitz
+    from unittest.mock import patch
+    from concurrent.futures import Future
+    from fastapi import HTTPException
+    from FastAPI_Services.main import extract_pdf
+
+    doc = fitz.open()
+    for _ in range(12):
+        doc.new_page()
+    pdf_content = doc.tobytes()
+
+    class StuckExecutor:
+        def __init__(self):
+            self.futures = []
+
+        def submit(self, *args):
+            self.futures.append(Future())  # never completes
+            return self.futures[-1]
+
+    executor = StuckExecutor()
+    with patch("FastAPI_Services.main.get_pdf_executor", return_value=executor), \
+         patch("FastAPI_Services.main.PDF_EXTRACTION_WORKERS", 4), \
+         patch("FastAPI_Services.main.PDF_EXTRACTION_TIMEOUT", 0.2):
+        started = time.monotonic()
+        with pytest.raises(HTTPException) as exc_info:
+            extract_pdf(pdf_content)
+        elapsed = time.monotonic() - started
+
+    assert exc_info.value.status_code == 504
+    assert len(executor.futures) == 4
+    # One deadline for all page ranges rather than 0.2s per range
+    assert elapsed < 0.5
+    assert all(future.cancelled() for future in executor.futures)
+
+
+def test_concurrency_limiter_rejects_when_queue_is_full():
+    import asyncio
+    from fastapi import HTTPException
+    from FastAPI_Services.main import ConcurrencyLimiter
+
+    limiter = ConcurrencyLimiter("test", limit=1, max_waiting=1, wait_timeout=5)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.acquire()
+        limiter.release()
+        await waiter
+        limiter.release()
+        return exc_info.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 429
+    assert "Retry-After" in error.headers
+
+
+def test_streamed_response_releases_slot_when_client_is_gone():
+    import asyncio
+    from FastAPI_Services.main import ConcurrencyLimiter, sse_response
+
+    limiter = ConcurrencyLimiter("test", limit=1, max_waiting=0, wait_timeout=0.1)
+    started = []
+
+    async def events():
+        started.append(True)
+        yield "data: 1\n\n"
+
+    async def receive():
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    async def gone(message):
+        raise OSError("client disconnected")
+
+    async def collect(message):
+        pass
+
+    async def run():
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        await limiter.acquire()
+        dropped = sse_response(events(), limiter)
+        with pytest.raises(Exception):  # OSError, or ClientDisconnect on newer Starlette
+            await dropped(scope, receive, gone)
+        await limiter.acquire()  # the dropped stream's slot is free again
+        completed = sse_response(events(), limiter)
+        await completed(scope, receive, collect)
+        completed.release()  # a second release is a no-op
+        return limiter._semaphore._value
+
+    assert asyncio.run(run()) == 1
+    assert started == [True]
+
+
+def test_task_queue_retries_failed_tasks():
+    import asyncio
+    from FastAPI_Services.main import TaskQueue
+
+    queue = TaskQueue(workers=1, max_size=10, max_retries=1, retry_delay=0.01, retention=60)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("transient")
+        return "ok"
+
+    async def run():
+        task = queue.submit("test", "user", flaky)
+        await queue.wait(task["task_id"], timeout=2)
+        await queue.stop()
+        return task
+
+    task = asyncio.run(run())
+    assert task["status"] == "completed"
+    assert task["result"] == "ok"
+    assert task["attempts"] == 2
+
+
+def test_select_context_keeps_relevant_sections_within_budget():
+    from FastAPI_Services.main import select_context, count_tokens
+
+    chunks = [
+        "Experience\n" + "Managed retail store staff schedules and inventory. " * 10,
+        "Skills\nPython, SQL, Airflow, Snowflake data pipelines",
+        "Hobbies\n" + "Hiking, photography and travel across national parks. " * 10,
+    ]
+    full_text = "\n\n".join(chunks)
+    budget = count_tokens(chunks[1]) + 5
+
+    context = select_context(full_text, chunks, "Snowflake SQL pipelines", budget)
+    assert context == chunks[1]
+    assert select_context("short text", ["short text"], "SQL", budget) == "short text"
+
+
+def test_select_context_splits_long_single_line_descriptions():
+    from FastAPI_Services.main import select_context, split_text_chunks, count_tokens, CONTEXT_CHUNK_TOKENS
+
+    description = " ".join(
+        f"Sentence {i} covers {'Snowflake SQL pipelines' if i == 70 else 'office logistics and team events'}."
+        for i in range(150)
+    )
+    chunks = split_text_chunks(description)
+
+    assert len(chunks) > 1 and all(count_tokens(chunk) <= CONTEXT_CHUNK_TOKENS for chunk in chunks)
+    context = select_context(description, chunks, "Snowflake SQL", 300)
+    assert "Sentence 70 covers Snowflake SQL pipelines." in context
+    assert 0 < count_tokens(context) <= 300
+    # A single unbreakable token run still yields the start of the text
+    assert select_context("x" * 8000, ["x" * 8000], "SQL", 50).startswith("x")
+
+
+def test_skill_matcher_finds_whole_word_aliases():
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Airflow", "dags"))
+    from skill_extraction import extract_skills
+
+    skills = extract_skills(
+        "Build PySpark pipelines on AWS EKS; C++ or C# a plus. Pythonic code, hives of activity.",
+        "Qualifications:\n- SQL and Snowflake\n- Machine Learning",
+    )
+    assert skills == ["aws", "c#", "c++", "kubernetes", "machine learning", "snowflake", "spark", "sql"]
+    # Skill names that are also ordinary English words are not matched on their own
+    assert extract_skills(
+        "You will excel in a fast-paced team, react quickly to change and spark new ideas. "
+        "Social security and IAM benefits. Containers shipping experience, torch bearers, "
+        "hive of experimentation."
+    ) == []
+    assert extract_skills("React.js, Apache Spark and Microsoft Excel") == ["excel", "javascript", "react", "spark"]
+
+def test_lru_cache_evicts_by_weight():
+    from FastAPI_Services.main import LRUCache
+
+    cache = LRUCache(maxsize=10, max_weight=100, weigh=len)
+    cache.set("a", "x" * 40)
+    cache.set("b", "x" * 40)
+    cache.get("a")
+    cache.set("c", "x" * 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.weight == 80
+    cache.set("a", "x" * 10)
+    assert cache.weight == 50
+
+def test_highlight_terms_drop_stopwords():
+    import os
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Airflow", "dags"))
+    from term_frequencies import highlight_terms
+
+    terms = highlight_terms("Qualifications:\n- Python and SQL\n- Python with C++ and Spark")
+
+    assert terms == {"python": 2, "sql": 1, "c++": 1, "spark": 1}
+    assert highlight_terms("N/A") == {}
+
+def test_parse_salary_annualizes_ranges_and_rates():
+    import os
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Airflow", "dags"))
+    from salary_extraction import parse_salary
+
+    assert parse_salary("BASE SALARY: $110,000 to $160,000 per year, paid bi-monthly") == {
+        "salary_min": 110000, "salary_max": 160000, "salary_currency": "USD", "salary_period": "year",
+    }
+    assert parse_salary("Pay: $76/hour to $81/hour")["salary_min"] == 76 * 2080
+    assert parse_salary("N/A", "Compensation $120K-$150K plus a $10,000 sign-on bonus")["salary_max"] == 150000
+    assert parse_salary("A $2 billion company with 500 employees")["salary_min"] is None
+    # SerpAPI salary tags carry no currency symbol
+    assert parse_salary("120K–150K a year") == {
+        "salary_min": 120000, "salary_max": 150000, "salary_currency": "USD", "salary_period": "year",
+    }
+    assert parse_salary("50K-60K a year")["salary_max"] == 60000
+    assert parse_salary("25–30 an hour")["salary_min"] == 25 * 2080
+    for text in ("3-5 years of experience", "401k and dental", "10K+ employees worldwide"):
+        assert parse_salary(text)["salary_min"] is None
+
+def test_accepted_encoding_honours_preference_and_q_zero():
+    from FastAPI_Services.main import accepted_encoding, RESPONSE_ENCODERS
+
+    assert accepted_encoding("gzip, deflate") == "gzip"
+    assert accepted_encoding("gzip;q=0, deflate") is None
+    assert accepted_encoding("identity") is None
+    assert accepted_encoding("gzip, zstd") == ("zstd" if "zstd" in RESPONSE_ENCODERS else "gzip")